@@ -0,0 +1,212 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.cache import case_tag, invalidate
+from app.models import CaseAudit
+
+logger = logging.getLogger(__name__)
+
+# "sync": la auditoría se escribe en la transacción de la request (modo
+# estricto, para despliegues con requisitos de cumplimiento).
+# "buffered": se encola tras el commit y se inserta en lotes.
+AUDIT_MODE = os.getenv("AUDIT_MODE", "sync")
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+# Donde se vuelcan los eventos si el flush final falla; se reintentan al arrancar.
+# Cada proceso escribe en `<ruta>.<pid>`: los workers no comparten el archivo
+AUDIT_SPILL_PATH = os.getenv("AUDIT_SPILL_PATH", "audit_spill.jsonl")
+
+_PENDING_KEY = "audit_pending"
+
+_buffer: Optional["AuditBuffer"] = None
+
+
+class AuditBuffer:
+    """
+    Cola en proceso de filas de CaseAudit. Se vacía con un INSERT multi-fila
+    cuando acumula `batch_size` filas o cada `flush_interval` segundos, y
+    una última vez en el apagado ordenado (`stop`). Si ese último flush
+    falla, las filas se vuelcan a `<spill_path>.<pid>` y el primer worker
+    que arranque después las inserta.
+
+    Cada fila conserva su `timestamp` (el del cambio) y recibe como
+    `recorded_at` el momento del volcado: el timeline incremental pagina por
+    `recorded_at`, así ninguna auditoría queda por detrás de un cursor que ya
+    avanzó sobre entradas escritas mientras estaba en la cola.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        spill_path: str = AUDIT_SPILL_PATH,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self._pending: List[Dict] = []
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, rows: List[Dict]):
+        self._pending.extend(rows)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Inserta todo lo pendiente en una transacción. Devuelve las filas escritas."""
+        async with self._lock:
+            rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            now = datetime.utcnow()
+            try:
+                async with self.session_factory() as session:
+                    for start in range(0, len(rows), self.batch_size):
+                        batch = [{**row, "recorded_at": now} for row in rows[start:start + self.batch_size]]
+                        await session.execute(insert(CaseAudit), batch)
+                    await session.commit()
+            except BaseException:
+                # También si se cancela: vuelven al frente de la cola y se
+                # reintentan en el próximo flush (o en el de `stop`)
+                self._pending[:0] = rows
+                raise
+        # Los timelines cacheados no incluían estas filas
+        await invalidate(*{case_tag(row["case_id"]) for row in rows})
+        return len(rows)
+
+    async def _run_once(self):
+        """Espera al lote lleno, al intervalo o a `stop`, y vacía la cola."""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+        try:
+            await self.flush()
+        except Exception:
+            logger.warning("Audit flush failed, %d rows pending", len(self._pending), exc_info=True)
+
+    async def _run(self):
+        while not self._stopping:
+            await self._run_once()
+
+    async def start(self):
+        self._recover_spill()
+        if self._pending:
+            try:
+                await self.flush()
+            except Exception:
+                logger.warning("Audit flush failed, %d rows pending", len(self._pending), exc_info=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Sin cancelar: un flush en curso termina (o devuelve sus filas)
+            self._stopping = True
+            self._wake.set()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.error("Final audit flush failed, spilling %d rows to %s", len(self._pending), self.process_spill_path, exc_info=True)
+            self._spill()
+
+    @property
+    def process_spill_path(self) -> str:
+        return f"{self.spill_path}.{os.getpid()}"
+
+    def _spill(self):
+        with open(self.process_spill_path, "a", encoding="utf-8") as spill:
+            for row in self._pending:
+                spill.write(json.dumps(row, default=str) + "\n")
+        self._pending = []
+
+    def _recover_spill(self):
+        # El archivo sin sufijo es el de versiones anteriores (compartido)
+        paths = [self.spill_path] + glob.glob(f"{glob.escape(self.spill_path)}.[0-9]*")
+        claimed = f"{self.spill_path}.claimed-{os.getpid()}"
+        for path in paths:
+            # El rename es atómico: si otro worker lo reclamó antes, se salta
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            recovered = 0
+            with open(claimed, encoding="utf-8") as spill:
+                for line in spill:
+                    if line.strip():
+                        row = json.loads(line)
+                        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+                        self._pending.append(row)
+                        recovered += 1
+            # Ya están en memoria: si no llegan a escribirse, stop() las vuelve a volcar
+            os.remove(claimed)
+            logger.info("Recovered %d audit rows from %s", recovered, path)
+
+
+async def record_audit(session: AsyncSession, rows: List[Dict]):
+    """
+    Registra filas de CaseAudit asociadas a la transacción de `session`.
+    En modo estricto se insertan en esa transacción; con buffer se encolan
+    solo si la transacción hace commit (un rollback las descarta).
+    """
+    if not rows:
+        return
+    if _buffer is None:
+        await session.execute(insert(CaseAudit), rows)
+        return
+    session.sync_session.info.setdefault(_PENDING_KEY, []).extend(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_committed(session):
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows and _buffer is not None:
+        _buffer.put(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def get_audit_buffer() -> Optional[AuditBuffer]:
+    return _buffer
+
+
+async def start_audit_buffer(session_factory, **kwargs) -> AuditBuffer:
+    global _buffer
+    _buffer = AuditBuffer(session_factory, **kwargs)
+    await _buffer.start()
+    return _buffer
+
+
+async def stop_audit_buffer():
+    """Apagado ordenado: escribe lo pendiente y vuelve al modo estricto."""
+    global _buffer
+    if _buffer is None:
+        return
+    # uvicorn ya esperó a las requests en curso: nada más llega a la cola
+    await _buffer.stop()
+    _buffer = None
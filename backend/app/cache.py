@@ -0,0 +1,368 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+from functools import wraps
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.coder import Coder
+from fastapi_cache.decorator import cache
+from fastapi_cache.types import Backend
+from redis import asyncio as aioredis
+
+from app.metrics import CACHE_REQUESTS
+from app.responses import ORJSONResponse, dumps
+
+logger = logging.getLogger(__name__)
+
+# Tags de invalidación
+CASE_LIST_TAG = "case-list"
+ALL_TAG = "all"  # Incluido en todas las entradas: invalida el cache completo
+# Versión compartida del mapa id -> nombre que cada worker tiene en memoria
+USERS_TAG = "users"
+
+CACHE_EXPIRE = 300
+# Las versiones de tag deben vivir más que cualquier entrada cacheada
+TAG_EXPIRE = 7 * 24 * 3600
+
+# L1 (memoria del proceso)
+CACHE_L1_MAXSIZE = int(os.getenv("CACHE_L1_MAXSIZE", "2048"))
+CACHE_L1_TTL = int(os.getenv("CACHE_L1_TTL", "30"))
+# Con Redis disponible las versiones de tag se releen pronto para ver
+# las invalidaciones hechas por otros workers
+CACHE_L1_TAG_TTL = float(os.getenv("CACHE_L1_TAG_TTL", "1"))
+# Tras un error de Redis se trabaja solo con L1 durante este tiempo
+CACHE_L2_RETRY_INTERVAL = float(os.getenv("CACHE_L2_RETRY_INTERVAL", "15"))
+
+_KEY_PARAM_TYPES = (str, int, float, bool, datetime, date, Enum)
+
+
+def case_tag(case_id: int) -> str:
+    return f"case:{case_id}"
+
+
+class TieredBackend(Backend):
+    """
+    Backend de dos niveles para FastAPICache: un LRU/TTL acotado en memoria
+    (L1) delante de un backend compartido como Redis (L2, opcional).
+
+    Si L2 falla se degrada a solo-L1 y reintenta pasado
+    CACHE_L2_RETRY_INTERVAL segundos. Las entradas en L1 viven como mucho
+    CACHE_L1_TTL, lo que acota lo que un worker puede servir sin ver las
+    invalidaciones de otros. Las versiones de tag escritas sin L2 se
+    guardan y se escriben en L2 en cuanto vuelve, antes de cualquier otra
+    operación: si no, al recuperarse todos leerían la versión anterior a
+    la caída y servirían entradas ya invalidadas.
+    """
+
+    def __init__(
+        self,
+        l2: Optional[Backend] = None,
+        maxsize: int = CACHE_L1_MAXSIZE,
+        l1_ttl: float = CACHE_L1_TTL,
+        tag_ttl: float = CACHE_L1_TAG_TTL,
+        retry_interval: float = CACHE_L2_RETRY_INTERVAL,
+    ):
+        self.l2 = l2
+        self.maxsize = maxsize
+        self.l1_ttl = l1_ttl
+        self.tag_ttl = tag_ttl
+        self.retry_interval = retry_interval
+        self._store: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._l2_down_until = 0.0
+        # Versiones de tag pendientes de escribir en L2: clave -> (valor, expire)
+        self._unsynced_tags: Dict[str, Tuple[bytes, Optional[int]]] = {}
+        self.counters = {"l1_hits": 0, "l1_misses": 0, "l2_hits": 0, "l2_misses": 0, "l2_errors": 0}
+
+    @property
+    def l2_available(self) -> bool:
+        return self.l2 is not None and time.monotonic() >= self._l2_down_until
+
+    def _count(self, tier: str, result: str):
+        self.counters[f"{tier}_{result}"] += 1
+        CACHE_REQUESTS.labels(tier, result).inc()
+
+    def _l2_failed(self, operation: str):
+        self._count("l2", "errors")
+        self._l2_down_until = time.monotonic() + self.retry_interval
+        logger.warning("Cache L2 %s failed, using L1 only for %ss", operation, self.retry_interval, exc_info=True)
+
+    def _l1_expire(self, key: str, expire: Optional[float]) -> float:
+        ttl = self.l1_ttl
+        if ":tag:" in key and self.l2_available:
+            ttl = self.tag_ttl
+        if expire:
+            ttl = min(ttl, expire)
+        return time.monotonic() + ttl
+
+    def _l1_get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._store[key]
+            return None
+        self._store.move_to_end(key)
+        return entry
+
+    def _l1_set(self, key: str, value: bytes, expire: Optional[float]):
+        self._store[key] = (self._l1_expire(key, expire), value)
+        self._store.move_to_end(key)
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+    async def _sync_tags(self):
+        """Escribe en L2 las versiones de tag incrementadas mientras no estaba."""
+        for key, (value, expire) in list(self._unsynced_tags.items()):
+            try:
+                await self.l2.set(key, value, expire)
+            except Exception:
+                self._l2_failed("set")
+                return
+            self._unsynced_tags.pop(key, None)
+        logger.info("Cache L2 back, re-published pending tag versions")
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        if self._unsynced_tags and self.l2_available:
+            await self._sync_tags()
+        entry = self._l1_get(key)
+        if entry is not None:
+            self._count("l1", "hits")
+            return int(entry[0] - time.monotonic()), entry[1]
+        self._count("l1", "misses")
+
+        if self.l2_available:
+            try:
+                ttl, value = await self.l2.get_with_ttl(key)
+            except Exception:
+                self._l2_failed("get")
+            else:
+                if value is not None:
+                    self._count("l2", "hits")
+                    self._l1_set(key, value, ttl if ttl and ttl > 0 else None)
+                    return ttl, value
+                self._count("l2", "misses")
+        return 0, None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        if self._unsynced_tags and self.l2_available:
+            await self._sync_tags()
+        self._l1_set(key, value, expire)
+        is_tag = ":tag:" in key
+        if self.l2_available:
+            try:
+                await self.l2.set(key, value, expire)
+                self._unsynced_tags.pop(key, None)
+                return
+            except Exception:
+                self._l2_failed("set")
+        if is_tag and self.l2 is not None:
+            self._unsynced_tags[key] = (value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        count = 0
+        if namespace:
+            for stored_key in [k for k in self._store if k.startswith(namespace)]:
+                del self._store[stored_key]
+                count += 1
+        elif key and self._store.pop(key, None) is not None:
+            count += 1
+        if self.l2_available:
+            try:
+                count = max(count, await self.l2.clear(namespace, key) or 0)
+            except Exception:
+                self._l2_failed("clear")
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "l1_size": len(self._store),
+            "l1_maxsize": self.maxsize,
+            "l2_configured": self.l2 is not None,
+            "l2_available": self.l2_available,
+            "unsynced_tags": len(self._unsynced_tags),
+        }
+
+
+class JsonableCoder(Coder):
+    """
+    Guarda la respuesta ya convertida a JSON plano, de modo que un HIT
+    devuelve exactamente lo mismo que un MISS (fechas como strings ISO).
+
+    Si el endpoint devuelve una respuesta ya renderizada se guarda su cuerpo
+    sin volver a serializar, y un HIT se devuelve como respuesta JSON con
+    los bytes guardados: no se decodifica para serializarlo de nuevo.
+    """
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        if isinstance(value, Response):
+            return value.body
+        return dumps(value)
+
+    @classmethod
+    def decode(cls, value: bytes) -> Any:
+        return json.loads(value)
+
+    @classmethod
+    def decode_as_type(cls, value: bytes, *, type_=None) -> Any:
+        return ORJSONResponse(content=value)
+
+
+def _initialized() -> bool:
+    return FastAPICache._init and FastAPICache._backend is not None
+
+
+def _tag_key(tag: str) -> str:
+    return f"{FastAPICache.get_prefix()}:tag:{tag}"
+
+
+async def _tag_versions(tags) -> str:
+    backend = FastAPICache.get_backend()
+    versions = []
+    for tag in tags:
+        try:
+            version = await backend.get(_tag_key(tag))
+        except Exception:
+            logger.warning("Error reading cache tag '%s'", tag, exc_info=True)
+            version = None
+        if isinstance(version, bytes):
+            version = version.decode()
+        if not version:
+            # Un tag ausente (expirado, desalojado de L1, Redis caído) se trata
+            # como invalidado: nueva versión, nunca se reutiliza una anterior
+            version = await _bump_tag(backend, tag)
+        versions.append(version)
+    return ".".join(versions)
+
+
+async def _bump_tag(backend, tag: str) -> str:
+    version = str(time.time_ns())
+    try:
+        await backend.set(_tag_key(tag), version.encode(), TAG_EXPIRE)
+    except Exception:
+        logger.warning("Error invalidating cache tag '%s'", tag, exc_info=True)
+    return version
+
+
+def _tagged_key_builder(tags):
+    async def key_builder(func, namespace: str = "", *, request=None, response=None, args=(), kwargs=None):
+        kwargs = kwargs or {}
+        # Parámetros normalizados: solo valores simples, sin None, ordenados
+        params = sorted(
+            (name, str(value.value if isinstance(value, Enum) else value))
+            for name, value in kwargs.items()
+            if value is not None and isinstance(value, _KEY_PARAM_TYPES)
+        )
+        current_user = kwargs.get("current_user")
+        role = current_user.rol.value if current_user is not None else "-"
+
+        resolved_tags = [ALL_TAG] + [tag.format(**kwargs) for tag in tags]
+        versions = await _tag_versions(resolved_tags)
+
+        digest = hashlib.md5(f"{params}".encode()).hexdigest()
+        return f"{namespace}:{func.__module__}:{func.__name__}:{role}:{digest}:{versions}"
+
+    return key_builder
+
+
+def cached(*tags: str, expire: int = CACHE_EXPIRE):
+    """
+    Cache read-through sobre fastapi-cache con invalidación por tags.
+
+    Los tags son plantillas que se formatean con los parámetros del
+    endpoint, p. ej. ``cached("case:{case_id}")``. La clave incluye la
+    versión actual de cada tag, así que `invalidate` deja inalcanzables
+    las entradas viejas sin tener que enumerarlas.
+    """
+    def decorator(func):
+        cached_func = cache(
+            expire=expire,
+            coder=JsonableCoder,
+            key_builder=_tagged_key_builder(tags),
+        )(func)
+
+        @wraps(cached_func)
+        async def inner(*args, **kwargs):
+            if not _initialized():
+                kwargs.pop("__fastapi_cache_request", None)
+                kwargs.pop("__fastapi_cache_response", None)
+                return await func(*args, **kwargs)
+
+            result = await cached_func(*args, **kwargs)
+            # El cache es del servidor: el cliente siempre debe revalidar
+            response = kwargs.get("__fastapi_cache_response")
+            if response is not None:
+                response.headers["Cache-Control"] = "no-cache"
+                if isinstance(result, Response) and result is not response:
+                    # FastAPI solo copia las cabeceras de la sub-respuesta
+                    # cuando el endpoint no devuelve un Response propio
+                    result.headers.update(response.headers)
+            return result
+
+        return inner
+
+    return decorator
+
+
+def init_cache():
+    """
+    L1 en memoria delante de Redis (L2). REDIS_URL vacío deja solo L1; si
+    Redis no responde se degrada a L1.
+    """
+    redis_url = os.getenv("REDIS_URL", "redis://redis:6379")
+    l2 = None
+    if redis_url:
+        # fastapi-cache trabaja con bytes: no decodificar las respuestas
+        redis = aioredis.from_url(redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+        l2 = RedisBackend(redis)
+    FastAPICache.init(TieredBackend(l2), prefix="fastapi-cache", expire=CACHE_EXPIRE)
+
+
+async def invalidate(*tags: str):
+    """Invalida todas las entradas cacheadas con alguno de los tags dados."""
+    if not _initialized():
+        return
+    backend = FastAPICache.get_backend()
+    for tag in set(tags):
+        await _bump_tag(backend, tag)
+
+
+async def invalidate_cases(*case_ids: Optional[int]):
+    """Invalida el listado/estadísticas y el detalle de los casos dados."""
+    await invalidate(CASE_LIST_TAG, *(case_tag(case_id) for case_id in case_ids if case_id is not None))
+
+
+async def invalidate_all():
+    await invalidate(ALL_TAG)
+
+
+async def invalidate_users():
+    """Nombres de usuario de todos los workers y lo cacheado que los incluye."""
+    await invalidate(USERS_TAG, ALL_TAG)
+
+
+async def tag_version(tag: str) -> Optional[str]:
+    """Versión actual de un tag (None sin cache inicializado)."""
+    if not _initialized():
+        return None
+    return await _tag_versions([tag])
+
+
+def cache_stats() -> Optional[Dict[str, Any]]:
+    """Contadores por nivel del backend en uso (None si no es escalonado)."""
+    if not _initialized():
+        return None
+    backend = FastAPICache.get_backend()
+    return backend.stats() if isinstance(backend, TieredBackend) else None
@@ -0,0 +1,194 @@
+import os
+import zlib
+from typing import List, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+# Respuestas más chicas que esto no compensan el coste de comprimir
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# Niveles rápidos: se comprime en el camino de la request
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# Solo tipos de texto: imágenes, PDF, zip, xlsx/docx, etc. ya vienen comprimidos
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class _GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        # SYNC_FLUSH: el cliente puede descomprimir cada bloque al recibirlo
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encodings() -> List[str]:
+    """Codificaciones soportadas, en orden de preferencia del servidor."""
+    encodings = []
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+
+ENCODERS = {"br": _BrotliEncoder, "zstd": _ZstdEncoder, "gzip": _GzipEncoder}
+
+
+def choose_encoding(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """
+    Negociación de Accept-Encoding: la codificación con mayor q que el
+    servidor soporte; a igual q manda el orden de `available`. q=0 excluye.
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _compressible(headers: dict) -> bool:
+    content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) and b"content-encoding" not in headers
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compresión con negociación: brotli y zstd si están
+    instalados y el cliente los acepta, gzip en cualquier caso.
+
+    Una respuesta de un solo mensaje se comprime entera si supera
+    `minimum_size`; una respuesta en streaming (exportaciones) se comprime
+    bloque a bloque sin acumularla. Solo se comprimen tipos de texto, nunca
+    respuestas ya codificadas ni parciales (Range).
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, encodings: Optional[List[str]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings if encodings is not None else available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding, self.encodings) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "encoder": None, "passthrough": False}
+
+        async def send_compressed(message):
+            if state["passthrough"]:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                if message["status"] == 206 or not _compressible(headers):
+                    state["passthrough"] = True
+                    await send(message)
+                    return
+                # Se retiene hasta saber si el cuerpo alcanza el mínimo
+                state["start"] = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            start = state["start"]
+
+            if state["encoder"] is None:
+                if not more_body and len(body) < self.minimum_size:
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+                state["encoder"] = ENCODERS[encoding]()
+                headers = [
+                    (name, value) for name, value in start.get("headers", [])
+                    if name != b"content-length"
+                ]
+                headers.append((b"content-encoding", encoding.encode()))
+                headers.append((b"vary", b"Accept-Encoding"))
+                if not more_body:
+                    compressed = state["encoder"].finish(body)
+                    headers.append((b"content-length", str(len(compressed)).encode()))
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send({**start, "headers": headers})
+
+            encoder = state["encoder"]
+            data = encoder.chunk(body) if more_body else encoder.finish(body)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,127 @@
+import hashlib
+import inspect
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import wraps
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+
+# (partes del ETag, Last-Modified) o None si no se puede validar (p. ej. 404)
+Validator = Callable[..., Awaitable[Optional[Tuple[Any, Optional[datetime]]]]]
+
+_REQUEST_PARAM = "__conditional_request"
+_RESPONSE_PARAM = "__conditional_response"
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag débil: la compresión cambia los bytes, no el contenido."""
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    # Las fechas del modelo son UTC sin zona horaria
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def opaque_etag(etag: str) -> str:
+    """ETag sin el prefijo W/, para la comparación débil."""
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Comparación débil de If-None-Match; If-Modified-Since solo se usa si
+    el cliente no envió ETag (RFC 9110, 13.2.2).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or opaque_etag(etag) in {opaque_etag(tag) for tag in candidates}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        # Las fechas HTTP tienen resolución de segundos
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def conditional(validator: Validator, on_missing: Optional[Callable[..., Awaitable[Any]]] = None):
+    """
+    GET condicional (ETag / Last-Modified) delante del endpoint y de su cache.
+
+    `validator` recibe los mismos parámetros que el endpoint y devuelve
+    las partes del ETag y la fecha de última modificación, calculadas con
+    una consulta barata (updated_at, max/count). Si el cliente ya tiene esa
+    versión se responde 304 sin cargar ni serializar los datos.
+
+    Si el validador devuelve None y se pasa `on_missing`, este atiende la
+    request en lugar del endpoint (p. ej. leer del archivo): el endpoint no
+    repite la comprobación de existencia.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        parameters = list(signature.parameters.values())
+        # FastAPI inyecta un solo parámetro Request y uno Response por
+        # endpoint: se reutilizan los que ya existan (p. ej. los del cache)
+        request_name = _find_param(parameters, Request)
+        response_name = _find_param(parameters, Response)
+        if request_name is None:
+            request_name = _REQUEST_PARAM
+            parameters.append(inspect.Parameter(_REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+        if response_name is None:
+            response_name = _RESPONSE_PARAM
+            parameters.append(inspect.Parameter(_RESPONSE_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            if request_name == _REQUEST_PARAM:
+                request: Request = kwargs.pop(request_name)
+            else:
+                request = kwargs[request_name]
+            if response_name == _RESPONSE_PARAM:
+                response: Response = kwargs.pop(response_name)
+            else:
+                response = kwargs[response_name]
+
+            validators = await validator(**kwargs)
+            if validators is None:
+                if on_missing is not None:
+                    return await on_missing(**kwargs)
+                return await func(*args, **kwargs)
+
+            parts, last_modified = validators
+            headers = {"ETag": make_etag(*parts), "Cache-Control": "no-cache"}
+            if last_modified is not None:
+                headers["Last-Modified"] = http_date(last_modified)
+
+            if is_not_modified(request, headers["ETag"], last_modified):
+                return Response(status_code=304, headers=headers)
+
+            result = await func(*args, **kwargs)
+            # Sustituye el ETag que pueda haber puesto el cache
+            target = result if isinstance(result, Response) else response
+            target.headers.update(headers)
+            return result
+
+        inner.__signature__ = signature.replace(parameters=parameters)
+        return inner
+
+    return decorator
+
+
+def _find_param(parameters, annotation) -> Optional[str]:
+    for parameter in parameters:
+        if parameter.annotation is annotation:
+            return parameter.name
+    return None
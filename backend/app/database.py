@@ -1,20 +1,41 @@
-from sqlmodel import SQLModel
+from sqlmodel import SQLModel, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
+from app.metrics import instrument_pool
+from app.models import User
+from app.query_stats import instrument_engine
+from app.slow_queries import install_slow_query_log
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://user:password@db:5432/standby_db")
 
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+# SQL_ECHO=1 loguea todas las sentencias; para producción usar SLOW_QUERY_MS
+engine = create_async_engine(DATABASE_URL, echo=os.getenv("SQL_ECHO", "0") == "1", future=True)
+instrument_engine(engine)
+install_slow_query_log(engine)
+instrument_pool(engine)
+
+async_session = sessionmaker(
+    engine, class_=AsyncSession, expire_on_commit=False
+)
 
 async def get_session() -> AsyncSession:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
     async with async_session() as session:
         yield session
 
+def get_session_factory():
+    """Fábrica de sesiones para trabajos que viven más que la request."""
+    return async_session
+
 async def create_db_and_tables():
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+
+async def check_database(session: AsyncSession):
+    """
+    Comprobación de disponibilidad barata: una consulta trivial sobre la
+    tabla de usuarios, que falla si la base no responde o si el esquema no
+    fue creado (ver bootstrap.py). Lanza la excepción del driver si falla.
+    """
+    await session.execute(select(User.id).limit(1))
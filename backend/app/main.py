@@ -1,24 +1,25 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import create_db_and_tables, get_session
-from app.routers import auth, cases, users, files
-from app.models import User, UserRole
-from app.auth import get_password_hash
-from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import sessionmaker
+from app.database import async_session, check_database, get_session
+from app.routers import auth, cases, users, files
 from app.database import engine
 from fastapi.staticfiles import StaticFiles
+from app.query_stats import QueryStatsMiddleware
+from app.metrics import PrometheusMiddleware, render_metrics, mark_process_dead
+from app.profiling import ProfilingMiddleware
+from app.responses import ORJSONResponse
+from app.compression import CompressionMiddleware
+from app.audit import AUDIT_MODE, start_audit_buffer, stop_audit_buffer
 
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
-from redis import asyncio as aioredis
+from app.cache import init_cache
 import os
 
 app = FastAPI(
     title="Standby Case Manager API",
     version="1.0.0",
-    description="API for managing operation cases"
+    description="API for managing operation cases",
+    default_response_class=ORJSONResponse,
 )
 
 # Mount uploads directory to serve files
@@ -31,7 +32,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-DB-Queries"],
 )
+# Dentro de las métricas: la latencia medida incluye el tiempo de compresión
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ProfilingMiddleware, fastapi_app=app)
+# Último en añadirse = más externo: mide la request completa
+app.add_middleware(PrometheusMiddleware)
 
 app.include_router(auth.router)
 app.include_router(cases.router)
@@ -45,30 +53,45 @@ app.include_router(stats.router)
 
 @app.on_event("startup")
 async def on_startup():
-    await create_db_and_tables()
-    
-    # Initialize Redis Cache
-    redis_url = os.getenv("REDIS_URL", "redis://redis:6379")
-    redis = aioredis.from_url(redis_url, encoding="utf8", decode_responses=True)
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    # El esquema y el admin inicial los crea bootstrap.py una vez por despliegue;
+    # el worker solo comprueba que la base esté lista.
+    try:
+        async with async_session() as session:
+            await check_database(session)
+    except Exception as exc:
+        raise RuntimeError("Database not ready; run `python bootstrap.py` before starting the API") from exc
 
-    # Create initial admin user if not exists
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    # Trabajos masivos que murieron con un worker anterior quedan FAILED
     async with async_session() as session:
-        result = await session.execute(select(User).where(User.email == "admin@example.com"))
-        user = result.scalars().first()
-        if not user:
-            admin_user = User(
-                nombre="Admin",
-                email="admin@example.com",
-                hashed_password=get_password_hash("admin123"),
-                rol=UserRole.ADMIN
-            )
-            session.add(admin_user)
-            await session.commit()
-            print("Admin user created: admin@example.com / admin123")
+        await cases.fail_stale_bulk_jobs(session)
+
+    # Initialize Cache: L1 en memoria delante de Redis (L2)
+    init_cache()
+
+    # Auditoría write-behind opcional (AUDIT_MODE=buffered); por defecto estricta
+    if AUDIT_MODE == "buffered":
+        await start_audit_buffer(async_session)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Antes de cerrar: la auditoría pendiente se escribe (o se vuelca a disco)
+    await stop_audit_buffer()
+    mark_process_dead()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas en formato de exposición de Prometheus."""
+    data, content_type = render_metrics()
+    return Response(content=data, media_type=content_type)
+
+@app.get("/health/ready", include_in_schema=False)
+async def readiness(session: AsyncSession = Depends(get_session)):
+    """Readiness para el balanceador: la base responde y el esquema existe."""
+    try:
+        await check_database(session)
+    except Exception:
+        raise HTTPException(status_code=503, detail="Database not ready")
+    return {"status": "ready"}
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,178 @@
+import os
+import time
+import weakref
+from functools import wraps
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+# Con varios workers, PROMETHEUS_MULTIPROC_DIR debe apuntar a un directorio
+# compartido y vacío al arrancar; /metrics agrega entonces todos los procesos.
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las requests HTTP por ruta",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests HTTP en curso",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+# Lo publica cada proceso en cada checkout/checkin (ver instrument_pool):
+# livesum suma el pool de todos los workers vivos
+DB_POOL = Gauge(
+    "db_pool_connections",
+    "Conexiones del pool de la base de datos",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Lecturas del cache de respuestas por nivel y resultado",
+    ["tier", "result"],
+)
+IO_JOB_DURATION = Histogram(
+    "import_export_duration_seconds",
+    "Duración de las importaciones y exportaciones",
+    ["operation"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+IO_JOB_ROWS = Counter(
+    "import_export_rows_total",
+    "Filas procesadas por importaciones y exportaciones",
+    ["operation"],
+)
+ATTACHMENT_BYTES = Counter(
+    "attachment_bytes_written_total",
+    "Bytes de adjuntos escritos en disco",
+)
+
+
+def _route_template(scope) -> str:
+    """
+    Plantilla de la ruta (p. ej. /cases/{case_id}) para acotar la
+    cardinalidad. El router la deja en el scope al resolver la request.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return getattr(route, "path_format", None) or getattr(route, "path", "unmatched")
+
+
+class _PoolGauges:
+    """
+    Conexiones del pool de un engine, contadas en los eventos del pool. En
+    modo multiproceso cada worker mantiene su valor al día, no solo el que
+    atiende el scrape. `overflow` son las prestadas por encima de `size`.
+    """
+
+    def __init__(self, pool):
+        self.size = pool.size() if hasattr(pool, "size") else 0
+        self.checked_out = 0
+
+    def checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checked_out += 1
+        self.publish()
+
+    def checkin(self, dbapi_connection, connection_record):
+        self.checked_out -= 1
+        self.publish()
+
+    def publish(self):
+        DB_POOL.labels("size").set(self.size)
+        DB_POOL.labels("checked_out").set(self.checked_out)
+        DB_POOL.labels("overflow").set(max(0, self.checked_out - self.size))
+
+
+_instrumented_engines = weakref.WeakSet()
+
+
+def instrument_pool(engine):
+    """Registra en el engine (sync o async) los eventos que alimentan DB_POOL."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if sync_engine in _instrumented_engines:
+        return
+    gauges = _PoolGauges(sync_engine.pool)
+    event.listen(sync_engine, "checkout", gauges.checkout)
+    event.listen(sync_engine, "checkin", gauges.checkin)
+    gauges.publish()
+    _instrumented_engines.add(sync_engine)
+
+
+class PrometheusMiddleware:
+    """
+    Middleware ASGI con latencia por ruta y requests en curso. En el camino
+    caliente solo hace operaciones sobre contadores en memoria; la ruta se
+    lee del scope una vez resuelta por el router.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            REQUEST_LATENCY.labels(method, _route_template(scope), str(status["code"])).observe(
+                time.perf_counter() - start
+            )
+
+
+def observe_io_job(operation: str):
+    """Decorador que mide la duración de un endpoint de importación/exportación."""
+    def decorator(func):
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                IO_JOB_DURATION.labels(operation).observe(time.perf_counter() - start)
+        return inner
+    return decorator
+
+
+def count_io_rows(operation: str, rows: int):
+    IO_JOB_ROWS.labels(operation).inc(rows)
+
+
+def render_metrics():
+    """Texto de exposición Prometheus (agregado entre procesos si aplica)."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead():
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
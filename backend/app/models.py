@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional, List, Dict, Any
 from sqlmodel import Field, SQLModel, Relationship
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, Index, JSON
 from pydantic import EmailStr
 
 class UserRole(str, Enum):
@@ -73,6 +73,10 @@ class Attachment(SQLModel, table=True):
     case: Optional["Case"] = Relationship(back_populates="attachments")
 
 class Case(SQLModel, table=True):
+    # El archivo (ArchivedCase) conserva el id: SQLite no debe reutilizar el
+    # del último caso archivado (en PostgreSQL la secuencia nunca lo hace)
+    __table_args__ = {"sqlite_autoincrement": True}
+
     id: Optional[int] = Field(default=None, primary_key=True)
     codigo: str = Field(unique=True, index=True)
     fecha_inicio: datetime = Field(default_factory=datetime.utcnow)
@@ -86,6 +90,8 @@ class Case(SQLModel, table=True):
     creado_por_id: Optional[int] = Field(default=None, foreign_key="user.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Concurrencia optimista: se incrementa en cada escritura del caso
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     
     # Relationship
     observaciones_list: List["Observation"] = Relationship(back_populates="case")
@@ -111,6 +117,9 @@ class CaseUpdate(SQLModel):
     fecha_fin: Optional[datetime] = None
 
 class Observation(SQLModel, table=True):
+    # Keyset del timeline: las entradas de un caso posteriores al cursor
+    __table_args__ = (Index("ix_observation_case_id_created_at", "case_id", "created_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     case_id: int = Field(foreign_key="case.id")
     content: str
@@ -132,15 +141,70 @@ class CaseAuditType(str, Enum):
     EVIDENCE = "EVIDENCE"
 
 class CaseAudit(SQLModel, table=True):
+    # Keyset del timeline (ver `recorded_at`)
+    __table_args__ = (Index("ix_caseaudit_case_id_recorded_at", "case_id", "recorded_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     case_id: int = Field(foreign_key="case.id")
     user_id: int = Field(foreign_key="user.id")
     action: CaseAuditType
     details: Dict = Field(default={}, sa_column=Column(JSON))
+    # Momento del cambio (lo que se muestra y lo que mide /stats/sla)
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+    # Momento en que la fila llegó a la base: con AUDIT_MODE=buffered, el del
+    # volcado. El timeline incremental pagina por este campo
+    recorded_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
 
     user: Optional[User] = Relationship()
 
+class BulkJobStatus(str, Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    COMPLETED_WITH_ERRORS = "COMPLETED_WITH_ERRORS"
+    # El worker que lo procesaba murió (sin latido reciente)
+    FAILED = "FAILED"
+
+class BulkJob(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    action: str
+    value: str
+    status: BulkJobStatus = Field(default=BulkJobStatus.PENDING)
+    total: int = 0
+    processed: int = 0
+    updated: int = 0
+    failed_ids: List[int] = Field(default=[], sa_column=Column(JSON))
+    errors: List[str] = Field(default=[], sa_column=Column(JSON))
+    created_by_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Último bloque confirmado por el worker (ver fail_stale_bulk_jobs)
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class ArchivedCase(SQLModel, table=True):
+    """
+    Caso cerrado que el archivado (archive_cases.py) sacó de la tabla
+    caliente. Conserva el id y las columnas del caso; observaciones,
+    auditoría y metadatos de adjuntos van en `history` (JSON). Solo lectura.
+    """
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    # Sin unique: un código archivado puede reutilizarse en un caso nuevo
+    codigo: str = Field(index=True)
+    fecha_inicio: datetime
+    fecha_fin: Optional[datetime] = None
+    estado: CaseStatus
+    sby_responsable: Optional[str] = None
+    servicio_o_plataforma: str
+    prioridad: Priority
+    novedades_y_comentarios: str = ""
+    observaciones: Optional[str] = None
+    creado_por_id: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+    version: int = 1
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+    history: Dict = Field(default={}, sa_column=Column(JSON))
+
 class CaseRead(SQLModel):
     id: int
     codigo: str
@@ -155,6 +219,7 @@ class CaseRead(SQLModel):
     creado_por_id: Optional[int]
     updated_at: datetime
     created_at: datetime
+    version: int
 
 class AttachmentRead(SQLModel):
     id: int
@@ -166,4 +231,5 @@ class AttachmentRead(SQLModel):
 
 class CaseReadWithDetails(CaseRead):
     observaciones_list: List["Observation"] = []
-    attachments: List[AttachmentRead] = []
\ No newline at end of file
+    attachments: List[AttachmentRead] = []
+    archived: bool = False
\ No newline at end of file
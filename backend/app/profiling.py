@@ -0,0 +1,178 @@
+import cProfile
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.auth import get_current_user
+from app.database import get_session_factory
+from app.models import UserRole
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+# Intervalo del muestreador (modo "sample"), en segundos
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.001"))
+# Artefactos guardados en memoria para descargar por /stats/profiles
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+
+# id -> (metadatos, artefacto)
+_profiles: "OrderedDict[str, Tuple[Dict[str, Any], bytes]]" = OrderedDict()
+# Solo un perfilado a la vez: cProfile no admite dos activos en el mismo hilo
+_active = threading.Lock()
+
+
+class _StackSampler:
+    """
+    Muestreador de pila del hilo del event loop. Produce stacks colapsados
+    (``a;b;c N``), el formato de entrada de flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> bytes:
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common()).encode()
+
+
+class _CProfiler:
+    """cProfile; el artefacto es el mismo binario que escribe ``dump_stats``."""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self) -> bytes:
+        self.profiler.disable()
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+
+_PROFILERS = {"1": ("pstats", _CProfiler), "cprofile": ("pstats", _CProfiler), "sample": ("collapsed", _StackSampler)}
+
+
+def _store_profile(profile_id: str, metadata: Dict[str, Any], artifact: bytes):
+    _profiles[profile_id] = (metadata, artifact)
+    while len(_profiles) > PROFILE_BUFFER_SIZE:
+        _profiles.popitem(last=False)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Perfiles guardados, del más reciente al más antiguo."""
+    return [{"id": profile_id, **metadata} for profile_id, (metadata, _) in reversed(_profiles.items())]
+
+
+def get_profile(profile_id: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+    return _profiles.get(profile_id)
+
+
+def clear_profiles():
+    _profiles.clear()
+
+
+class ProfilingMiddleware:
+    """
+    Perfila una request cuando un administrador envía ``X-Profile``:
+    ``1``/``cprofile`` usa cProfile (artefacto pstats) y ``sample`` un
+    muestreador de pila (stacks colapsados para flamegraphs). La respuesta
+    no cambia; lleva la cabecera ``X-Profile-Id`` para descargar el
+    artefacto en ``/stats/profiles/{id}``.
+
+    Sin la cabecera el único coste es recorrer las cabeceras de la request.
+    Ambos perfiladores ven todo el hilo del event loop, así que las requests
+    concurrentes aparecen en el perfil.
+    """
+
+    def __init__(self, app, fastapi_app):
+        self.app = app
+        self.fastapi_app = fastapi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = None
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                mode = value.decode().strip().lower()
+            elif name == b"authorization":
+                authorization = value.decode()
+        if mode not in _PROFILERS or not await self._is_admin(authorization):
+            await self.app(scope, receive, send)
+            return
+
+        if not _active.acquire(blocking=False):
+            logger.info("Profiling already in progress, skipping %s %s", scope["method"], scope["path"])
+            await self.app(scope, receive, send)
+            return
+
+        artifact_format, profiler_class = _PROFILERS[mode]
+        profile_id = uuid.uuid4().hex
+        status = {"code": 500}
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        profiler = profiler_class()
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            artifact = profiler.stop()
+            _active.release()
+            _store_profile(profile_id, {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query_string": scope.get("query_string", b"").decode(),
+                "status": status["code"],
+                "format": artifact_format,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "created_at": datetime.utcnow(),
+            }, artifact)
+
+    async def _is_admin(self, authorization: Optional[str]) -> bool:
+        if not authorization or not authorization.lower().startswith("bearer "):
+            return False
+        factory = self.fastapi_app.dependency_overrides.get(get_session_factory, get_session_factory)()
+        async with factory() as session:
+            try:
+                user = await get_current_user(authorization[7:], session)
+            except HTTPException:
+                return False
+        return user.rol == UserRole.ADMIN
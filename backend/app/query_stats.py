@@ -0,0 +1,112 @@
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Una misma sentencia ejecutada más veces que esto en una request se reporta como posible N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+
+class QueryStats:
+    """Consultas SQL y tiempo de DB acumulados en un bloque (normalmente una request)."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        """Sentencias ejecutadas más de `threshold` veces (candidatas a N+1)."""
+        return {statement: n for statement, n in self.statements.items() if n > threshold}
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# Inicio de cada sentencia en curso, por contexto de ejecución: una sentencia
+# que falla no desplaza las duraciones de las siguientes en la conexión
+_START_KEY = "query_start"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault(_START_KEY, {})[context] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.get(_START_KEY, {}).pop(context, None)
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    if start is not None:
+        stats.duration += time.perf_counter() - start
+    stats.count += 1
+    stats.statements[statement] += 1
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None:
+        conn.info.get(_START_KEY, {}).pop(exception_context.execution_context, None)
+
+
+def instrument_engine(engine):
+    """Registra los hooks de conteo en un engine (sync o async)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def track_queries():
+    """Cuenta las consultas ejecutadas dentro del bloque."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware ASGI que publica por request las cabeceras `X-DB-Queries` y
+    `Server-Timing` (db;dur=ms) y avisa en el log de posibles N+1.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_headers(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.count).encode()))
+                    headers.append((
+                        b"server-timing",
+                        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'.encode()
+                    ))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_headers)
+
+            for statement, n in stats.repeated().items():
+                logger.warning(
+                    "Possible N+1 in %s %s: statement executed %d times: %s",
+                    scope["method"], scope["path"], n, statement.splitlines()[0][:200]
+                )
@@ -0,0 +1,31 @@
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    # Tipos que orjson no conoce (modelos SQLModel/Pydantic, Decimal...):
+    # mismo resultado que la serialización genérica de FastAPI
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """JSON con orjson: datetimes, enums y dicts/listas se serializan en C."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    Respuesta JSON renderizada con orjson. Acepta también bytes ya
+    serializados (p. ej. un HIT del cache), que se envían tal cual.
+
+    Devolverla desde un endpoint evita el paso por `jsonable_encoder`, que
+    recorre cada valor en Python antes de serializar.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
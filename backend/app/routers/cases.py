@@ -1,72 +1,127 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import JSON, Integer, String, any_, bindparam, cast, column, insert, literal, null, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select, or_, func
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from collections import Counter, namedtuple
 from datetime import datetime, timedelta
-from app.database import get_session
+import base64
+import json
+import os
+from app.database import get_session, get_session_factory
 from sqlalchemy.orm import selectinload
-from app.models import Case, CaseCreate, CaseUpdate, User, UserRole, CaseStatus, Priority, Observation, CaseReadWithDetails, ObservationUpdate, CaseAudit, CaseAuditType, CaseRead
+from app.models import Case, CaseCreate, CaseUpdate, User, UserRole, CaseStatus, Priority, Observation, CaseReadWithDetails, ObservationUpdate, CaseAudit, CaseAuditType, CaseRead, BulkJob, BulkJobStatus, ArchivedCase
 from app.auth import get_current_user
-from fastapi_cache.decorator import cache
+from app.user_cache import resolve_user_names
+from app.cache import cached, invalidate_cases, CASE_LIST_TAG
+from app.responses import ORJSONResponse
+from app.conditional import conditional, make_etag, opaque_etag
+from app.audit import record_audit
 
 router = APIRouter(prefix="/cases", tags=["cases"])
 
+# Columnas con la forma de CaseRead: el listado trabaja con tuplas, no con
+# instancias ORM (sin identity map ni tracking por fila)
+CASE_READ_FIELDS = list(CaseRead.model_fields)
+# Textos libres que pueden ser largos: con `preview` se recortan en SQL
+CASE_TEXT_FIELDS = {"novedades_y_comentarios", "observaciones"}
+CASE_PREVIEW_MAX = 2000
+
+async def insert_cases(session: AsyncSession, cases: List[CaseCreate], user_id: int) -> List[dict]:
+    """
+    Inserta los casos y sus observaciones iniciales en la transacción de la
+    sesión: un INSERT multi-fila con RETURNING y otro para las observaciones.
+    La unicidad de `codigo` la garantiza la restricción de la tabla (lanza
+    IntegrityError). No hace commit; devuelve las filas insertadas.
+    """
+    now = datetime.utcnow()
+    rows = [
+        # El texto inicial va a la tabla de observaciones, no a la columna legacy
+        Case(
+            **case.dict(exclude={"observaciones"}),
+            creado_por_id=user_id,
+            created_at=now,
+            updated_at=now,
+        ).model_dump(exclude={"id"})
+        for case in cases
+    ]
+    result = await session.execute(insert(Case).values(rows).returning(*Case.__table__.columns))
+    created = [dict(row._mapping) for row in result]
+
+    ids = {row["codigo"]: row["id"] for row in created}
+    observations = [
+        {"case_id": ids[case.codigo], "content": case.observaciones, "created_by_id": user_id, "created_at": now}
+        for case in cases if case.observaciones
+    ]
+    if observations:
+        await session.execute(insert(Observation), observations)
+    return created
+
+async def _insert_conflict(session: AsyncSession, codes: List[str]) -> HTTPException:
+    """
+    Error a devolver tras un IntegrityError de insert_cases (ya con rollback).
+    Solo en el camino de error se consulta qué códigos chocaron; si ninguno
+    existe, la restricción violada es otra y no se culpa al código.
+    """
+    existing = (await session.execute(select(Case.codigo).where(Case.codigo.in_(codes)))).scalars().all()
+    if existing:
+        return HTTPException(status_code=400, detail=f"Case code already exists: {', '.join(sorted(existing))}")
+    return HTTPException(status_code=400, detail="Database integrity error")
+
 @router.post("/", response_model=Case)
 async def create_case(case: CaseCreate, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
     if current_user.rol not in [UserRole.INGRESO, UserRole.ADMIN]:
         raise HTTPException(status_code=403, detail="Not authorized to create cases")
-    
-    # Check uniqueness of mandatory code
-    result = await session.execute(select(Case).where(Case.codigo == case.codigo))
-    existing = result.scalars().first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Case code already exists")
-    
-    # Extract initial observation content
-    initial_obs_content = case.observaciones
-    
-    # Create case without legacy observations field populated (or keep it for legacy compat, but we want it in the list)
-    # We will set it to None in the DB object to encourage using the list, 
-    # but if we need legacy support we might need to keep it. 
-    # For now, let's clear it so we don't have duplication if we ever migrate fully.
-    # Actually, let's keep it in the dict but override it in the model creation if needed.
-    # To be safe and avoid "missing" data if something reads only the column, 
-    # we can keep it, but we MUST create the Observation record.
-    
-    case_data = case.dict()
-    if "observaciones" in case_data:
-        del case_data["observaciones"] # Remove from case data so it's not set on the legacy column (or set to None)
-
-    db_case = Case(
-        **case_data,
-        observaciones=None, # Explicitly set legacy field to None
-        creado_por_id=current_user.id,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
-    )
-    
-    session.add(db_case)
-    await session.commit()
-    await session.refresh(db_case)
-    
-    # Create Observation record if content exists
-    if initial_obs_content:
-        new_obs = Observation(
-            case_id=db_case.id,
-            content=initial_obs_content,
-            created_by_id=current_user.id,
-            created_at=datetime.utcnow()
-        )
-        session.add(new_obs)
+
+    # Una transacción: caso y observación inicial, o nada
+    try:
+        db_case, = await insert_cases(session, [case], current_user.id)
         await session.commit()
-        await session.refresh(db_case)
-        
+    except IntegrityError:
+        await session.rollback()
+        raise await _insert_conflict(session, [case.codigo])
+
+    await invalidate_cases(db_case["id"])
     return db_case
 
-@router.get("/")
-async def read_cases(
-    skip: int = 0,
-    limit: int = 100,  # Volver a 100 para paginación
+# Máximo de casos por request en POST /cases/batch
+CASE_BATCH_MAX = int(os.getenv("CASE_BATCH_MAX", "500"))
+
+@router.post("/batch", response_model=List[Case])
+async def create_cases_batch(
+    cases: List[CaseCreate],
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Alta de varios casos para integraciones: todos en una transacción con
+    dos INSERT multi-fila. Si algún código ya existe no se crea ninguno.
+    """
+    if current_user.rol not in [UserRole.INGRESO, UserRole.ADMIN]:
+        raise HTTPException(status_code=403, detail="Not authorized to create cases")
+    if not cases:
+        return []
+    if len(cases) > CASE_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Too many cases in batch (max {CASE_BATCH_MAX})")
+
+    codes = [case.codigo for case in cases]
+    repeated = sorted(code for code, count in Counter(codes).items() if count > 1)
+    if repeated:
+        raise HTTPException(status_code=400, detail=f"Duplicate case codes in batch: {', '.join(repeated)}")
+
+    try:
+        created = await insert_cases(session, cases, current_user.id)
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise await _insert_conflict(session, codes)
+
+    await invalidate_cases()
+    return created
+
+def _case_filters(
     status: Optional[CaseStatus] = None,
     priority: Optional[Priority] = None,
     service: Optional[str] = None,
@@ -75,85 +130,269 @@ async def read_cases(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     timezone_offset: Optional[int] = None,
-    session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    model=Case,
 ):
-    query = select(Case)
-    
+    """
+    Condiciones WHERE de los filtros del listado de casos. `model` es Case o
+    ArchivedCase: el archivo tiene las mismas columnas.
+    """
+    filters = []
     if status:
-        query = query.where(Case.estado == status)
+        filters.append(model.estado == status)
     if priority:
-        query = query.where(Case.prioridad == priority)
+        filters.append(model.prioridad == priority)
     if service:
-        query = query.where(Case.servicio_o_plataforma.ilike(f"%{service}%"))
+        filters.append(model.servicio_o_plataforma.ilike(f"%{service}%"))
     if sby_responsable:
-        query = query.where(Case.sby_responsable.ilike(f"%{sby_responsable}%"))
+        filters.append(model.sby_responsable.ilike(f"%{sby_responsable}%"))
     if search:
-        query = query.where(or_(Case.novedades_y_comentarios.ilike(f"%{search}%"), Case.codigo.ilike(f"%{search}%")))
+        filters.append(or_(model.novedades_y_comentarios.ilike(f"%{search}%"), model.codigo.ilike(f"%{search}%")))
     if start_date:
         if timezone_offset is not None:
              # Adjust for timezone: start_date is 00:00 local, so add offset to get UTC
              start_date = start_date + timedelta(minutes=timezone_offset)
-        query = query.where(Case.updated_at >= start_date)
+        filters.append(model.updated_at >= start_date)
     if end_date:
         # Set time to end of day
         end_date = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
         if timezone_offset is not None:
              # Adjust for timezone
              end_date = end_date + timedelta(minutes=timezone_offset)
-        query = query.where(Case.updated_at <= end_date)
-    
-    # Contar total de casos que cumplen los filtros
-    count_query = select(func.count()).select_from(Case)
-    if status:
-        count_query = count_query.where(Case.estado == status)
-    if priority:
-        count_query = count_query.where(Case.prioridad == priority)
-    if service:
-        count_query = count_query.where(Case.servicio_o_plataforma.ilike(f"%{service}%"))
-    if sby_responsable:
-        count_query = count_query.where(Case.sby_responsable.ilike(f"%{sby_responsable}%"))
-    if search:
-        count_query = count_query.where(or_(Case.novedades_y_comentarios.ilike(f"%{search}%"), Case.codigo.ilike(f"%{search}%")))
-    if start_date:
-        if timezone_offset is not None:
-            start_date_count = start_date
-        else:
-            start_date_count = start_date + timedelta(minutes=timezone_offset) if timezone_offset else start_date
-        count_query = count_query.where(Case.updated_at >= start_date_count)
-    if end_date:
-        end_date_count = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-        if timezone_offset is not None:
-            end_date_count = end_date_count + timedelta(minutes=timezone_offset)
-        count_query = count_query.where(Case.updated_at <= end_date_count)
-    
-    total_count = (await session.execute(count_query)).scalar_one()
-        
-    query = query.order_by(Case.updated_at.desc()).offset(skip).limit(limit)
-    result = await session.execute(query)
-    cases = result.scalars().all()
+        filters.append(model.updated_at <= end_date)
+    return filters
+
+def _case_list_columns(fields: Optional[str], preview: Optional[int], model=Case):
+    """
+    Nombres y columnas a seleccionar para el listado. `fields` es una lista
+    separada por comas de campos de CaseRead (el id siempre se incluye);
+    `preview` recorta los textos largos a ese número de caracteres.
+    """
+    names = CASE_READ_FIELDS
+    if fields:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(CASE_READ_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        names = [name for name in CASE_READ_FIELDS if name == "id" or name in requested]
+
+    columns = []
+    for name in names:
+        column_attr = getattr(model, name)
+        if preview and name in CASE_TEXT_FIELDS:
+            column_attr = func.substr(column_attr, 1, preview)
+        columns.append(column_attr)
+    return names, columns
+
+async def _case_list_validator(
+    skip, limit, status, priority, service, sby_responsable, search,
+    start_date, end_date, timezone_offset, fields, preview, include_archived, session, **_
+):
+    """
+    Tamaño, suma de versiones y último updated_at del conjunto filtrado,
+    más los parámetros: cualquier escritura sobre un caso del conjunto
+    incrementa su versión y por tanto la suma.
+    """
+    filters = _case_filters(status, priority, service, sby_responsable, search, start_date, end_date, timezone_offset)
+    total, version_sum, last_update = (await session.execute(
+        select(func.count(), func.coalesce(func.sum(Case.version), 0), func.max(Case.updated_at))
+        .select_from(Case).where(*filters)
+    )).one()
+    archived_total = None
+    if include_archived:
+        # El archivo no se modifica: solo crece cuando corre el archivado
+        archived_filters = _case_filters(
+            status, priority, service, sby_responsable, search, start_date, end_date, timezone_offset, ArchivedCase
+        )
+        archived_total = (await session.execute(
+            select(func.count()).select_from(ArchivedCase).where(*archived_filters)
+        )).scalar_one()
+    params = (skip, limit, status, priority, service, sby_responsable, search,
+              start_date, end_date, timezone_offset, fields, preview, include_archived)
+    # Sin Last-Modified: un caso que sale del filtro no cambia el máximo
+    return ("cases", total, version_sum, last_update, archived_total, params), None
+
+@router.get("/")
+@conditional(_case_list_validator)
+@cached(CASE_LIST_TAG)
+async def read_cases(
+    skip: int = 0,
+    limit: int = 100,  # Volver a 100 para paginación
+    status: Optional[CaseStatus] = None,
+    priority: Optional[Priority] = None,
+    service: Optional[str] = None,
+    sby_responsable: Optional[str] = None,
+    search: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    timezone_offset: Optional[int] = None,
+    fields: Optional[str] = None,
+    preview: Optional[int] = Query(None, ge=1, le=CASE_PREVIEW_MAX),
+    include_archived: bool = False,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Listado paginado. `fields=id,codigo,estado` devuelve solo esos campos y
+    `preview=200` recorta novedades/observaciones a 200 caracteres: se
+    transfieren y materializan solo las columnas que la tabla muestra.
+    Con `include_archived=true` se añaden los casos archivados, marcados
+    con `archived: true`.
+    """
+    filters = _case_filters(status, priority, service, sby_responsable, search, start_date, end_date, timezone_offset)
+    names, columns = _case_list_columns(fields, preview)
+
+    if include_archived:
+        archived_filters = _case_filters(
+            status, priority, service, sby_responsable, search, start_date, end_date, timezone_offset, ArchivedCase
+        )
+        _, archived_columns = _case_list_columns(fields, preview, ArchivedCase)
+        entries = union_all(
+            select(*columns, literal(False).label("archived"), Case.updated_at.label("sort_key")).where(*filters),
+            select(*archived_columns, literal(True).label("archived"), ArchivedCase.updated_at.label("sort_key"))
+            .where(*archived_filters),
+        ).subquery()
+        names = names + ["archived"]
+        source = select(*[c for c in entries.c if c.name != "sort_key"])
+        order = entries.c.sort_key.desc()
+        count_query = select(func.count()).select_from(entries)
+    else:
+        source = select(*columns).where(*filters)
+        order = Case.updated_at.desc()
+        count_query = select(func.count()).select_from(Case).where(*filters)
+
+    # El total sale de la misma consulta con una función de ventana
+    query = (
+        source.add_columns(func.count().over().label("total_count"))
+        .order_by(order)
+        .offset(skip)
+        .limit(limit)
+    )
+    rows = (await session.execute(query)).all()
+    cases = [dict(zip(names, row)) for row in rows]
+
+    if rows:
+        total_count = rows[0].total_count
+    elif skip == 0:
+        total_count = 0
+    else:
+        # Página fuera de rango: contar aparte
+        total_count = (await session.execute(count_query)).scalar_one()
     
     # Retornar datos con metadatos de paginación
-    return {
+    return ORJSONResponse({
         "items": cases,
         "total": total_count,
         "skip": skip,
         "limit": limit,
         "page": (skip // limit) + 1,
         "total_pages": (total_count + limit - 1) // limit
-    }
+    })
 
-@router.get("/{case_id}", response_model=CaseReadWithDetails)
-async def read_case(case_id: int, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def _case_version(session: AsyncSession, case_id: int):
+    """(version, updated_at) del caso, o None si no existe."""
+    return (await session.execute(
+        select(Case.version, Case.updated_at).where(Case.id == case_id)
+    )).one_or_none()
+
+def _case_etag_parts(case_id: int, version: int) -> tuple:
+    # La versión es el ETag: PATCH acepta este mismo ETag en If-Match
+    return ("case", case_id, version)
+
+async def _case_validator(case_id, session, **_):
+    row = await _case_version(session, case_id)
+    if row is None:
+        return None
+    return _case_etag_parts(case_id, row.version), row.updated_at
+
+def _archived_detail(archived: ArchivedCase) -> CaseReadWithDetails:
+    """Detalle de un caso archivado a partir de su `history`."""
+    history = archived.history or {}
+    return CaseReadWithDetails.model_validate({
+        **archived.model_dump(exclude={"history", "archived_at"}),
+        "observaciones_list": [Observation.model_validate(obs) for obs in history.get("observations", [])],
+        "attachments": history.get("attachments", []),
+        "archived": True,
+    })
+
+async def _case_detail(session: AsyncSession, case_id: int) -> Optional[CaseReadWithDetails]:
+    """Caso con observaciones y adjuntos; si no está en la tabla caliente, del archivo."""
     query = select(Case).where(Case.id == case_id).options(selectinload(Case.observaciones_list), selectinload(Case.attachments))
     result = await session.execute(query)
     case = result.scalars().first()
+    if case:
+        # Convertir aquí para que el cache guarde también las relaciones
+        return CaseReadWithDetails.model_validate(case)
+    archived = await session.get(ArchivedCase, case_id)
+    return _archived_detail(archived) if archived else None
+
+@router.get("/codigo/{codigo}", response_model=CaseReadWithDetails)
+async def read_case_by_codigo(codigo: str, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+    """Búsqueda por código: primero la tabla caliente y, si no está, el archivo."""
+    case_id = (await session.execute(select(Case.id).where(Case.codigo == codigo))).scalar_one_or_none()
+    if case_id is not None:
+        return await _case_detail(session, case_id)
+    # Un código reutilizado puede estar archivado varias veces: el más reciente
+    archived = (await session.execute(
+        select(ArchivedCase).where(ArchivedCase.codigo == codigo).order_by(ArchivedCase.archived_at.desc()).limit(1)
+    )).scalars().first()
+    if not archived:
+        raise HTTPException(status_code=404, detail="Case not found")
+    return _archived_detail(archived)
+
+@router.get("/{case_id}", response_model=CaseReadWithDetails)
+@conditional(_case_validator)
+@cached("case:{case_id}")
+async def read_case(case_id: int, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+    case = await _case_detail(session, case_id)
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
     return case
 
+def _parse_if_match(if_match: Optional[str], case_id: int, current: int) -> Tuple[Optional[int], bool]:
+    """
+    Versión esperada del caso y si llegó como ETag. Acepta el ETag que
+    devuelve GET /cases/{id} (o `*`) y, por compatibilidad, la versión sola:
+    `3`, `"3"` o `W/"3"`. Un ETag que no es el actual responde 412.
+    """
+    if if_match is None:
+        return None, False
+    tags = [tag.strip() for tag in if_match.split(",") if tag.strip()]
+    if "*" in tags:
+        return current, True
+    etag = opaque_etag(make_etag(*_case_etag_parts(case_id, current)))
+    versions = []
+    for tag in tags:
+        opaque = opaque_etag(tag)
+        if opaque == etag:
+            return current, True
+        try:
+            versions.append(int(opaque.strip('"')))
+        except ValueError:
+            if not opaque.startswith('"'):
+                raise HTTPException(status_code=400, detail="Invalid If-Match version")
+    if not versions:
+        raise _precondition_failed(current)
+    return (current if current in versions else versions[0]), False
+
+def _version_conflict(current: int) -> HTTPException:
+    return HTTPException(status_code=409, detail=f"Case was modified by another user (current version {current})")
+
+def _precondition_failed(current: int) -> HTTPException:
+    return HTTPException(status_code=412, detail=f"Precondition failed: case was modified (current version {current})")
+
 @router.patch("/{case_id}", response_model=Case)
-async def update_case(case_id: int, case_update: CaseUpdate, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def update_case(
+    case_id: int,
+    case_update: CaseUpdate,
+    if_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Concurrencia optimista: el UPDATE solo se aplica si la versión sigue
+    siendo la leída (o la enviada en If-Match); si otro usuario escribió
+    antes se responde 409 sin pisar sus cambios ni bloquear la fila.
+    """
     db_case = await session.get(Case, case_id)
     if not db_case:
         raise HTTPException(status_code=404, detail="Case not found")
@@ -161,6 +400,13 @@ async def update_case(case_id: int, case_update: CaseUpdate, session: AsyncSessi
     # Permission check
     if current_user.rol not in [UserRole.INGRESO, UserRole.ADMIN]:
         raise HTTPException(status_code=403, detail="Not authorized to edit cases")
+
+    expected_version, by_etag = _parse_if_match(if_match, case_id, db_case.version)
+    conflict = _precondition_failed if by_etag else _version_conflict
+    if expected_version is None:
+        expected_version = db_case.version
+    elif expected_version != db_case.version:
+        raise conflict(db_case.version)
     
     case_data = case_update.dict(exclude_unset=True)
     
@@ -181,6 +427,7 @@ async def update_case(case_id: int, case_update: CaseUpdate, session: AsyncSessi
 
     # Calculate diffs for audit
     audit_details = {}
+    values = {}
     for key, value in case_data.items():
         if key == "observaciones": continue
         old_val = getattr(db_case, key)
@@ -190,23 +437,34 @@ async def update_case(case_id: int, case_update: CaseUpdate, session: AsyncSessi
         
         if old_val != value:
             audit_details[key] = {"old": old_val, "new": value}
-            setattr(db_case, key, value)
+            values[key] = value
+
+    # Un solo UPDATE condicionado a la versión, sin SELECT FOR UPDATE
+    new_version = (await session.execute(
+        update(Case)
+        .where(Case.id == case_id, Case.version == expected_version)
+        .values(**values, updated_at=datetime.utcnow(), version=Case.version + 1)
+        .returning(Case.version)
+        .execution_options(synchronize_session=False)
+    )).scalar_one_or_none()
+    if new_version is None:
+        await session.rollback()
+        current = (await session.execute(select(Case.version).where(Case.id == case_id))).scalar_one()
+        raise conflict(current)
     
     # Create Audit Log if there are changes
     if audit_details:
-        audit = CaseAudit(
-            case_id=db_case.id,
-            user_id=current_user.id,
-            action=CaseAuditType.UPDATE,
-            details=audit_details,
-            timestamp=datetime.utcnow()
-        )
-        session.add(audit)
+        await record_audit(session, [{
+            "case_id": db_case.id,
+            "user_id": current_user.id,
+            "action": CaseAuditType.UPDATE,
+            "details": audit_details,
+            "timestamp": datetime.utcnow(),
+        }])
     
-    db_case.updated_at = datetime.utcnow()
-    session.add(db_case)
     await session.commit()
     await session.refresh(db_case)
+    await invalidate_cases(db_case.id)
     return db_case
 
 @router.patch("/observations/{observation_id}", response_model=Observation)
@@ -227,106 +485,409 @@ async def update_observation(
     obs.content = observation_update.content
     obs.edited_at = datetime.utcnow()
     session.add(obs)
+    # El caso cambia con sus observaciones: mantiene válidos los ETag
+    await session.execute(update(Case).where(Case.id == obs.case_id).values(updated_at=obs.edited_at, version=Case.version + 1))
     await session.commit()
     await session.refresh(obs)
+    # updated_at y version también se ven en el listado
+    await invalidate_cases(obs.case_id)
     return obs
 
 from app.schemas import BulkUpdateSchema
 
+def _bulk_change(action: str, value: str):
+    """
+    (columna, valor nuevo, predicado "cambia") para una acción masiva,
+    o None si la acción/valor no aplica (se ignora, como antes).
+    """
+    if action == "CLOSE":
+        return Case.estado, CaseStatus.CERRADO, Case.estado != CaseStatus.CERRADO
+    if action == "ASSIGN":
+        return Case.sby_responsable, value, Case.sby_responsable.is_distinct_from(value)
+    if action == "PRIORITY":
+        try:
+            new_prio = Priority(value)
+        except ValueError:
+            return None # Ignore invalid enum values
+        return Case.prioridad, new_prio, Case.prioridad != new_prio
+    return None
+
+
+def _ids_filter(dialect: str, ids: List[int]):
+    # Un solo parámetro sin importar cuántos ids lleguen
+    if dialect == "postgresql":
+        return Case.id == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+    ids_json = select(column("value")).select_from(func.json_each(json.dumps(ids)))
+    return Case.id.in_(ids_json)
+
+
+def _plain(value):
+    return value.value if isinstance(value, (CaseStatus, Priority)) else value
+
+
+async def apply_bulk_update(session: AsyncSession, ids: List[int], action: str, value: str, user_id: int) -> List[int]:
+    """
+    Aplica una acción masiva sobre `ids` de forma set-based: un UPDATE que
+    solo toca las filas que cambian y un INSERT multi-fila de auditoría.
+    Devuelve los ids modificados. No hace commit.
+    """
+    change = _bulk_change(action, value)
+    if change is None or not ids:
+        return []
+    column_attr, new_value, changed = change
+    field = column_attr.key
+    now = datetime.utcnow()
+    dialect = session.bind.dialect.name
+    id_filter = _ids_filter(dialect, ids)
+
+    if dialect == "postgresql":
+        # UPDATE ... FROM (SELECT ... FOR UPDATE) RETURNING id, valor anterior
+        old = (
+            select(Case.id.label("id"), column_attr.label("old"))
+            .where(id_filter, changed)
+            .with_for_update()
+            .subquery()
+        )
+        stmt = (
+            update(Case)
+            .where(Case.id == old.c.id)
+            .values({field: new_value, "updated_at": now, "version": Case.version + 1})
+            .returning(Case.id, old.c.old)
+        )
+        changed_rows = (await session.execute(stmt)).all()
+    else:
+        # SQLite no permite devolver columnas de otra tabla en RETURNING
+        old_values = dict((await session.execute(select(Case.id, column_attr).where(id_filter, changed))).all())
+        stmt = (
+            update(Case)
+            .where(id_filter, changed)
+            .values({field: new_value, "updated_at": now, "version": Case.version + 1})
+            .returning(Case.id)
+        )
+        changed_rows = [(case_id, old_values.get(case_id)) for case_id in (await session.execute(stmt)).scalars()]
+
+    if changed_rows:
+        await record_audit(session, [
+            {
+                "case_id": case_id,
+                "user_id": user_id,
+                "action": CaseAuditType.BULK_UPDATE,
+                "details": {field: {"old": _plain(old_value), "new": _plain(new_value)}},
+                "timestamp": now,
+            }
+            for case_id, old_value in changed_rows
+        ])
+
+    return [case_id for case_id, _ in changed_rows]
+
+
+# Por encima de este número de ids la operación corre como trabajo en segundo plano
+BULK_ASYNC_THRESHOLD = int(os.getenv("BULK_ASYNC_THRESHOLD", "1000"))
+# Tamaño de cada transacción del trabajo: acota el tiempo que se bloquean filas
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+# Sin latido durante este tiempo, un trabajo PENDING/RUNNING se da por perdido
+BULK_JOB_STALE_SECONDS = int(os.getenv("BULK_JOB_STALE_SECONDS", "600"))
+
+
+async def run_bulk_job(job_id: int, ids: List[int], action: str, value: str, user_id: int, session_factory):
+    """
+    Procesa un trabajo masivo por bloques. Cada bloque se confirma por
+    separado, así que un fallo solo afecta a los ids de ese bloque.
+    """
+    async with session_factory() as session:
+        job = await session.get(BulkJob, job_id)
+        job.status = BulkJobStatus.RUNNING
+        job.heartbeat_at = datetime.utcnow()
+        session.add(job)
+        await session.commit()
+
+        for offset in range(0, len(ids), BULK_CHUNK_SIZE):
+            chunk = ids[offset:offset + BULK_CHUNK_SIZE]
+            try:
+                async with session_factory() as chunk_session:
+                    updated_ids = await apply_bulk_update(chunk_session, chunk, action, value, user_id)
+                    await chunk_session.commit()
+                await invalidate_cases(*updated_ids)
+                job.updated += len(updated_ids)
+            except Exception as e:
+                job.failed_ids = job.failed_ids + chunk
+                job.errors = job.errors + [f"Ids {offset}-{offset + len(chunk) - 1}: {e}"]
+
+            job.processed += len(chunk)
+            job.heartbeat_at = datetime.utcnow()
+            session.add(job)
+            await session.commit()
+
+        job.status = BulkJobStatus.COMPLETED_WITH_ERRORS if job.failed_ids else BulkJobStatus.COMPLETED
+        job.finished_at = datetime.utcnow()
+        session.add(job)
+        await session.commit()
+
+
+async def fail_stale_bulk_jobs(session: AsyncSession, job_id: Optional[int] = None) -> int:
+    """
+    Marca como FAILED los trabajos PENDING/RUNNING sin latido en
+    BULK_JOB_STALE_SECONDS (todos, o solo `job_id`): la tarea en segundo plano
+    murió con su worker (reinicio, OOM) y nadie los cerrará. Se llama al
+    arrancar cada worker y al consultar un trabajo; los trabajos vivos de
+    otros workers siguen latiendo y no se tocan. Hace commit.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=BULK_JOB_STALE_SECONDS)
+    stmt = (
+        update(BulkJob)
+        .where(
+            BulkJob.status.in_([BulkJobStatus.PENDING, BulkJobStatus.RUNNING]),
+            # Un PENDING que nunca arrancó cuenta desde su creación
+            func.coalesce(BulkJob.heartbeat_at, BulkJob.created_at) < cutoff,
+        )
+        .values(status=BulkJobStatus.FAILED, finished_at=datetime.utcnow())
+    )
+    if job_id is not None:
+        stmt = stmt.where(BulkJob.id == job_id)
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount
+
+
 @router.post("/bulk-update", status_code=200)
 async def bulk_update_cases(
     payload: BulkUpdateSchema,
+    response: Response,
+    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
+    session_factory = Depends(get_session_factory),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.rol not in [UserRole.INGRESO, UserRole.ADMIN]:
         raise HTTPException(status_code=403, detail="Not authorized to perform bulk updates")
 
-    query = select(Case).where(Case.id.in_(payload.ids))
-    result = await session.execute(query)
-    cases = result.scalars().all()
-    
-    updated_count = 0
-    
-    for case in cases:
-        audit_details = {}
-        
-        if payload.action == "CLOSE":
-             if case.estado != CaseStatus.CERRADO:
-                 audit_details["estado"] = {"old": case.estado, "new": CaseStatus.CERRADO}
-                 case.estado = CaseStatus.CERRADO
-        
-        elif payload.action == "ASSIGN":
-             if case.sby_responsable != payload.value:
-                  audit_details["sby_responsable"] = {"old": case.sby_responsable, "new": payload.value}
-                  case.sby_responsable = payload.value
-
-        elif payload.action == "PRIORITY":
-             try:
-                 new_prio = Priority(payload.value)
-                 if case.prioridad != new_prio:
-                     audit_details["prioridad"] = {"old": case.prioridad, "new": new_prio}
-                     case.prioridad = new_prio
-             except ValueError:
-                 pass # Ignore invalid enum values
-
-        if audit_details:
-            case.updated_at = datetime.utcnow()
-            session.add(case)
-            
-            # Create Audit
-            audit = CaseAudit(
-                case_id=case.id,
-                user_id=current_user.id,
-                action=CaseAuditType.BULK_UPDATE,
-                details=audit_details,
-                timestamp=datetime.utcnow()
-            )
-            session.add(audit)
-            updated_count += 1
-            
+    ids = list(dict.fromkeys(payload.ids))
+    if len(ids) > BULK_ASYNC_THRESHOLD:
+        job = BulkJob(
+            action=payload.action,
+            value=payload.value,
+            total=len(ids),
+            created_by_id=current_user.id
+        )
+        session.add(job)
+        await session.commit()
+        await session.refresh(job)
+        background_tasks.add_task(run_bulk_job, job.id, ids, payload.action, payload.value, current_user.id, session_factory)
+        response.status_code = 202
+        return {
+            "message": f"Bulk update of {len(ids)} cases queued",
+            "job_id": job.id,
+            "status": job.status
+        }
+
+    updated_ids = await apply_bulk_update(session, ids, payload.action, payload.value, current_user.id)
     await session.commit()
-    return {"message": f"Updated {updated_count} cases successfully"}
+    await invalidate_cases(*updated_ids)
+    return {
+        "message": f"Updated {len(updated_ids)} cases successfully",
+        "updated_count": len(updated_ids),
+        "updated_ids": updated_ids
+    }
+
+
+@router.get("/bulk-jobs/{job_id}", response_model=BulkJob)
+async def get_bulk_job(
+    job_id: int,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.rol not in [UserRole.INGRESO, UserRole.ADMIN]:
+        raise HTTPException(status_code=403, detail="Not authorized to perform bulk updates")
+    job = await session.get(BulkJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    # Sin trabajador vivo que lo cierre, el sondeo no debe esperar para siempre
+    if job.status in (BulkJobStatus.PENDING, BulkJobStatus.RUNNING) and await fail_stale_bulk_jobs(session, job_id):
+        await session.refresh(job)
+    return job
+
+TIMELINE_MAX_LIMIT = 500
+
+
+def _encode_timeline_cursor(sort_at: datetime, kind: str, item_id: int) -> str:
+    raw = f"{sort_at.isoformat()}|{kind}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_timeline_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        sort_at, kind, item_id = raw.split("|")
+        return datetime.fromisoformat(sort_at), kind, int(item_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid timeline cursor")
+
+
+def _timeline_query(case_id: int, after=None, limit: Optional[int] = None):
+    """
+    Observaciones y auditorías de un caso en una sola consulta UNION ALL,
+    ordenada por (sort_at, type, id) para paginar por keyset. `sort_at` es
+    la fecha de la observación o el `recorded_at` de la auditoría, que con
+    buffer llega después del cambio que registra (su `timestamp`).
+    Los nombres de autor se resuelven aparte desde el cache de usuarios.
+    """
+    obs_query = (
+        select(
+            literal("OBSERVATION").label("type"),
+            Observation.id.label("id"),
+            Observation.created_at.label("created_at"),
+            Observation.content.label("content"),
+            cast(null(), String).label("action"),
+            cast(null(), JSON).label("details"),
+            Observation.created_by_id.label("user_id"),
+            Observation.created_at.label("sort_at"),
+        )
+        .where(Observation.case_id == case_id)
+    )
+    audit_query = (
+        select(
+            literal("AUDIT").label("type"),
+            CaseAudit.id.label("id"),
+            CaseAudit.timestamp.label("created_at"),
+            cast(null(), String).label("content"),
+            cast(CaseAudit.action, String).label("action"),
+            CaseAudit.details.label("details"),
+            CaseAudit.user_id.label("user_id"),
+            CaseAudit.recorded_at.label("sort_at"),
+        )
+        .where(CaseAudit.case_id == case_id)
+    )
+
+    if after is not None:
+        # Pre-filtro por rama: cada una lee su índice (case_id, fecha) desde
+        # el cursor en vez de recorrer el historial completo del caso
+        obs_query = obs_query.where(Observation.created_at >= after[0])
+        audit_query = audit_query.where(CaseAudit.recorded_at >= after[0])
+
+    entries = union_all(obs_query, audit_query).subquery()
+    query = select(entries)
+    if after is not None:
+        query = query.where(
+            tuple_(entries.c.sort_at, entries.c.type, entries.c.id) > tuple_(*after)
+        )
+    query = query.order_by(entries.c.sort_at, entries.c.type, entries.c.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def _timeline_entry(row, user_names: dict) -> dict:
+    if row.type == "OBSERVATION":
+        return {
+            "type": "OBSERVATION",
+            "id": row.id,
+            "content": row.content,
+            "created_at": row.created_at,
+            "user_id": row.user_id,
+            "user_name": user_names.get(row.user_id, "Usuario")
+        }
+    return {
+        "type": "AUDIT",
+        "id": row.id,
+        "action": row.action,
+        "details": row.details,
+        "created_at": row.created_at,
+        "user_name": user_names.get(row.user_id, "Unknown")
+    }
+
+
+_TimelineRow = namedtuple("_TimelineRow", ["type", "id", "created_at", "content", "action", "details", "user_id", "sort_at"])
+
+
+def _archived_timeline_rows(history: dict, after=None, limit: Optional[int] = None) -> list:
+    """Las mismas filas que `_timeline_query`, construidas desde `history`."""
+    rows = [
+        _TimelineRow("OBSERVATION", obs["id"], datetime.fromisoformat(obs["created_at"]),
+                     obs["content"], None, None, obs["created_by_id"], datetime.fromisoformat(obs["created_at"]))
+        for obs in history.get("observations", [])
+    ] + [
+        _TimelineRow("AUDIT", audit["id"], datetime.fromisoformat(audit["timestamp"]),
+                     None, audit["action"], audit["details"], audit["user_id"],
+                     # Archivos anteriores a recorded_at
+                     datetime.fromisoformat(audit.get("recorded_at") or audit["timestamp"]))
+        for audit in history.get("audits", [])
+    ]
+    rows.sort(key=lambda row: (row.sort_at, row.type, row.id))
+    if after is not None:
+        rows = [row for row in rows if (row.sort_at, row.type, row.id) > after]
+    return rows[:limit] if limit is not None else rows
+
+
+async def _timeline_validator(case_id, after, limit, session, **_):
+    # Observaciones y adjuntos incrementan la versión del caso al escribirse;
+    # la auditoría con buffer llega después, de ahí el último id de auditoría
+    last_audit = select(func.max(CaseAudit.id)).where(CaseAudit.case_id == case_id).scalar_subquery()
+    row = (await session.execute(
+        select(Case.version, Case.updated_at, last_audit).where(Case.id == case_id)
+    )).one_or_none()
+    if row is None:
+        return None
+    version, updated_at, audit_id = row
+    return ("timeline", case_id, version, audit_id, after, limit), updated_at
+
+async def _timeline_page(session: AsyncSession, rows: list, after: Optional[str], incremental: bool, page_size: int):
+    """Respuesta del timeline a partir de las filas (con una extra si es incremental)."""
+    if incremental:
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+    user_names = await resolve_user_names(session, (row.user_id for row in rows))
+    items = [_timeline_entry(row, user_names) for row in rows]
+
+    if not incremental:
+        return ORJSONResponse(items)
+
+    if rows:
+        last = rows[-1]
+        cursor = _encode_timeline_cursor(last.sort_at, last.type, last.id)
+    else:
+        cursor = after
+
+    return ORJSONResponse({
+        "items": items,
+        "cursor": cursor,
+        "has_more": has_more
+    })
+
+
+async def _archived_timeline(case_id, after, limit, session, **_):
+    """Timeline de un caso que no está en la tabla caliente: del archivo, o vacío."""
+    incremental = after is not None or limit is not None
+    after_key = _decode_timeline_cursor(after) if after else None
+    page_size = limit or TIMELINE_MAX_LIMIT
+    archived = await session.get(ArchivedCase, case_id)
+    rows = []
+    if archived:
+        rows = _archived_timeline_rows(archived.history or {}, after_key, page_size + 1 if incremental else None)
+    return await _timeline_page(session, rows, after, incremental, page_size)
+
 
 @router.get("/{case_id}/timeline")
+@conditional(_timeline_validator, on_missing=_archived_timeline)
+@cached("case:{case_id}")
 async def get_case_timeline(
     case_id: int,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=TIMELINE_MAX_LIMIT),
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    # Fetch observations WITH user relationship loaded
-    obs_query = select(Observation).where(Observation.case_id == case_id).options(selectinload(Observation.created_by))
-    obs_result = await session.execute(obs_query)
-    observations = obs_result.scalars().all()
-    
-    # Fetch audits
-    audit_query = select(CaseAudit).where(CaseAudit.case_id == case_id).options(selectinload(CaseAudit.user))
-    audit_result = await session.execute(audit_query)
-    audits = audit_result.scalars().all()
-    
-    timeline = []
-    
-    for obs in observations:
-        timeline.append({
-            "type": "OBSERVATION",
-            "id": obs.id,
-            "content": obs.content,
-            "created_at": obs.created_at,
-            "user_id": obs.created_by_id,
-            "user_name": obs.created_by.nombre if obs.created_by else "Usuario"
-        })
-        
-    for audit in audits:
-        timeline.append({
-            "type": "AUDIT",
-            "id": audit.id,
-            "action": audit.action,
-            "details": audit.details,
-            "created_at": audit.timestamp,
-            "user_name": audit.user.nombre if audit.user else "Unknown"
-        })
-        
-    # Sort by date
-    timeline.sort(key=lambda x: x["created_at"])
-    
-    return timeline
\ No newline at end of file
+    """
+    Sin parámetros devuelve el historial completo (lista), como antes.
+    Con `after` y/o `limit` devuelve solo las entradas posteriores al cursor
+    junto con el cursor siguiente, de modo que el polling cueste O(nuevas).
+    Los casos archivados se leen del archivo (ver `_archived_timeline`).
+    """
+    incremental = after is not None or limit is not None
+    after_key = _decode_timeline_cursor(after) if after else None
+    page_size = limit or TIMELINE_MAX_LIMIT
+
+    # Se pide una fila extra para saber si quedan más entradas
+    query = _timeline_query(case_id, after_key, page_size + 1 if incremental else None)
+    rows = (await session.execute(query)).all()
+    return await _timeline_page(session, rows, after, incremental, page_size)
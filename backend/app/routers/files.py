@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlmodel import select, update
 from typing import List
 import shutil
 import os
+from datetime import datetime
 from pathlib import Path
 from ..database import get_session
 from ..models import Attachment, Case, User, UserRole
 from ..auth import get_current_user
+from ..cache import invalidate_cases
+from ..metrics import ATTACHMENT_BYTES
+from ..audit import record_audit
 
 router = APIRouter(
     prefix="/cases",
@@ -50,20 +54,25 @@ async def upload_attachment(
     )
     
     session.add(attachment)
-    
+    ATTACHMENT_BYTES.inc(attachment.file_size)
+
     # Create Audit Log
-    from ..models import CaseAudit, CaseAuditType
-    audit_log = CaseAudit(
-        case_id=case_id,
-        user_id=current_user.id,
-        action=CaseAuditType.EVIDENCE,
-        details={"filename": file.filename, "size": file_path.stat().st_size},
-        timestamp=attachment.uploaded_at
-    )
-    session.add(audit_log)
+    from ..models import CaseAuditType
+    await record_audit(session, [{
+        "case_id": case_id,
+        "user_id": current_user.id,
+        "action": CaseAuditType.EVIDENCE,
+        "details": {"filename": file.filename, "size": file_path.stat().st_size},
+        "timestamp": attachment.uploaded_at,
+    }])
+    # Los adjuntos son parte del caso: mantiene válidos los ETag
+    case.updated_at = attachment.uploaded_at
+    case.version = Case.version + 1
+    session.add(case)
 
     await session.commit()
     await session.refresh(attachment)
+    await invalidate_cases(case_id)
     return attachment
 
 @router.get("/{case_id}/attachments", response_model=List[Attachment])
@@ -96,5 +105,7 @@ async def delete_attachment(
         pass # Warn but continue DB deletion?
 
     await session.delete(attachment)
+    await session.execute(update(Case).where(Case.id == attachment.case_id).values(updated_at=datetime.utcnow(), version=Case.version + 1))
     await session.commit()
+    await invalidate_cases(attachment.case_id)
     return {"ok": True}
@@ -1,5 +1,4 @@
 import io
-import pandas as pd
 from typing import List
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
 from fastapi.responses import StreamingResponse
@@ -9,9 +8,16 @@ from sqlmodel import select
 from app.database import get_session
 from app.models import Case, CaseCreate, CaseStatus, Priority, Observation, CaseAudit, CaseAuditType, User
 from app.auth import get_current_user
+from app.user_cache import resolve_user_names
+from app.cache import invalidate_all
+from app.metrics import observe_io_job, count_io_rows
 import re
 from datetime import datetime
-from sqlmodel import delete
+from sqlmodel import delete, update
+
+# pandas (y openpyxl/xlsxwriter, que carga al leer o escribir Excel) se importa
+# dentro de cada endpoint: pesa decenas de MB y las importaciones/exportaciones
+# son raras, así que los workers no lo cargan hasta el primer uso
 
 # Regex to find cases: [STATUS] CASO CODE. DESCRIPTION
 CASE_PATTERN = re.compile(r"\[(ABIERTO|CERRADO|EN MONITOREO|STANDBY|PENDIENTE)\]\s*CASO\s*([^.]+)\.?\s*(.*)", re.IGNORECASE | re.DOTALL)
@@ -24,6 +30,7 @@ router = APIRouter(prefix="/cases-io", tags=["Import/Export"])
 # NUEVO: IMPORTAR CASOS CON OBSERVACIONES
 # ==========================================
 @router.post("/import-with-observations", status_code=201)
+@observe_io_job("import_with_observations")
 async def import_cases_with_observations(
     casos_file: UploadFile = File(...),
     observaciones_file: UploadFile = File(None),  # Opcional
@@ -35,6 +42,8 @@ async def import_cases_with_observations(
     1. casos_para_import.xlsx - Tabla Case
     2. observaciones_para_import.xlsx - Tabla Observation (opcional)
     """
+    import pandas as pd
+
     
     if not casos_file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Invalid file format. Please upload Excel file.")
@@ -64,6 +73,7 @@ async def import_cases_with_observations(
     casos_map = {}  # Mapeo codigo -> case_id para las observaciones
 
     print(f"\n📥 Importando {len(df_casos)} casos...")
+    count_io_rows("import_with_observations", len(df_casos))
 
     for index, row in df_casos.iterrows():
         try:
@@ -128,6 +138,7 @@ async def import_cases_with_observations(
                 existing_case.fecha_inicio = fecha_inicio
                 existing_case.fecha_fin = fecha_fin
                 existing_case.updated_at = updated_at
+                existing_case.version += 1
                 
                 session.add(existing_case)
                 casos_map[codigo] = existing_case.id
@@ -158,6 +169,7 @@ async def import_cases_with_observations(
             errores_casos.append(f"Fila {index+2}: {str(e)}")
 
     await session.commit()
+    await invalidate_all()
     print(f"✅ Casos importados: {casos_importados}, actualizados: {casos_actualizados}")
 
     # ===========================
@@ -184,6 +196,10 @@ async def import_cases_with_observations(
             raise HTTPException(status_code=400, detail=f"Missing required columns in observaciones file: {', '.join(missing_cols_obs)}")
 
         df_observaciones.fillna('', inplace=True)
+        count_io_rows("import_with_observations", len(df_observaciones))
+        # Casos que no venían en el archivo de casos y reciben observaciones:
+        # se incrementa su versión para invalidar los ETag
+        touched_case_ids = set()
 
         for index, row in df_observaciones.iterrows():
             try:
@@ -230,11 +246,16 @@ async def import_cases_with_observations(
                     
                     session.add(new_observation)
                     observaciones_importadas += 1
+                    if case_codigo not in casos_map:
+                        touched_case_ids.add(case_id)
 
             except Exception as e:
                 errores_observaciones.append(f"Fila {index+2}: {str(e)}")
 
+        if touched_case_ids:
+            await session.exec(update(Case).where(Case.id.in_(touched_case_ids)).values(updated_at=datetime.utcnow(), version=Case.version + 1))
         await session.commit()
+        await invalidate_all()
         print(f"✅ Observaciones importadas: {observaciones_importadas}")
 
     return {
@@ -251,6 +272,7 @@ async def import_cases_with_observations(
 # IMPORTACIÓN SIMPLE (MANTENIDO PARA COMPATIBILIDAD)
 # ==========================================
 @router.post("/import", status_code=201)
+@observe_io_job("import")
 async def import_cases(
     file: UploadFile = File(...),
     session: AsyncSession = Depends(get_session),
@@ -260,6 +282,8 @@ async def import_cases(
     Importación simple de casos sin observaciones separadas.
     Mantiene compatibilidad con el formato anterior.
     """
+    import pandas as pd
+
     if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
         raise HTTPException(status_code=400, detail="Invalid file format. Please upload Excel or CSV.")
 
@@ -285,6 +309,7 @@ async def import_cases(
 
     imported_count = 0
     errors = []
+    count_io_rows("import", len(df))
 
     for index, row in df.iterrows():
         try:
@@ -334,6 +359,7 @@ async def import_cases(
             errors.append(f"Row {index+2}: {str(e)}")
 
     await session.commit()
+    await invalidate_all()
     
     return {
         "message": f"Successfully imported {imported_count} cases.",
@@ -345,6 +371,7 @@ async def import_cases(
 # IMPORTACIÓN LEGACY (MANTENIDO)
 # ==========================================
 @router.post("/import-legacy", status_code=201)
+@observe_io_job("import_legacy")
 async def import_legacy_cases(
     file: UploadFile = File(...),
     session: AsyncSession = Depends(get_session),
@@ -353,6 +380,8 @@ async def import_legacy_cases(
     """
     Importa casos desde archivos Excel legacy con formato de bitácora semanal.
     """
+    import pandas as pd
+
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Invalid file format. Please upload Excel.")
 
@@ -385,6 +414,7 @@ async def import_legacy_cases(
     warnings = []
     count_created = 0
     count_updated = 0
+    count_io_rows("import_legacy", len(df))
 
     for idx, row in df.iterrows():
         if len(row) < 26: continue
@@ -440,6 +470,7 @@ async def import_legacy_cases(
                         existing_case.estado = status_enum
                         
                     existing_case.updated_at = date_val
+                    existing_case.version += 1
                     
                     obs = Observation(
                         case=existing_case,
@@ -460,6 +491,7 @@ async def import_legacy_cases(
                         existing_case_db.estado = status_enum
                         existing_case_db.sby_responsable = resp
                         existing_case_db.updated_at = date_val
+                        existing_case_db.version += 1
                         
                         obs = Observation(
                             case_id=existing_case_db.id,
@@ -495,6 +527,7 @@ async def import_legacy_cases(
                         count_created += 1
 
     await session.commit()
+    await invalidate_all()
     return {"message": f"Legacy Import Processed: {count_created} created, {count_updated} updates."}
 
 
@@ -502,6 +535,7 @@ async def import_legacy_cases(
 # NUEVO: EXPORTAR CASOS CON OBSERVACIONES
 # ==========================================
 @router.get("/export-with-observations")
+@observe_io_job("export_with_observations")
 async def export_cases_with_observations(
     format: str = Query("xlsx", pattern="^(xlsx|csv)$"),
     session: AsyncSession = Depends(get_session)
@@ -509,6 +543,8 @@ async def export_cases_with_observations(
     """
     Exporta casos y observaciones en dos archivos separados (en un ZIP) o en hojas separadas de Excel.
     """
+    import pandas as pd
+
     # Obtener todos los casos
     cases_result = await session.exec(select(Case))
     cases = cases_result.all()
@@ -520,6 +556,12 @@ async def export_cases_with_observations(
     observations_result = await session.exec(select(Observation))
     observations = observations_result.all()
 
+    # Nombres de autor desde el cache de usuarios (una consulta como máximo)
+    user_names = await resolve_user_names(
+        session,
+        [case.creado_por_id for case in cases] + [obs.created_by_id for obs in observations]
+    )
+
     # Crear DataFrame de casos
     cases_data = []
     for case in cases:
@@ -534,6 +576,7 @@ async def export_cases_with_observations(
             'novedades_y_comentarios': case.novedades_y_comentarios or '',
             'observaciones': case.observaciones or '',
             'creado_por_id': case.creado_por_id,
+            'creado_por_nombre': user_names.get(case.creado_por_id, ''),
             'created_at': case.created_at,
             'updated_at': case.updated_at
         })
@@ -543,9 +586,10 @@ async def export_cases_with_observations(
     # Crear DataFrame de observaciones
     observations_data = []
     obs_counter = {}  # Para numerar observaciones por caso
+    codigos = {case.id: case.codigo for case in cases}
     
     for obs in observations:
-        case_codigo = next((c.codigo for c in cases if c.id == obs.case_id), 'UNKNOWN')
+        case_codigo = codigos.get(obs.case_id, 'UNKNOWN')
         
         if case_codigo not in obs_counter:
             obs_counter[case_codigo] = 0
@@ -557,10 +601,12 @@ async def export_cases_with_observations(
             'numero_observacion': obs_counter[case_codigo],
             'content': obs.content,
             'created_by_id': obs.created_by_id,
+            'created_by_nombre': user_names.get(obs.created_by_id, ''),
             'created_at': obs.created_at
         })
     
     df_observations = pd.DataFrame(observations_data)
+    count_io_rows("export_with_observations", len(df_cases) + len(df_observations))
 
     # Crear archivo Excel con múltiples hojas
     if format == 'xlsx':
@@ -595,6 +641,7 @@ async def export_cases_with_observations(
 # EXPORTACIÓN SIMPLE (MANTENIDO)
 # ==========================================
 @router.get("/export")
+@observe_io_job("export")
 async def export_cases(
     format: str = Query("tsv", pattern="^(tsv|csv|xlsx)$"),
     session: AsyncSession = Depends(get_session)
@@ -603,6 +650,8 @@ async def export_cases(
     Exportación simple de casos en un solo archivo.
     Mantiene compatibilidad con el formato anterior.
     """
+    import pandas as pd
+
     statement = select(Case)
     results = await session.exec(statement)
     cases = results.all()
@@ -610,9 +659,15 @@ async def export_cases(
     if not cases:
         raise HTTPException(status_code=404, detail="No cases found to export.")
 
+    user_names = await resolve_user_names(session, (case.creado_por_id for case in cases))
+
     # Convert to DataFrame
-    data = [case.dict() for case in cases]
+    data = [
+        {**case.dict(), "creado_por_nombre": user_names.get(case.creado_por_id, "")}
+        for case in cases
+    ]
     df = pd.DataFrame(data)
+    count_io_rows("export", len(df))
 
     stream = io.BytesIO()
 
@@ -1,38 +1,247 @@
-from fastapi import APIRouter, Depends
-from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import String, cast, literal, null, union_all
 from sqlmodel import select, func
-from typing import Dict
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+import os
 
 from app.database import get_session
-from app.models import Case, CaseStatus, Priority
+from app.models import Case, CaseAudit, CaseStatus, Priority, User, UserRole
+from app.auth import get_current_user
+from app.cache import cached, cache_stats, CASE_LIST_TAG
+from app.conditional import conditional
+from app.slow_queries import get_slow_query_recorder
+from app.profiling import get_profile, list_profiles
 
 router = APIRouter(prefix="/stats", tags=["Stats"])
 
+STATS_EXPIRE = 60
+# Las métricas de SLA se recalculan como mucho cada SLA_EXPIRE segundos por ventana
+SLA_EXPIRE = int(os.getenv("SLA_EXPIRE", "300"))
+SLA_DEFAULT_DAYS = int(os.getenv("SLA_DEFAULT_DAYS", "90"))
+
+# Clave de la respuesta -> columna por la que se agrupa
+SLA_DIMENSIONS = {
+    "by_priority": "prioridad",
+    "by_service": "servicio_o_plataforma",
+    "by_sby_responsable": "sby_responsable",
+}
+
+async def _stats_validator(session, **_):
+    # Cualquier escritura sobre un caso incrementa su versión y la suma
+    total, version_sum = (await session.execute(
+        select(func.count(), func.coalesce(func.sum(Case.version), 0)).select_from(Case)
+    )).one()
+    # cases_last_24h cambia con el paso del tiempo: ventana igual al cache
+    window = int(datetime.utcnow().timestamp() // STATS_EXPIRE)
+    return ("stats", total, version_sum, window), None
+
 @router.get("/")
+@conditional(_stats_validator)
+@cached(CASE_LIST_TAG, expire=STATS_EXPIRE)
 async def get_stats(session: AsyncSession = Depends(get_session)):
-    # Total Cases
-    total_cases = (await session.exec(select(func.count()).select_from(Case))).one()
+    last_24h = datetime.utcnow() - timedelta(hours=24)
+    active = Case.estado != CaseStatus.CERRADO
 
+    # Todos los contadores en una sola pasada con agregados filtrados
+    columns = [func.count().label("total_cases")]
     # By Status
-    by_status = {}
-    for status in CaseStatus:
-        count = (await session.exec(select(func.count()).select_from(Case).where(Case.estado == status))).one()
-        by_status[status.value] = count
-
+    columns += [func.count().filter(Case.estado == status).label(f"status_{status.value}") for status in CaseStatus]
     # By Priority (Active Cases Only)
-    by_priority = {}
-    for priority in Priority:
-        count = (await session.exec(select(func.count()).select_from(Case).where(Case.prioridad == priority, Case.estado != CaseStatus.CERRADO))).one()
-        by_priority[priority.value] = count
-
+    columns += [func.count().filter(Case.prioridad == priority, active).label(f"priority_{priority.value}") for priority in Priority]
     # Cases Last 24h
-    last_24h = datetime.utcnow() - timedelta(hours=24)
-    cases_last_24h = (await session.exec(select(func.count()).select_from(Case).where(Case.created_at >= last_24h))).one()
+    columns.append(func.count().filter(Case.created_at >= last_24h).label("cases_last_24h"))
+
+    row = (await session.execute(select(*columns).select_from(Case))).one()._mapping
 
     return {
-        "total_cases": total_cases,
-        "by_status": by_status,
-        "by_priority": by_priority,
-        "cases_last_24h": cases_last_24h
+        "total_cases": row["total_cases"],
+        "by_status": {status.value: row[f"status_{status.value}"] for status in CaseStatus},
+        "by_priority": {priority.value: row[f"priority_{priority.value}"] for priority in Priority},
+        "cases_last_24h": row["cases_last_24h"]
     }
+
+
+def _sla_window(start_date: Optional[datetime], end_date: Optional[datetime]):
+    end = end_date or datetime.utcnow()
+    start = start_date or end - timedelta(days=SLA_DEFAULT_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    return start, end
+
+def _sla_durations(start: datetime, end: datetime):
+    """
+    Casos cerrados dentro de la ventana con su inicio y cierre. El cierre es
+    `fecha_fin` (importaciones) o, si no hay, la última transición a CERRADO
+    registrada en la auditoría dentro de la ventana.
+    """
+    closed_audit = (
+        select(CaseAudit.case_id, func.max(CaseAudit.timestamp).label("closed_at"))
+        .where(
+            CaseAudit.timestamp >= start,
+            CaseAudit.timestamp < end,
+            CaseAudit.details["estado"]["new"].as_string() == CaseStatus.CERRADO.value,
+        )
+        .group_by(CaseAudit.case_id)
+        .subquery()
+    )
+    closed_at = func.coalesce(Case.fecha_fin, closed_audit.c.closed_at)
+    return (
+        select(
+            Case.prioridad,
+            Case.servicio_o_plataforma,
+            Case.sby_responsable,
+            Case.fecha_inicio,
+            closed_at.label("closed_at"),
+        )
+        .outerjoin(closed_audit, closed_audit.c.case_id == Case.id)
+        .where(
+            Case.estado == CaseStatus.CERRADO,
+            closed_at >= start,
+            closed_at < end,
+            closed_at >= Case.fecha_inicio,
+        )
+    )
+
+async def _sla_groups_sql(session: AsyncSession, durations) -> List[tuple]:
+    """PostgreSQL: agregados y percentiles en la base, una consulta para todo."""
+    durations = durations.subquery()
+    hours = func.extract("epoch", durations.c.closed_at - durations.c.fecha_inicio) / 3600
+
+    def grouped(dimension: str, key=None):
+        query = select(
+            literal(dimension).label("dimension"),
+            (cast(key, String) if key is not None else cast(null(), String)).label("key"),
+            func.count(),
+            func.avg(hours),
+            func.percentile_cont(0.5).within_group(hours),
+            func.percentile_cont(0.9).within_group(hours),
+        )
+        return query.group_by(key) if key is not None else query
+
+    query = union_all(
+        grouped("overall"),
+        *(grouped(dimension, durations.c[column]) for dimension, column in SLA_DIMENSIONS.items()),
+    )
+    # Sin casos, el agregado global devuelve count 0: se descarta como en pandas
+    return [tuple(row) for row in (await session.execute(query)).all() if row[2]]
+
+async def _sla_groups_frame(session: AsyncSession, durations) -> List[tuple]:
+    """Otros motores: lectura por columnas y agregados vectorizados con pandas."""
+    import pandas as pd
+
+    rows = (await session.execute(durations)).all()
+    frame = pd.DataFrame(rows, columns=[*SLA_DIMENSIONS.values(), "fecha_inicio", "closed_at"])
+    hours = (pd.to_datetime(frame["closed_at"]) - pd.to_datetime(frame["fecha_inicio"])).dt.total_seconds() / 3600
+
+    groups = []
+    if len(hours):
+        groups.append(("overall", None, len(hours), hours.mean(), hours.median(), hours.quantile(0.9)))
+    for dimension, column in SLA_DIMENSIONS.items():
+        keys = frame[column].map(lambda value: getattr(value, "value", value))
+        by_key = hours.groupby(keys, dropna=False)
+        table = pd.concat([by_key.count(), by_key.mean(), by_key.median(), by_key.quantile(0.9)], axis=1)
+        for key, values in table.iterrows():
+            groups.append((dimension, None if pd.isna(key) else key, *values))
+    return groups
+
+def _sla_summary(count, mean, median, p90) -> Dict:
+    return {
+        "count": int(count),
+        "mean_hours": round(float(mean), 2),
+        "median_hours": round(float(median), 2),
+        "p90_hours": round(float(p90), 2),
+    }
+
+async def _sla_validator(start_date, end_date, session, **_):
+    total, version_sum = (await session.execute(
+        select(func.count(), func.coalesce(func.sum(Case.version), 0)).select_from(Case)
+    )).one()
+    # Sin end_date la ventana termina "ahora": igual al tiempo de cache
+    window = int(datetime.utcnow().timestamp() // SLA_EXPIRE) if end_date is None else None
+    return ("sla", total, version_sum, start_date, end_date, window), None
+
+@router.get("/sla")
+@conditional(_sla_validator)
+@cached(CASE_LIST_TAG, expire=SLA_EXPIRE)
+async def get_sla_stats(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Tiempo hasta el cierre (media, mediana y p90, en horas) de los casos
+    cerrados en [start_date, end_date), en total y por prioridad, servicio y
+    responsable. Por defecto, los últimos SLA_DEFAULT_DAYS días. Cada ventana
+    se cachea SLA_EXPIRE segundos o hasta la próxima escritura de casos.
+    """
+    start, end = _sla_window(start_date, end_date)
+    durations = _sla_durations(start, end)
+    if session.bind.dialect.name == "postgresql":
+        groups = await _sla_groups_sql(session, durations)
+    else:
+        groups = await _sla_groups_frame(session, durations)
+
+    payload = {
+        "start": start,
+        "end": end,
+        "overall": {"count": 0, "mean_hours": None, "median_hours": None, "p90_hours": None},
+        **{dimension: [] for dimension in SLA_DIMENSIONS},
+    }
+    for dimension, key, *values in groups:
+        if dimension == "overall":
+            payload["overall"] = _sla_summary(*values)
+        else:
+            payload[dimension].append({"key": key, **_sla_summary(*values)})
+    for dimension in SLA_DIMENSIONS:
+        payload[dimension].sort(key=lambda entry: (-entry["count"], entry["key"] or ""))
+    return payload
+
+
+@router.get("/cache")
+async def get_cache_stats(current_user: User = Depends(get_current_user)):
+    """Contadores de aciertos/fallos por nivel del cache. Solo administradores."""
+    if current_user.rol != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return cache_stats() or {}
+
+@router.get("/slow-queries")
+async def get_slow_queries(current_user: User = Depends(get_current_user)):
+    """Últimas consultas lentas registradas (con plan si se capturó). Solo administradores."""
+    if current_user.rol != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    recorder = get_slow_query_recorder()
+    if recorder is None:
+        return {"enabled": False, "threshold_ms": None, "queries": []}
+    return {"enabled": True, "threshold_ms": recorder.threshold_ms, "queries": recorder.recent()}
+
+@router.get("/profiles")
+async def get_profiles(current_user: User = Depends(get_current_user)):
+    """Perfiles de requests capturados con la cabecera X-Profile. Solo administradores."""
+    if current_user.rol != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return list_profiles()
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, current_user: User = Depends(get_current_user)):
+    """
+    Descarga un perfil: pstats (``python -m pstats``, snakeviz) o stacks
+    colapsados (flamegraph.pl, speedscope). Solo administradores.
+    """
+    if current_user.rol != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    metadata, artifact = profile
+    if metadata["format"] == "pstats":
+        media_type, extension = "application/octet-stream", "prof"
+    else:
+        media_type, extension = "text/plain", "folded"
+    return Response(
+        content=artifact,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=profile-{profile_id}.{extension}"}
+    )
@@ -7,6 +7,8 @@ from typing import List
 from app.database import get_session
 from app.models import User, UserCreate, UserRead, UserRole, UserUpdate
 from app.auth import get_current_user, get_password_hash
+from app.user_cache import invalidate_user_name
+from app.cache import invalidate_users
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -130,6 +132,10 @@ async def update_user(
     # ⭐ NUEVO: Manejo de errores de integridad (ej: email duplicado)
     try:
         await session.commit()
+        invalidate_user_name(user_id)
+        # Los demás workers vacían su mapa de nombres; los timelines
+        # cacheados incluyen nombres de autor
+        await invalidate_users()
         await session.refresh(db_user)
         return db_user
     except IntegrityError as e:
@@ -169,4 +175,6 @@ async def delete_user(
     
     await session.delete(user)
     await session.commit()
+    invalidate_user_name(user_id)
+    await invalidate_users()
     return {"ok": True}
\ No newline at end of file
@@ -0,0 +1,133 @@
+import logging
+import os
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Umbral en ms; 0 (por defecto) deja el registro desactivado
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+# Fracción de consultas lentas a las que se les captura el plan (solo PostgreSQL)
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.1"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "50"))
+
+_MAX_PARAMS_LENGTH = 500
+
+
+class SlowQueryRecorder:
+    """
+    Registra las sentencias que superan el umbral: las loguea con sus
+    parámetros y duración, y guarda las últimas en un buffer circular.
+
+    En PostgreSQL una muestra de los SELECT lentos se vuelve a ejecutar con
+    EXPLAIN (ANALYZE, BUFFERS) dentro de un SAVEPOINT, de modo que un fallo
+    del EXPLAIN no aborta la transacción de la request.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_MS,
+        explain_rate: float = SLOW_QUERY_EXPLAIN_RATE,
+        maxlen: int = SLOW_QUERY_BUFFER_SIZE,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self.entries: deque = deque(maxlen=maxlen)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Por contexto de ejecución: una sentencia que falla no desplaza las
+        # duraciones de las siguientes en la conexión
+        conn.info.setdefault("slow_query_start", {})[context] = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.get("slow_query_start", {}).pop(context, None)
+        if start is None:
+            return
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        params = repr(parameters)
+        if len(params) > _MAX_PARAMS_LENGTH:
+            params = params[:_MAX_PARAMS_LENGTH] + "..."
+        logger.warning("Slow query (%.1f ms): %s | params: %s", duration_ms, statement, params)
+
+        plan = None
+        if self._should_explain(conn, statement, executemany):
+            plan = self._explain(conn, statement, parameters)
+        self.entries.append({
+            "timestamp": datetime.utcnow(),
+            "duration_ms": round(duration_ms, 1),
+            "statement": statement,
+            "parameters": params,
+            "plan": plan,
+        })
+
+    def handle_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None:
+            conn.info.get("slow_query_start", {}).pop(exception_context.execution_context, None)
+
+    def _should_explain(self, conn, statement, executemany) -> bool:
+        return (
+            conn.dialect.name == "postgresql"
+            and not executemany
+            and statement.lstrip().upper().startswith("SELECT")
+            and random.random() < self.explain_rate
+        )
+
+    def _explain(self, conn, statement, parameters) -> Optional[List[str]]:
+        # Cursor DBAPI directo: no dispara de nuevo los eventos del engine
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+                plan = [row[0] for row in cursor.fetchall()]
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+                return plan
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+        except Exception:
+            logger.warning("Could not capture EXPLAIN for slow query", exc_info=True)
+            return None
+        finally:
+            cursor.close()
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """Consultas lentas registradas, de la más reciente a la más antigua."""
+        return list(reversed(self.entries))
+
+    def clear(self):
+        self.entries.clear()
+
+
+_recorder: Optional[SlowQueryRecorder] = None
+
+
+def install_slow_query_log(engine, threshold_ms: float = SLOW_QUERY_MS, **kwargs) -> Optional[SlowQueryRecorder]:
+    """
+    Activa el registro de consultas lentas en el engine si hay umbral.
+    Solo admite un registro por proceso; llamadas repetidas lo reutilizan.
+    """
+    global _recorder
+    if threshold_ms <= 0:
+        return None
+    if _recorder is None:
+        _recorder = SlowQueryRecorder(threshold_ms, **kwargs)
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _recorder.before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _recorder.before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _recorder.after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _recorder.handle_error)
+    return _recorder
+
+
+def get_slow_query_recorder() -> Optional[SlowQueryRecorder]:
+    return _recorder
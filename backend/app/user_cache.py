@@ -0,0 +1,64 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+from sqlmodel import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import User
+from app.cache import USERS_TAG, tag_version
+import os
+
+USER_NAME_CACHE_SIZE = int(os.getenv("USER_NAME_CACHE_SIZE", "1024"))
+
+# Cache de proceso id -> nombre, acotado con política LRU. Se vacía cuando
+# cambia la versión del tag USERS_TAG, que cualquier worker puede incrementar
+_user_names: "OrderedDict[int, str]" = OrderedDict()
+_users_version: Optional[str] = None
+
+
+def _remember(user_id: int, nombre: str):
+    _user_names[user_id] = nombre
+    _user_names.move_to_end(user_id)
+    while len(_user_names) > USER_NAME_CACHE_SIZE:
+        _user_names.popitem(last=False)
+
+
+async def resolve_user_names(session: AsyncSession, user_ids: Iterable[Optional[int]]) -> Dict[int, str]:
+    """
+    Devuelve {id: nombre} para los ids dados. Los que no están en memoria
+    se cargan con una única consulta y quedan cacheados.
+    """
+    global _users_version
+    version = await tag_version(USERS_TAG)
+    if version != _users_version:
+        # Otro worker renombró o borró un usuario (o el tag expiró)
+        if _users_version is not None:
+            _user_names.clear()
+        _users_version = version
+
+    names = {}
+    missing = set()
+    for user_id in user_ids:
+        if user_id is None or user_id in names:
+            continue
+        if user_id in _user_names:
+            _user_names.move_to_end(user_id)
+            names[user_id] = _user_names[user_id]
+        else:
+            missing.add(user_id)
+
+    if missing:
+        result = await session.execute(select(User.id, User.nombre).where(User.id.in_(missing)))
+        for user_id, nombre in result.all():
+            _remember(user_id, nombre)
+            names[user_id] = nombre
+
+    return names
+
+
+def invalidate_user_name(user_id: int):
+    _user_names.pop(user_id, None)
+
+
+def clear_user_names():
+    global _users_version
+    _user_names.clear()
+    _users_version = None
@@ -0,0 +1,111 @@
+"""
+Archivado de casos cerrados: mantiene acotada la tabla caliente `case`.
+
+Mueve a `archivedcase` los casos CERRADO sin actividad (updated_at) desde
+hace ARCHIVE_AFTER_DAYS días, junto con sus observaciones, auditoría y
+metadatos de adjuntos (los ficheros no se tocan). Cada lote es una
+transacción: se inserta en el archivo y se borra de las tablas calientes.
+
+Los casos archivados siguen accesibles en solo lectura: GET /cases/{id},
+GET /cases/codigo/{codigo}, el timeline y GET /cases/?include_archived=true.
+
+    python archive_cases.py                        # cron diario
+    python archive_cases.py --days 180 --batch-size 200
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, insert, select
+
+from app.cache import init_cache, invalidate_cases
+from app.models import ArchivedCase, Attachment, Case, CaseAudit, CaseStatus, Observation
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+# Clave de `history` -> tabla hija del caso
+_CHILDREN = (("observations", Observation), ("audits", CaseAudit), ("attachments", Attachment))
+
+
+async def archive_batch(session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> List[int]:
+    """
+    Archiva hasta `batch_size` casos cerrados sin actividad desde `cutoff`.
+    No hace commit; devuelve los ids archivados.
+    """
+    # Sin actividad reciente: tampoco quedan escrituras en vuelo (p. ej. en
+    # el buffer de auditoría) que apunten al caso
+    query = (
+        select(Case.id)
+        .where(Case.estado == CaseStatus.CERRADO, Case.updated_at < cutoff)
+        .order_by(Case.id)
+        .limit(batch_size)
+    )
+    if session.bind.dialect.name == "postgresql":
+        # Varios archivadores a la vez se reparten los casos
+        query = query.with_for_update(skip_locked=True)
+    ids = list((await session.execute(query)).scalars())
+    if not ids:
+        return []
+
+    history = {case_id: {key: [] for key, _ in _CHILDREN} for case_id in ids}
+    for key, model in _CHILDREN:
+        rows = await session.execute(select(model.__table__).where(model.case_id.in_(ids)).order_by(model.id))
+        for row in rows:
+            history[row.case_id][key].append(jsonable_encoder(dict(row._mapping)))
+
+    now = datetime.utcnow()
+    cases = await session.execute(select(Case.__table__).where(Case.id.in_(ids)))
+    await session.execute(insert(ArchivedCase), [
+        {**row._mapping, "archived_at": now, "history": history[row.id]}
+        for row in cases
+    ])
+    for _, model in _CHILDREN:
+        await session.execute(delete(model).where(model.case_id.in_(ids)))
+    await session.execute(delete(Case).where(Case.id.in_(ids)))
+    return ids
+
+
+async def run_archive(
+    session_factory,
+    days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    now: Optional[datetime] = None,
+) -> int:
+    """Archiva por lotes hasta que no queden candidatos. Devuelve el total."""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    total = 0
+    while True:
+        async with session_factory() as session:
+            ids = await archive_batch(session, cutoff, batch_size)
+            await session.commit()
+        if not ids:
+            return total
+        total += len(ids)
+        await invalidate_cases(*ids)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Archiva casos cerrados sin actividad reciente")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="Días sin actividad")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Casos por transacción")
+    return parser
+
+
+async def main(args):
+    from app.database import async_session, engine
+
+    # Invalida también el cache compartido (Redis) de los workers
+    init_cache()
+    start = time.perf_counter()
+    total = await run_archive(async_session, args.days, args.batch_size)
+    await engine.dispose()
+    print(f"{total} casos archivados en {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
@@ -0,0 +1,180 @@
+"""
+Preparación de la base de datos, una vez por despliegue.
+
+Crea las tablas que falten, agrega a las existentes las columnas nuevas
+del modelo (p. ej. `case.version`), los índices que falten y a los enums de
+PostgreSQL sus valores nuevos, y crea el usuario administrador inicial.
+Antes lo hacía cada worker en su startup: con N workers eran N pasadas de
+reflexión del esquema y carreras en el INSERT del admin. Ahora los workers
+solo comprueban que la base esté lista (GET /health/ready).
+
+    python bootstrap.py                       # esquema + admin
+    python bootstrap.py --skip-admin          # solo esquema
+    ADMIN_EMAIL=ops@empresa.com ADMIN_PASSWORD=... python bootstrap.py
+
+En PostgreSQL `observation` y `caseaudit` se crean particionadas por mes y
+en cada ejecución se aseguran los meses siguientes (ver partitions.py).
+
+Es idempotente y se puede lanzar desde varios contenedores a la vez: en
+PostgreSQL se serializa con un advisory lock y el admin se inserta con
+ON CONFLICT DO NOTHING sobre el email.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from sqlalchemy import Enum, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import SQLModel
+
+from app.auth import get_password_hash
+from app.database import engine
+from app.models import User, UserRole
+from partitions import PARTITIONED, create_partitioned_tables, ensure_partitions
+
+# Clave arbitraria del advisory lock del bootstrap (pg_advisory_xact_lock)
+BOOTSTRAP_LOCK_ID = 7_130_001
+
+DEFAULT_ADMIN_EMAIL = "admin@example.com"
+DEFAULT_ADMIN_PASSWORD = "admin123"
+
+
+def add_missing_columns(conn) -> list:
+    """
+    ALTER TABLE ... ADD COLUMN para las columnas del modelo que no existan
+    en tablas ya creadas (create_all no modifica tablas existentes). Solo
+    columnas aditivas: nullable o con server_default. Devuelve "tabla.columna".
+    """
+    inspector = inspect(conn)
+    preparer = conn.dialect.identifier_preparer
+    added = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                raise RuntimeError(f"Column {table.name}.{column.name} needs a server_default to be added")
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}"))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def add_missing_indexes(conn) -> list:
+    """
+    CREATE INDEX para los índices del modelo (p. ej. los del keyset del
+    timeline) que falten en tablas ya creadas. Devuelve sus nombres.
+    """
+    inspector = inspect(conn)
+    added = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn, checkfirst=True)
+                added.append(index.name)
+    return added
+
+
+def add_missing_enum_values(conn) -> list:
+    """
+    ALTER TYPE ... ADD VALUE para los valores nuevos de los enums del modelo
+    (p. ej. `BulkJobStatus.FAILED`): en PostgreSQL son tipos nativos y
+    create_all no los modifica. Devuelve "tipo.valor".
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+    existing = {}
+    for row in conn.execute(text(
+        "SELECT t.typname, e.enumlabel FROM pg_type t JOIN pg_enum e ON e.enumtypid = t.oid"
+    )):
+        existing.setdefault(row.typname, set()).add(row.enumlabel)
+    preparer = conn.dialect.identifier_preparer
+    added = []
+    for table in SQLModel.metadata.sorted_tables:
+        for column in table.columns:
+            enum_type = column.type
+            if not isinstance(enum_type, Enum) or enum_type.name not in existing:
+                continue
+            for label in enum_type.enums:
+                if label in existing[enum_type.name]:
+                    continue
+                conn.execute(text(f"ALTER TYPE {preparer.quote(enum_type.name)} ADD VALUE IF NOT EXISTS '{label}'"))
+                existing[enum_type.name].add(label)
+                added.append(f"{enum_type.name}.{label}")
+    return added
+
+
+async def bootstrap(engine: AsyncEngine, admin_email: str = None, admin_password: str = None) -> bool:
+    """
+    Crea el esquema y, si `admin_email` no es None, el administrador.
+    Devuelve True si el administrador se creó en esta ejecución.
+    """
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # El DDL de PostgreSQL es transaccional: el lock dura hasta el commit
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": BOOTSTRAP_LOCK_ID})
+            # observation y caseaudit se crean particionadas por mes (partitions.py)
+            tables = [table for table in SQLModel.metadata.sorted_tables if table.name not in PARTITIONED]
+            await conn.run_sync(SQLModel.metadata.create_all, tables=tables)
+            await create_partitioned_tables(conn)
+            await ensure_partitions(conn)
+        else:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        added = await conn.run_sync(add_missing_columns)
+        if "caseaudit.recorded_at" in added:
+            # Auditorías anteriores a la columna: llegaron con su propio cambio
+            await conn.execute(text('UPDATE caseaudit SET recorded_at = "timestamp"'))
+        # Después del relleno: el índice de recorded_at se crea ya con los valores
+        await conn.run_sync(add_missing_indexes)
+        await conn.run_sync(add_missing_enum_values)
+
+        if admin_email is None:
+            return False
+        insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+        stmt = (
+            insert(User)
+            .values(
+                nombre="Admin",
+                email=admin_email,
+                hashed_password=get_password_hash(admin_password),
+                rol=UserRole.ADMIN,
+                is_active=True,
+            )
+            .on_conflict_do_nothing(index_elements=[User.email])
+        )
+        result = await conn.execute(stmt)
+        return result.rowcount == 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Crea el esquema y el administrador inicial")
+    parser.add_argument("--admin-email", default=os.getenv("ADMIN_EMAIL", DEFAULT_ADMIN_EMAIL))
+    parser.add_argument("--admin-password", default=os.getenv("ADMIN_PASSWORD", DEFAULT_ADMIN_PASSWORD))
+    parser.add_argument("--skip-admin", action="store_true", help="Solo crea las tablas")
+    return parser
+
+
+async def main(args):
+    start = time.perf_counter()
+    created = await bootstrap(
+        engine,
+        admin_email=None if args.skip_admin else args.admin_email,
+        admin_password=args.admin_password,
+    )
+    await engine.dispose()
+    print(f"Esquema listo en {time.perf_counter() - start:.2f}s")
+    if created:
+        print(f"Admin user created: {args.admin_email}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
@@ -0,0 +1,242 @@
+"""
+Generador de datos sintéticos a escala de producción.
+
+Llena la base de datos (DATABASE_URL) con usuarios, casos, observaciones,
+auditorías y adjuntos con distribuciones realistas: prioridades sesgadas,
+casos de larga duración con muchas observaciones y unos pocos usuarios que
+concentran la mayoría de los comentarios.
+
+    DATABASE_URL=sqlite+aiosqlite:///./load.db python generate_dataset.py --cases 50000
+
+Los adjuntos solo se crean como filas; no se escriben archivos en uploads/.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_password_hash
+from app.database import engine
+from app.models import Attachment, Case, CaseAudit, CaseAuditType, CaseStatus, Observation, Priority, User, UserRole
+from bootstrap import bootstrap
+from partitions import ensure_partitions
+
+LOADTEST_PASSWORD = "loadtest123"
+
+PRIORITY_WEIGHTS = {Priority.CRITICO: 5, Priority.ALTO: 15, Priority.MEDIO: 50, Priority.BAJO: 30}
+STATUS_WEIGHTS = {CaseStatus.CERRADO: 60, CaseStatus.ABIERTO: 20, CaseStatus.EN_MONITOREO: 10, CaseStatus.STANDBY: 10}
+ROLE_WEIGHTS = {UserRole.ADMIN: 5, UserRole.INGRESO: 35, UserRole.CONSULTA: 60}
+SERVICES = [
+    "Core Bancario", "Banca Móvil", "Banca Web", "Pagos", "Tarjetas", "ATM",
+    "Cash Management", "Transferencias", "Onboarding", "Notificaciones", "API Gateway", "Datawarehouse",
+]
+CONTENT_TYPES = ["application/pdf", "image/png", "image/jpeg", "text/plain", "application/vnd.ms-excel"]
+WORDS = (
+    "se revisa incidencia con proveedor servicio degradado reinicio de nodo latencia alta "
+    "pendiente confirmación cliente escalado a nivel dos monitoreo continuo sin novedades "
+    "ventana de mantenimiento rollback aplicado parche validado en producción"
+).split()
+
+
+def _weighted(weights: Dict):
+    return list(weights), list(weights.values())
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _author_weights(count: int, skew: float) -> List[float]:
+    """Pesos tipo Zipf: el autor de rango r comenta ~1/r^skew."""
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+async def _insert_returning_ids(session: AsyncSession, model, rows: List[dict], batch_size: int) -> List[int]:
+    ids = []
+    for start in range(0, len(rows), batch_size):
+        result = await session.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            rows[start:start + batch_size],
+        )
+        ids.extend(result.scalars().all())
+    return ids
+
+
+async def _insert(session: AsyncSession, model, rows: List[dict], batch_size: int):
+    for start in range(0, len(rows), batch_size):
+        await session.execute(insert(model), rows[start:start + batch_size])
+
+
+def _case_rows(rng: random.Random, args, writer_ids: List[int], now: datetime) -> List[dict]:
+    priorities, priority_weights = _weighted(PRIORITY_WEIGHTS)
+    statuses, status_weights = _weighted(STATUS_WEIGHTS)
+    responsables = [f"Analista {i}" for i in range(1, 31)]
+    rows = []
+    for i in range(args.cases):
+        created_at = now - timedelta(days=rng.uniform(0, args.days))
+        estado = rng.choices(statuses, status_weights)[0]
+        # Casos de larga duración: una minoría sigue viva durante meses
+        if rng.random() < args.long_lived_ratio:
+            lifetime = timedelta(days=rng.uniform(90, args.days))
+        else:
+            lifetime = timedelta(hours=rng.lognormvariate(3, 1.2))
+        fecha_fin = min(created_at + lifetime, now) if estado == CaseStatus.CERRADO else None
+        rows.append({
+            "codigo": f"{args.prefix}-{i:07d}",
+            "fecha_inicio": created_at,
+            "fecha_fin": fecha_fin,
+            "estado": estado,
+            "sby_responsable": rng.choice(responsables),
+            "servicio_o_plataforma": rng.choice(SERVICES),
+            "prioridad": rng.choices(priorities, priority_weights)[0],
+            "novedades_y_comentarios": _text(rng, rng.randint(5, 40)),
+            "observaciones": None,
+            "creado_por_id": rng.choice(writer_ids),
+            "created_at": created_at,
+            "updated_at": fecha_fin or min(created_at + lifetime, now),
+        })
+    return rows
+
+
+async def generate(session: AsyncSession, args) -> Dict[str, int]:
+    """Inserta el dataset y devuelve cuántas filas se crearon por tabla."""
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+
+    # Usuarios (un único hash: bcrypt es lento a propósito)
+    hashed_password = get_password_hash(LOADTEST_PASSWORD)
+    roles, role_weights = _weighted(ROLE_WEIGHTS)
+    user_rows = [
+        {
+            "nombre": f"Usuario Carga {i}",
+            "email": f"{args.prefix.lower()}-user{i}@loadtest.local",
+            "hashed_password": hashed_password,
+            "rol": UserRole.ADMIN if i == 0 else rng.choices(roles, role_weights)[0],
+            "is_active": True,
+        }
+        for i in range(args.users)
+    ]
+    user_ids = await _insert_returning_ids(session, User, user_rows, args.batch_size)
+    writer_ids = [uid for uid, row in zip(user_ids, user_rows) if row["rol"] != UserRole.CONSULTA]
+    # Comentaristas intensivos: orden aleatorio, pesos muy sesgados
+    commenters = rng.sample(writer_ids, len(writer_ids))
+    commenter_weights = _author_weights(len(commenters), args.commenter_skew)
+
+    case_rows = _case_rows(rng, args, writer_ids, now)
+    case_ids = await _insert_returning_ids(session, Case, case_rows, args.batch_size)
+
+    observations, audits, attachments = [], [], []
+    counts = {"user": len(user_ids), "case": len(case_ids), "observation": 0, "caseaudit": 0, "attachment": 0}
+
+    async def flush():
+        await _insert(session, Observation, observations, args.batch_size)
+        await _insert(session, CaseAudit, audits, args.batch_size)
+        await _insert(session, Attachment, attachments, args.batch_size)
+        counts["observation"] += len(observations)
+        counts["caseaudit"] += len(audits)
+        counts["attachment"] += len(attachments)
+        observations.clear()
+        audits.clear()
+        attachments.clear()
+
+    for case_id, case in zip(case_ids, case_rows):
+        start = case["created_at"]
+        end = case["fecha_fin"] or now
+        span = max((end - start).total_seconds(), 60)
+        # Cola larga: la mayoría tiene pocas observaciones, algunos cientos
+        n_observations = min(int(rng.paretovariate(1.5) * args.observations_per_case / 3), args.max_observations)
+        n_audits = max(1, int(rng.expovariate(1 / args.audits_per_case)))
+
+        audits.append({
+            "case_id": case_id,
+            "user_id": case["creado_por_id"],
+            "action": CaseAuditType.CREATE,
+            "details": {"codigo": case["codigo"]},
+            "timestamp": start,
+        })
+        for _ in range(n_observations):
+            author = rng.choices(commenters, commenter_weights)[0]
+            created_at = start + timedelta(seconds=rng.uniform(0, span))
+            observations.append({
+                "case_id": case_id,
+                "content": _text(rng, rng.randint(3, 60)),
+                "created_at": created_at,
+                "created_by_id": author,
+            })
+            audits.append({
+                "case_id": case_id,
+                "user_id": author,
+                "action": CaseAuditType.COMMENT,
+                "details": {},
+                "timestamp": created_at,
+            })
+        for _ in range(n_audits - 1):
+            new_priority = rng.choice(list(Priority)).value
+            audits.append({
+                "case_id": case_id,
+                "user_id": rng.choice(writer_ids),
+                "action": CaseAuditType.UPDATE,
+                "details": {"prioridad": {"old": case["prioridad"].value, "new": new_priority}},
+                "timestamp": start + timedelta(seconds=rng.uniform(0, span)),
+            })
+        if rng.random() < args.attachment_ratio:
+            for _ in range(rng.randint(1, 4)):
+                content_type = rng.choice(CONTENT_TYPES)
+                filename = f"evidencia-{case_id}-{rng.randint(1, 10**6)}.{content_type.rsplit('/', 1)[-1]}"
+                attachments.append({
+                    "filename": filename,
+                    "file_path": f"uploads/synthetic/{filename}",
+                    "file_size": int(rng.lognormvariate(11, 1.5)),
+                    "content_type": content_type,
+                    "case_id": case_id,
+                    "uploaded_at": start + timedelta(seconds=rng.uniform(0, span)),
+                })
+
+        if len(observations) + len(audits) >= args.batch_size * 10:
+            await flush()
+
+    await flush()
+    await session.commit()
+    return counts
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Genera un dataset sintético en DATABASE_URL")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--cases", type=int, default=10_000)
+    parser.add_argument("--observations-per-case", type=float, default=8, help="Media aproximada (distribución de Pareto)")
+    parser.add_argument("--max-observations", type=int, default=2_000, help="Tope de observaciones por caso")
+    parser.add_argument("--audits-per-case", type=float, default=4, help="Media de auditorías UPDATE por caso")
+    parser.add_argument("--attachment-ratio", type=float, default=0.2, help="Fracción de casos con adjuntos")
+    parser.add_argument("--long-lived-ratio", type=float, default=0.1, help="Fracción de casos abiertos durante meses")
+    parser.add_argument("--commenter-skew", type=float, default=1.2, help="Exponente Zipf de los comentaristas")
+    parser.add_argument("--days", type=int, default=730, help="Antigüedad máxima de los casos")
+    parser.add_argument("--prefix", default="SYN", help="Prefijo de códigos y emails (permite varias cargas)")
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+
+async def main(args):
+    # Mismo esquema que un despliegue: tablas particionadas y columnas nuevas
+    await bootstrap(engine)
+    if engine.dialect.name == "postgresql":
+        # El histórico generado va a sus meses, no a la partición DEFAULT
+        async with engine.begin() as conn:
+            await ensure_partitions(conn, since=(datetime.utcnow() - timedelta(days=args.days)).date())
+    start = time.perf_counter()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        counts = await generate(session, args)
+    elapsed = time.perf_counter() - start
+    for table, count in counts.items():
+        print(f"{table:12s} {count:>10,d}")
+    print(f"Dataset generado en {elapsed:.1f}s. Usuarios: {args.prefix.lower()}-user0@loadtest.local (ADMIN) / {LOADTEST_PASSWORD}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
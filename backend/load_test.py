@@ -0,0 +1,229 @@
+"""
+Prueba de carga con la mezcla de tráfico del frontend.
+
+Cada usuario virtual repite escenarios elegidos por peso, con una pausa
+entre ellos como la de un operador real:
+
+- dashboard: listado paginado con filtros + /stats (auto-refresh cada 30s)
+- timeline: detalle de un caso y sondeo incremental del timeline (cada 10s)
+- bulk: cierre o cambio de prioridad masivo de una selección del listado
+- import: importación de un Excel pequeño
+
+    python load_test.py --base-url http://localhost:8000 --users 50 --duration 120 \\
+        --email syn-user0@loadtest.local --password loadtest123
+
+Al terminar imprime throughput y p50/p95/p99 por endpoint (y opcionalmente
+los escribe en JSON con --json). Pensado para usarse tras generate_dataset.py.
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.models import CaseStatus, Priority
+
+SCENARIO_WEIGHTS = {"dashboard": 60, "timeline": 30, "bulk": 5, "import": 1}
+PAGE_SIZE = 100
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano (valores ya ordenados)."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[rank]
+
+
+class Stats:
+    """Latencias y errores por endpoint (método + plantilla de ruta)."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, latency: float, ok: bool):
+        self.latencies[name].append(latency)
+        if not ok:
+            self.errors[name] += 1
+
+    def report(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            report[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1),
+            }
+        return report
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, stats: Stats, rng: random.Random, args):
+        self.client = client
+        self.stats = stats
+        self.rng = rng
+        self.args = args
+        self.case_ids: List[int] = []
+        self.timeline_cursors: Dict[int, Optional[str]] = {}
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(name, time.perf_counter() - start, ok=False)
+            return None
+        self.stats.record(name, time.perf_counter() - start, ok=response.status_code < 400)
+        return response
+
+    async def dashboard(self):
+        params = {"skip": 0, "limit": PAGE_SIZE, "timezone_offset": 300}
+        roll = self.rng.random()
+        if roll < 0.3:
+            params["status"] = self.rng.choice(list(CaseStatus)).value
+        elif roll < 0.5:
+            params["priority"] = self.rng.choice(list(Priority)).value
+        elif roll < 0.6:
+            params["search"] = self.rng.choice(["SYN-00", "Pagos", "latencia"])
+        if self.rng.random() < 0.2:
+            params["skip"] = PAGE_SIZE * self.rng.randint(1, 5)
+
+        response = await self.request("GET /cases/", "GET", "/cases/", params=params)
+        if response is not None and response.status_code == 200:
+            self.case_ids = [case["id"] for case in response.json()["items"]] or self.case_ids
+        await self.request("GET /stats/", "GET", "/stats/")
+
+    async def timeline(self):
+        if not self.case_ids:
+            await self.dashboard()
+            return
+        case_id = self.rng.choice(self.case_ids)
+        if case_id not in self.timeline_cursors:
+            await self.request("GET /cases/{case_id}", "GET", f"/cases/{case_id}")
+        params = {"limit": 500}
+        if self.timeline_cursors.get(case_id):
+            params["after"] = self.timeline_cursors[case_id]
+        response = await self.request("GET /cases/{case_id}/timeline", "GET", f"/cases/{case_id}/timeline", params=params)
+        if response is not None and response.status_code == 200:
+            self.timeline_cursors[case_id] = response.json().get("cursor") or self.timeline_cursors.get(case_id)
+
+    async def bulk(self):
+        if not self.case_ids:
+            await self.dashboard()
+            return
+        ids = self.rng.sample(self.case_ids, min(len(self.case_ids), self.rng.randint(5, 50)))
+        action, value = self.rng.choice([("CLOSE", CaseStatus.CERRADO.value), ("PRIORITY", Priority.ALTO.value)])
+        await self.request(
+            "POST /cases/bulk-update", "POST", "/cases/bulk-update",
+            json={"ids": ids, "action": action, "value": value},
+        )
+
+    async def import_cases(self):
+        await self.request(
+            "POST /cases-io/import", "POST", "/cases-io/import",
+            files={"file": ("load_test.xlsx", _import_file(self.rng), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+        )
+
+    async def run(self, deadline: float):
+        scenarios = {"dashboard": self.dashboard, "timeline": self.timeline, "bulk": self.bulk, "import": self.import_cases}
+        names, weights = list(self.args.weights), list(self.args.weights.values())
+        # Arranque escalonado para no sincronizar a todos los usuarios
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp_up))
+        while time.monotonic() < deadline:
+            await scenarios[self.rng.choices(names, weights)[0]]()
+            await asyncio.sleep(self.rng.uniform(*self.args.think_time))
+
+
+def _import_file(rng: random.Random) -> bytes:
+    import pandas as pd
+
+    batch = uuid.uuid4().hex[:8]
+    df = pd.DataFrame([
+        {
+            "codigo": f"LT-{batch}-{i}",
+            "servicio_o_plataforma": "Load Test",
+            "prioridad": rng.choice(list(Priority)).value,
+            "estado": CaseStatus.ABIERTO.value,
+            "novedades_y_comentarios": "Caso creado por la prueba de carga",
+        }
+        for i in range(rng.randint(5, 30))
+    ])
+    stream = io.BytesIO()
+    df.to_excel(stream, index=False)
+    return stream.getvalue()
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str):
+    response = await client.post("/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+
+async def main(args) -> Dict[str, Dict[str, float]]:
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        await login(client, args.email, args.password)
+        deadline = time.monotonic() + args.duration
+        users = [VirtualUser(client, stats, random.Random(args.seed + i), args) for i in range(args.users)]
+        start = time.perf_counter()
+        await asyncio.gather(*(user.run(deadline) for user in users))
+        elapsed = time.perf_counter() - start
+
+    report = stats.report(elapsed)
+    total = sum(row["requests"] for row in report.values())
+    print(f"{'endpoint':36s} {'reqs':>7s} {'err':>5s} {'rps':>7s} {'p50':>8s} {'p95':>8s} {'p99':>8s}")
+    for name, row in report.items():
+        print(
+            f"{name:36s} {row['requests']:7d} {row['errors']:5d} {row['rps']:7.1f} "
+            f"{row['p50_ms']:7.1f}ms {row['p95_ms']:7.1f}ms {row['p99_ms']:7.1f}ms"
+        )
+    print(f"Total: {total} requests en {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"elapsed_s": round(elapsed, 2), "endpoints": report}, output, indent=2)
+    return report
+
+
+def _weights(value: str) -> Dict[str, int]:
+    """'dashboard=60,timeline=30' -> {...}; los escenarios omitidos conservan su peso."""
+    weights = dict(SCENARIO_WEIGHTS)
+    for item in filter(None, value.split(",")):
+        name, weight = item.split("=")
+        if name not in SCENARIO_WEIGHTS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        weights[name] = int(weight)
+    return weights
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Prueba de carga con la mezcla de tráfico del frontend")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="syn-user0@loadtest.local", help="Usuario ADMIN o INGRESO")
+    parser.add_argument("--password", default="loadtest123")
+    parser.add_argument("--users", type=int, default=20, help="Usuarios virtuales concurrentes")
+    parser.add_argument("--duration", type=float, default=60, help="Segundos de prueba")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Segundos para arrancar todos los usuarios")
+    parser.add_argument("--think-time", type=float, nargs=2, default=(0.5, 2.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--weights", type=_weights, default=dict(SCENARIO_WEIGHTS), help="p. ej. dashboard=60,timeline=30,bulk=5,import=0")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Escribe el informe en este archivo")
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
@@ -0,0 +1,285 @@
+"""
+Particionado mensual por rango (PostgreSQL) de `observation` (created_at) y
+`caseaudit` (timestamp), las dos tablas que solo crecen.
+
+Los modelos no cambian: el ORM sigue usando `id` como identidad, mientras
+que en la base la clave primaria es (id, fecha) porque PostgreSQL exige que
+incluya la clave de partición. Las consultas acotadas por fecha (p. ej. las
+observaciones del timeline incremental con cursor) solo recorren los meses
+pedidos.
+
+    python partitions.py ensure                    # meses futuros (cron mensual)
+    python partitions.py convert                   # tablas existentes sin particionar
+    python partitions.py detach --before 2023-01 --archive-schema archive
+    python partitions.py detach --before 2023-01 --drop
+
+bootstrap.py crea las tablas ya particionadas en bases nuevas y asegura los
+meses futuros en cada despliegue. Las filas fuera de los meses creados (p.
+ej. importaciones históricas) caen en la partición `<tabla>_default` y se
+mueven a su mes cuando este se crea.
+"""
+import argparse
+import asyncio
+import os
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import Enum, MetaData, PrimaryKeyConstraint, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401  (registra las tablas en SQLModel.metadata)
+
+# Tabla -> columna de partición
+PARTITIONED: Dict[str, str] = {"observation": "created_at", "caseaudit": "timestamp"}
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# Misma clave que bootstrap.py: no corren a la vez
+PARTITION_LOCK_ID = 7_130_001
+
+_PARTITION_SUFFIX = re.compile(r"_(\d{4})_(\d{2})$")
+_preparer = postgresql.dialect().identifier_preparer
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def default_partition(table: str) -> str:
+    return f"{table}_default"
+
+
+def partitioned_table_ddl(name: str) -> List[str]:
+    """
+    DDL de la tabla padre particionada, generada desde el modelo: misma
+    definición de columnas, FKs e índices (se propagan a cada partición),
+    PK (id, clave) y la partición por defecto.
+    """
+    key = PARTITIONED[name]
+    metadata = MetaData()
+    for table in SQLModel.metadata.sorted_tables:
+        table.to_metadata(metadata)
+    table = metadata.tables[name]
+    # Con PK compuesta SQLAlchemy ya no asume SERIAL para `id`
+    table.c.id.autoincrement = True
+    table.c[key].primary_key = True
+    table.append_constraint(PrimaryKeyConstraint(table.c.id, table.c[key], name=f"{name}_pkey"))
+    table.dialect_options["postgresql"]["partition_by"] = f"RANGE ({_preparer.quote(key)})"
+
+    dialect = postgresql.dialect()
+    statements = [str(CreateTable(table).compile(dialect=dialect)).strip()]
+    statements += [str(CreateIndex(index).compile(dialect=dialect)) for index in table.indexes]
+    statements.append(f"CREATE TABLE {default_partition(name)} PARTITION OF {name} DEFAULT")
+    return statements
+
+
+async def _lock(conn: AsyncConnection):
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID})
+
+
+async def is_partitioned(conn: AsyncConnection, name: str) -> bool:
+    return (await conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :name)"
+    ), {"name": name})).scalar()
+
+
+async def list_partitions(conn: AsyncConnection, name: str) -> List[str]:
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :name ORDER BY c.relname"
+    ), {"name": name})
+    return list(result.scalars())
+
+
+async def create_partitioned_tables(conn: AsyncConnection) -> List[str]:
+    """
+    Crea como particionadas las tablas que todavía no existen. Va después
+    de crear las tablas a las que apuntan sus FKs (case, user).
+    """
+    existing = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+    created = []
+    for name in PARTITIONED:
+        if name in existing:
+            continue
+        await conn.run_sync(_create_enum_types, name)
+        for statement in partitioned_table_ddl(name):
+            await conn.execute(text(statement))
+        created.append(name)
+    return created
+
+
+def _create_enum_types(sync_conn, name: str):
+    # create_all los crea junto con la tabla; aquí el DDL es propio
+    for column in SQLModel.metadata.tables[name].columns:
+        if isinstance(column.type, Enum):
+            column.type.create(sync_conn, checkfirst=True)
+
+
+async def _create_partition(conn: AsyncConnection, name: str, month: date) -> str:
+    key = _preparer.quote(PARTITIONED[name])
+    partition = partition_name(name, month)
+    bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    in_range = f"{key} >= :lower AND {key} < :upper"
+    params = {"lower": datetime.combine(month, datetime.min.time()),
+              "upper": datetime.combine(add_months(month, 1), datetime.min.time())}
+
+    has_rows = (await conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default_partition(name)} WHERE {in_range})"), params
+    )).scalar()
+    if not has_rows:
+        await conn.execute(text(f"CREATE TABLE {partition} PARTITION OF {name} FOR VALUES {bounds}"))
+        return partition
+
+    # El mes tiene filas en la partición por defecto: se mueven antes de adjuntarla
+    await conn.execute(text(f"CREATE TABLE {partition} (LIKE {name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {default_partition(name)} WHERE {in_range} RETURNING *) "
+        f"INSERT INTO {partition} SELECT * FROM moved"
+    ), params)
+    await conn.execute(text(f"ALTER TABLE {name} ATTACH PARTITION {partition} FOR VALUES {bounds}"))
+    return partition
+
+
+async def ensure_partitions(
+    conn: AsyncConnection,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    since: Optional[date] = None,
+    today: Optional[date] = None,
+) -> List[str]:
+    """
+    Crea las particiones mensuales que falten desde `since` (por defecto el
+    mes actual) hasta `months_ahead` meses después del actual. Solo toca
+    tablas que ya estén particionadas. Devuelve las particiones creadas.
+    """
+    current = month_start(today or datetime.utcnow())
+    first = month_start(since) if since else current
+    last = add_months(current, months_ahead)
+    created = []
+    for name in PARTITIONED:
+        if not await is_partitioned(conn, name):
+            continue
+        existing = set(await list_partitions(conn, name))
+        month = first
+        while month <= last:
+            if partition_name(name, month) not in existing:
+                created.append(await _create_partition(conn, name, month))
+            month = add_months(month, 1)
+    return created
+
+
+async def convert_table(conn: AsyncConnection, name: str, months_ahead: int = PARTITION_MONTHS_AHEAD, keep_legacy: bool = False) -> bool:
+    """
+    Convierte una tabla existente en particionada: la renombra a
+    `<tabla>_legacy`, crea la nueva, sus meses desde el dato más antiguo y
+    copia las filas conservando los ids. Devuelve False si ya lo estaba.
+    """
+    if await is_partitioned(conn, name):
+        return False
+    key = _preparer.quote(PARTITIONED[name])
+    legacy = f"{name}_legacy"
+    sequence = (await conn.execute(text("SELECT pg_get_serial_sequence(:name, 'id')"), {"name": name})).scalar()
+
+    await conn.execute(text(f"ALTER TABLE {name} RENAME TO {legacy}"))
+    await conn.execute(text(f"ALTER TABLE {legacy} RENAME CONSTRAINT {name}_pkey TO {legacy}_pkey"))
+    if sequence:
+        await conn.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {legacy}_id_seq"))
+
+    for statement in partitioned_table_ddl(name):
+        await conn.execute(text(statement))
+    oldest = (await conn.execute(text(f"SELECT min({key}) FROM {legacy}"))).scalar()
+    await ensure_partitions(conn, months_ahead, since=oldest)
+
+    columns = ", ".join(_preparer.quote(column.name) for column in SQLModel.metadata.tables[name].columns)
+    await conn.execute(text(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {legacy}"))
+    await conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), COALESCE(max(id), 0) + 1, false) FROM {name}"
+    ))
+    if not keep_legacy:
+        await conn.execute(text(f"DROP TABLE {legacy}"))
+    return True
+
+
+async def detach_partitions(
+    conn: AsyncConnection,
+    before: date,
+    archive_schema: Optional[str] = None,
+    drop: bool = False,
+) -> List[str]:
+    """
+    Separa las particiones de meses anteriores a `before`: quedan como
+    tablas sueltas (consultables, fuera de los timelines), se mueven a
+    `archive_schema` o se eliminan con `drop`.
+    """
+    cutoff = month_start(before)
+    detached = []
+    if archive_schema:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {_preparer.quote(archive_schema)}"))
+    for name in PARTITIONED:
+        if not await is_partitioned(conn, name):
+            continue
+        for partition in await list_partitions(conn, name):
+            match = _PARTITION_SUFFIX.search(partition)
+            if not match or date(int(match[1]), int(match[2]), 1) >= cutoff:
+                continue
+            await conn.execute(text(f"ALTER TABLE {name} DETACH PARTITION {partition}"))
+            if drop:
+                await conn.execute(text(f"DROP TABLE {partition}"))
+            elif archive_schema:
+                await conn.execute(text(f"ALTER TABLE {partition} SET SCHEMA {_preparer.quote(archive_schema)}"))
+            detached.append(partition)
+    return detached
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Particiones mensuales de observation y caseaudit (PostgreSQL)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ensure = commands.add_parser("ensure", help="Crea los meses futuros que falten")
+    ensure.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+
+    convert = commands.add_parser("convert", help="Particiona tablas existentes (copia los datos)")
+    convert.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    convert.add_argument("--keep-legacy", action="store_true", help="Conserva <tabla>_legacy tras copiar")
+
+    detach = commands.add_parser("detach", help="Separa los meses anteriores a --before")
+    detach.add_argument("--before", required=True, type=lambda value: datetime.strptime(value, "%Y-%m").date(),
+                        help="Primer mes que se conserva (YYYY-MM)")
+    action = detach.add_mutually_exclusive_group()
+    action.add_argument("--archive-schema", help="Mueve las particiones separadas a este esquema")
+    action.add_argument("--drop", action="store_true", help="Elimina las particiones separadas")
+    return parser
+
+
+async def main(args):
+    from app.database import engine
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("El particionado solo aplica a PostgreSQL")
+    async with engine.begin() as conn:
+        await _lock(conn)
+        if args.command == "ensure":
+            result = await ensure_partitions(conn, args.months_ahead)
+        elif args.command == "convert":
+            result = [name for name in PARTITIONED if await convert_table(conn, name, args.months_ahead, args.keep_legacy)]
+        else:
+            result = await detach_partitions(conn, args.before, args.archive_schema, args.drop)
+    await engine.dispose()
+    print(f"{args.command}: {', '.join(result) if result else 'nada que hacer'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
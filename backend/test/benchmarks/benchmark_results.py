@@ -0,0 +1,99 @@
+"""
+Resultados de benchmarks en JSON y comparación contra una línea base.
+
+    python backend/test/benchmarks/benchmark_results.py base.json actual.json --threshold 20
+
+Sale con código 1 si algún benchmark empeora su mediana (o RSS) más del umbral.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Mediana, p95, mínimo y media en milisegundos."""
+    samples = sorted(samples)
+    p95 = samples[max(0, -(-len(samples) * 95 // 100) - 1)]
+    return {
+        "rounds": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "min_ms": round(samples[0] * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def write_results(path: str, results: Dict[str, Dict[str, float]], database: str):
+    with open(path, "w") as output:
+        json.dump({
+            "commit": _commit(),
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "database": database,
+            "benchmarks": dict(sorted(results.items())),
+        }, output, indent=2)
+
+
+# Métricas comparadas, si el resultado las incluye
+METRICS = ("median_ms", "rss_mb")
+
+
+def compare(baseline: Dict, current: Dict, threshold_pct: float) -> List[Tuple[str, float, float, float]]:
+    """
+    Benchmarks cuya mediana (o RSS) empeora más de `threshold_pct` por
+    ciento. Devuelve (nombre, base, actual, cambio_pct); los benchmarks que
+    solo están en uno de los dos archivos se ignoran.
+    """
+    regressions = []
+    base_benchmarks = baseline.get("benchmarks", {})
+    for name, result in current.get("benchmarks", {}).items():
+        base = base_benchmarks.get(name) or {}
+        for metric in METRICS:
+            if metric not in result or not base.get(metric):
+                continue
+            change = (result[metric] - base[metric]) / base[metric] * 100
+            if change > threshold_pct:
+                label = name if metric == "median_ms" else f"{name} ({metric})"
+                regressions.append((label, base[metric], result[metric], round(change, 1)))
+    return regressions
+
+
+def format_regressions(regressions, threshold_pct: float) -> str:
+    lines = [f"Regresiones de rendimiento (> {threshold_pct:g}%):"]
+    for name, base, current, change in regressions:
+        lines.append(f"  {name:<60} {base:10.2f} -> {current:10.2f}  (+{change}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compara resultados de benchmarks")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=20, help="Porcentaje máximo de empeoramiento")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as base_file, open(args.current) as current_file:
+        regressions = compare(json.load(base_file), json.load(current_file), args.threshold)
+    if regressions:
+        print(format_regressions(regressions, args.threshold))
+        return 1
+    print("Sin regresiones.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Fixtures de los benchmarks: dataset sintético por tamaño, medición de
+rondas y volcado de resultados a JSON con control de regresiones.
+
+    RUN_BENCHMARKS=1 BENCH_SIZES=1000,10000 BENCH_OUTPUT=bench.json \\
+        BENCH_BASELINE=base.json BENCH_THRESHOLD=20 pytest backend/test/benchmarks
+
+Con TEST_DATABASE_URL apuntando a un PostgreSQL local se mide contra Postgres.
+"""
+import json
+import os
+import time
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession as SQLModelAsyncSession
+
+from app.database import get_session
+from app.main import app
+from benchmark_results import compare, format_regressions, summarize, write_results
+from generate_dataset import build_parser, generate
+
+BENCH_SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "1000,10000").split(",")]
+BENCH_ROUNDS = int(os.getenv("BENCH_ROUNDS", "10"))
+BENCH_OUTPUT = os.getenv("BENCH_OUTPUT", "benchmark-results.json")
+BENCH_BASELINE = os.getenv("BENCH_BASELINE")
+BENCH_THRESHOLD = float(os.getenv("BENCH_THRESHOLD", "20"))
+
+_results = {}
+_database = {"dialect": None}
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def sqlmodel_session(db_connection, override_get_db):
+    """Los endpoints reciben la sesión de SQLModel, como en producción."""
+    factory = async_sessionmaker(
+        bind=db_connection,
+        class_=SQLModelAsyncSession,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+
+    async def _override():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _override
+    _database["dialect"] = db_connection.dialect.name
+    yield
+
+
+@pytest_asyncio.fixture(params=BENCH_SIZES, ids=lambda size: f"n={size}")
+async def dataset(request, db_session):
+    """Dataset sintético con `size` casos (ver generate_dataset.py)."""
+    size = request.param
+    args = build_parser().parse_args(["--cases", str(size), "--users", "20", "--prefix", "BENCH"])
+    counts = await generate(db_session, args)
+    return {"size": size, **counts}
+
+
+@pytest.fixture
+def bench():
+    """
+    Mide `func` durante `rounds` rondas y guarda el resumen con `name`.
+    `setup` corre antes de cada ronda, fuera del tiempo medido.
+    """
+    async def _run(name: str, func, rounds: int = BENCH_ROUNDS, setup=None):
+        samples = []
+        for round_number in range(rounds):
+            if setup is not None:
+                await setup(round_number)
+            start = time.perf_counter()
+            await func(round_number)
+            samples.append(time.perf_counter() - start)
+        _results[name] = summarize(samples)
+        print(f"\n{name:<60} mediana={_results[name]['median_ms']:10.2f} ms  p95={_results[name]['p95_ms']:10.2f} ms")
+        return _results[name]
+
+    return _run
+
+
+@pytest.fixture
+def bench_record():
+    """Guarda un resultado medido fuera de `bench` (p. ej. en un subproceso)."""
+    def _record(name: str, result: dict):
+        _results[name] = result
+        print(f"\n{name:<60} {result}")
+        return result
+
+    return _record
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    write_results(BENCH_OUTPUT, _results, database=_database["dialect"] or "unknown")
+    reporter = session.config.pluginmanager.get_plugin("terminalreporter")
+    reporter.write_line(f"Resultados de benchmarks en {BENCH_OUTPUT}")
+
+    if not BENCH_BASELINE:
+        return
+    with open(BENCH_BASELINE) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(baseline, {"benchmarks": _results}, BENCH_THRESHOLD)
+    if regressions:
+        reporter.write_line(format_regressions(regressions, BENCH_THRESHOLD), red=True)
+        session.exitstatus = 1
+    else:
+        reporter.write_line(f"Sin regresiones frente a {BENCH_BASELINE} (umbral {BENCH_THRESHOLD:g}%)")
@@ -0,0 +1,69 @@
+"""
+Benchmark de la auditoría: escritura en la transacción de la request (modo
+estricto) frente al buffer write-behind, en PATCH y en un cierre masivo.
+El flush del buffer se mide aparte: es trabajo que sale de la request.
+
+No corre por defecto: RUN_BENCHMARKS=1 pytest backend/test/benchmarks -s
+"""
+import os
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+
+from app.audit import start_audit_buffer, stop_audit_buffer
+from app.models import Case, CaseStatus
+from app.routers import cases as cases_router
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") != "1", reason="RUN_BENCHMARKS=1 para ejecutar"),
+]
+
+PRIORITIES = ["ALTO", "BAJO"]
+
+
+@pytest.mark.asyncio
+async def test_audit_write_modes(
+    bench,
+    client: AsyncClient,
+    admin_headers: dict,
+    dataset,
+    db_session,
+    session_factory,
+    tmp_path,
+    monkeypatch
+):
+    monkeypatch.setattr(cases_router, "BULK_ASYNC_THRESHOLD", dataset["size"] + 1)
+    ids = list((await db_session.execute(select(Case.id).order_by(Case.id).limit(1000))).scalars())
+    case_id = ids[0]
+
+    async def patch(round_number):
+        await client.patch(
+            f"/cases/{case_id}",
+            json={"prioridad": PRIORITIES[round_number % 2]},
+            headers=admin_headers,
+        )
+
+    async def reopen(_round):
+        await db_session.execute(update(Case).where(Case.id.in_(ids)).values(estado=CaseStatus.ABIERTO))
+        await db_session.commit()
+
+    async def bulk_close(_round):
+        await client.post(
+            "/cases/bulk-update",
+            json={"ids": ids, "action": "CLOSE", "value": ""},
+            headers=admin_headers,
+        )
+
+    size = dataset["size"]
+    await bench(f"audit_patch[estricto][n={size}]", patch)
+    await bench(f"audit_bulk_close[estricto][ids={len(ids)}][n={size}]", bulk_close, setup=reopen)
+
+    buffer = await start_audit_buffer(session_factory, flush_interval=3600, batch_size=10**9, spill_path=str(tmp_path / "spill.jsonl"))
+    try:
+        await bench(f"audit_patch[buffer][n={size}]", patch)
+        await bench(f"audit_bulk_close[buffer][ids={len(ids)}][n={size}]", bulk_close, setup=reopen)
+        await bench(f"audit_flush[filas={len(buffer)}][n={size}]", lambda _round: buffer.flush(), rounds=1)
+    finally:
+        await stop_audit_buffer()
@@ -0,0 +1,103 @@
+"""
+Benchmark de la actualización masiva set-based frente al bucle ORM anterior
+con 100, 10k y 100k ids.
+
+No corre por defecto: RUN_BENCHMARKS=1 pytest backend/test/benchmarks -s
+"""
+import os
+import time
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, insert
+from sqlmodel import select
+
+from app.models import Case, CaseAudit, CaseAuditType, CaseStatus, Priority, User
+from app.routers import cases as cases_router
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") != "1", reason="RUN_BENCHMARKS=1 para ejecutar"),
+]
+
+SIZES = [100, 10_000, 100_000]
+# El bucle ORM anterior es demasiado lento para medirlo con 100k filas
+LEGACY_MAX_SIZE = 10_000
+
+
+async def _seed_cases(session, user_id: int, size: int):
+    await session.execute(delete(CaseAudit))
+    await session.execute(delete(Case))
+    now = datetime.utcnow()
+    await session.execute(insert(Case), [
+        {
+            "codigo": f"BULK-{i:06d}",
+            "servicio_o_plataforma": "Benchmark",
+            "prioridad": Priority.MEDIO,
+            "estado": CaseStatus.ABIERTO,
+            "novedades_y_comentarios": "",
+            "creado_por_id": user_id,
+            "fecha_inicio": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(size)
+    ])
+    await session.commit()
+    return list((await session.execute(select(Case.id))).scalars())
+
+
+async def _legacy_bulk_close(session, ids, user_id: int):
+    """Implementación anterior: carga ORM y un CaseAudit por fila."""
+    cases = (await session.execute(select(Case).where(Case.id.in_(ids)))).scalars().all()
+    for case in cases:
+        if case.estado != CaseStatus.CERRADO:
+            old = case.estado
+            case.estado = CaseStatus.CERRADO
+            case.updated_at = datetime.utcnow()
+            session.add(case)
+            session.add(CaseAudit(
+                case_id=case.id,
+                user_id=user_id,
+                action=CaseAuditType.BULK_UPDATE,
+                details={"estado": {"old": old, "new": CaseStatus.CERRADO}},
+            ))
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_scaling(
+    client: AsyncClient,
+    db_session,
+    admin_user: User,
+    admin_headers: dict,
+    monkeypatch
+):
+    # Siempre síncrono: se mide el UPDATE, no el encolado del trabajo
+    monkeypatch.setattr(cases_router, "BULK_ASYNC_THRESHOLD", max(SIZES) + 1)
+    results = []
+    for size in SIZES:
+        ids = await _seed_cases(db_session, admin_user.id, size)
+        t0 = time.perf_counter()
+        response = await client.post(
+            "/cases/bulk-update",
+            json={"ids": ids, "action": "CLOSE", "value": ""},
+            headers=admin_headers,
+        )
+        set_based = time.perf_counter() - t0
+        assert response.json()["updated_count"] == size
+
+        legacy = None
+        if size <= LEGACY_MAX_SIZE:
+            ids = await _seed_cases(db_session, admin_user.id, size)
+            db_session.expunge_all()
+            t0 = time.perf_counter()
+            await _legacy_bulk_close(db_session, ids, admin_user.id)
+            legacy = time.perf_counter() - t0
+        results.append((size, set_based, legacy))
+
+    print()
+    for size, set_based, legacy in results:
+        legacy_txt = f"{legacy * 1000:10.1f} ms" if legacy is not None else "         -"
+        print(f"ids={size:>7}  set-based={set_based * 1000:10.1f} ms  ORM anterior={legacy_txt}")
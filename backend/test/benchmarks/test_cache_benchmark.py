@@ -0,0 +1,62 @@
+"""
+Benchmark de latencia del cache escalonado: acierto en L1, acierto en L2
+(Redis) y fallo en ambos niveles.
+
+No corre por defecto: RUN_BENCHMARKS=1 REDIS_URL=redis://localhost:6379 \
+    pytest backend/test/benchmarks/test_cache_benchmark.py -s
+Sin Redis accesible solo se miden L1 y los fallos.
+"""
+import os
+
+import pytest
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+
+from app.cache import TieredBackend
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") != "1", reason="RUN_BENCHMARKS=1 para ejecutar"),
+]
+
+ROUNDS = 2000
+PAYLOAD = b"x" * 20_000  # Del orden de una página de /cases/
+
+
+async def _redis_backend():
+    redis = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"), socket_connect_timeout=0.5)
+    try:
+        await redis.ping()
+    except Exception:
+        return None
+    return RedisBackend(redis)
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_latency(bench):
+    l2 = await _redis_backend()
+    backend = TieredBackend(l2, maxsize=ROUNDS * 2)
+
+    for i in range(ROUNDS):
+        await backend.set(f"bench:{i}", PAYLOAD, 300)
+
+    async def hit(round_number):
+        await backend.get_with_ttl(f"bench:{round_number}")
+
+    await bench("tiered_cache[l1_hit]", hit, rounds=ROUNDS)
+
+    if l2 is not None:
+        async def clear_l1(_round):
+            backend._store.clear()
+
+        await bench("tiered_cache[l2_hit]", hit, rounds=ROUNDS, setup=clear_l1)
+        await backend.clear(namespace="bench")
+    else:
+        print("\ntiered_cache[l2_hit] (Redis no disponible, omitido)")
+
+    async def miss(round_number):
+        await backend.get_with_ttl(f"missing:{round_number}")
+
+    await bench("tiered_cache[miss]", miss, rounds=ROUNDS)
+
+    assert backend.stats()["l1_hits"] >= ROUNDS
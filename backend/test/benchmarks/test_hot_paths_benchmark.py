@@ -0,0 +1,240 @@
+"""
+Benchmarks de los caminos calientes del backend sobre datasets sintéticos
+de varios tamaños: listado con filtros, estadísticas, timeline, bulk update,
+importadores y formatos de exportación.
+
+No corre por defecto: RUN_BENCHMARKS=1 pytest backend/test/benchmarks -s
+Los resultados quedan en BENCH_OUTPUT (JSON); ver conftest.py.
+"""
+import io
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from fastapi_cache import FastAPICache
+from httpx import AsyncClient
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.models import Case, Observation
+from app.routers import cases as cases_router
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") != "1", reason="RUN_BENCHMARKS=1 para ejecutar"),
+]
+
+# Las rondas de importación/exportación son mucho más largas que las de lectura
+IO_ROUNDS = int(os.getenv("BENCH_IO_ROUNDS", "3"))
+IMPORT_ROWS = 500
+BULK_SIZES = [100, 1000]
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_now = datetime.utcnow()
+READ_CASES_FILTERS = {
+    "sin_filtros": {},
+    "status": {"status": "ABIERTO"},
+    "priority": {"priority": "CRITICO"},
+    "service": {"service": "Pagos"},
+    "sby_responsable": {"sby_responsable": "Analista 7"},
+    "search": {"search": "latencia"},
+    "fechas": {
+        "start_date": (_now - timedelta(days=90)).date().isoformat(),
+        "end_date": _now.date().isoformat(),
+        "timezone_offset": 300,
+    },
+    "status_priority": {"status": "ABIERTO", "priority": "ALTO"},
+    # Columnas de la tabla del Dashboard con vista previa del texto
+    "proyeccion_dashboard": {
+        "fields": "codigo,estado,prioridad,servicio_o_plataforma,sby_responsable,novedades_y_comentarios,updated_at",
+        "preview": 300,
+    },
+    "combinados": {
+        "status": "ABIERTO",
+        "priority": "MEDIO",
+        "service": "Pagos",
+        "search": "servicio",
+        "start_date": (_now - timedelta(days=365)).date().isoformat(),
+        "end_date": _now.date().isoformat(),
+    },
+}
+
+
+async def _clear_response_cache(_round=None):
+    """Se mide el camino a la base de datos, no un acierto de cache."""
+    await FastAPICache.clear()
+
+
+def _xlsx(df: pd.DataFrame, **kwargs) -> bytes:
+    stream = io.BytesIO()
+    df.to_excel(stream, index=False, **kwargs)
+    return stream.getvalue()
+
+
+def _cases_frame(batch: str) -> pd.DataFrame:
+    return pd.DataFrame([
+        {
+            "codigo": f"IMP-{batch}-{i:05d}",
+            "servicio_o_plataforma": "Benchmark",
+            "estado": "ABIERTO",
+            "prioridad": "MEDIO",
+            "novedades_y_comentarios": "Importado por benchmark",
+            "sby_responsable": "Analista 1",
+        }
+        for i in range(IMPORT_ROWS)
+    ])
+
+
+def _legacy_workbook(batch: str) -> bytes:
+    """Bitácora semanal: fecha en la columna 1, responsable en la 4, casos en la 25."""
+    rows = []
+    start = datetime(2024, 1, 1)
+    for week in range(IMPORT_ROWS // 10):
+        row = [None] * 26
+        row[1] = start + timedelta(weeks=week)
+        row[4] = f"Analista {week % 10}"
+        row[25] = " ".join(
+            f"[{'CERRADO' if (week + i) % 3 == 0 else 'ABIERTO'}] CASO LEG-{batch}-{i:03d}. Actualización semana {week}"
+            for i in range(10)
+        )
+        rows.append(row)
+    stream = io.BytesIO()
+    with pd.ExcelWriter(stream) as writer:
+        pd.DataFrame(rows).to_excel(writer, sheet_name="2024", header=False, index=False)
+    return stream.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_read_cases_filters(client: AsyncClient, admin_headers: dict, dataset: dict, bench):
+    for label, params in READ_CASES_FILTERS.items():
+        async def request(_round):
+            response = await client.get("/cases/", params={"limit": 100, **params}, headers=admin_headers)
+            assert response.status_code == 200
+
+        await bench(f"read_cases[{label}][n={dataset['size']}]", request, setup=_clear_response_cache)
+
+    deep_skip = dataset["size"] // 2
+
+    async def deep_page(_round):
+        response = await client.get("/cases/", params={"skip": deep_skip, "limit": 100}, headers=admin_headers)
+        assert response.status_code == 200
+
+    await bench(f"read_cases[pagina_profunda][n={dataset['size']}]", deep_page, setup=_clear_response_cache)
+
+
+@pytest.mark.asyncio
+async def test_get_stats(client: AsyncClient, dataset: dict, bench):
+    async def request(_round):
+        response = await client.get("/stats/")
+        assert response.status_code == 200
+
+    await bench(f"get_stats[n={dataset['size']}]", request, setup=_clear_response_cache)
+
+
+@pytest.mark.asyncio
+async def test_case_timeline(client: AsyncClient, db_session, admin_headers: dict, dataset: dict, bench):
+    # El caso con más observaciones: el peor caso realista
+    case_id, _ = (await db_session.execute(
+        select(Observation.case_id, func.count()).group_by(Observation.case_id).order_by(func.count().desc()).limit(1)
+    )).one()
+    url = f"/cases/{case_id}/timeline"
+
+    async def full(_round):
+        response = await client.get(url, headers=admin_headers)
+        assert response.status_code == 200
+
+    await bench(f"get_case_timeline[completo][n={dataset['size']}]", full, setup=_clear_response_cache)
+
+    page = (await client.get(url, params={"limit": 500}, headers=admin_headers)).json()
+    while page["has_more"]:
+        page = (await client.get(url, params={"after": page["cursor"], "limit": 500}, headers=admin_headers)).json()
+
+    async def poll(_round):
+        response = await client.get(url, params={"after": page["cursor"]}, headers=admin_headers)
+        assert response.json()["items"] == []
+
+    await bench(f"get_case_timeline[polling][n={dataset['size']}]", poll, setup=_clear_response_cache)
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_cases(client: AsyncClient, db_session, admin_headers: dict, dataset: dict, bench, monkeypatch):
+    # Siempre síncrono: se mide el UPDATE, no el encolado del trabajo
+    monkeypatch.setattr(cases_router, "BULK_ASYNC_THRESHOLD", max(BULK_SIZES) + 1)
+    all_ids = list((await db_session.execute(select(Case.id).order_by(Case.id))).scalars())
+
+    for size in BULK_SIZES:
+        ids = all_ids[:size]
+
+        async def request(round_number):
+            # Alterna la prioridad para que cada ronda modifique todas las filas
+            value = "ALTO" if round_number % 2 == 0 else "BAJO"
+            response = await client.post(
+                "/cases/bulk-update",
+                json={"ids": ids, "action": "PRIORITY", "value": value},
+                headers=admin_headers,
+            )
+            assert response.status_code == 200
+
+        await bench(f"bulk_update_cases[ids={size}][n={dataset['size']}]", request)
+
+
+@pytest.mark.asyncio
+async def test_importers(client: AsyncClient, admin_headers: dict, dataset: dict, bench):
+    size = dataset["size"]
+    # Los Excel se generan fuera del tiempo medido; códigos nuevos en cada ronda
+    files = {}
+
+    async def build_simple(round_number):
+        files["file"] = ("casos.xlsx", _xlsx(_cases_frame(f"S{round_number}")), XLSX)
+
+    async def simple(_round):
+        response = await client.post("/cases-io/import", files=files, headers=admin_headers)
+        assert response.status_code == 201
+
+    await bench(f"import_cases[filas={IMPORT_ROWS}][n={size}]", simple, rounds=IO_ROUNDS, setup=build_simple)
+
+    async def build_with_observations(round_number):
+        cases_df = _cases_frame(f"O{round_number}")
+        observations_df = pd.DataFrame([
+            {"case_codigo": codigo, "content": f"Observación {n} de {codigo}", "created_at": "2024-06-01 10:00:00"}
+            for codigo in cases_df["codigo"]
+            for n in range(2)
+        ])
+        files.clear()
+        files["casos_file"] = ("casos.xlsx", _xlsx(cases_df), XLSX)
+        files["observaciones_file"] = ("observaciones.xlsx", _xlsx(observations_df), XLSX)
+
+    async def with_observations(_round):
+        response = await client.post("/cases-io/import-with-observations", files=files, headers=admin_headers)
+        assert response.status_code == 201
+
+    await bench(
+        f"import_cases_with_observations[filas={IMPORT_ROWS}][n={size}]",
+        with_observations, rounds=IO_ROUNDS, setup=build_with_observations,
+    )
+
+    async def build_legacy(round_number):
+        files.clear()
+        files["file"] = ("bitacora.xlsx", _legacy_workbook(f"L{round_number}"), XLSX)
+
+    async def legacy(_round):
+        response = await client.post("/cases-io/import-legacy", files=files, headers=admin_headers)
+        assert response.status_code == 201
+
+    await bench(f"import_legacy_cases[filas={IMPORT_ROWS}][n={size}]", legacy, rounds=IO_ROUNDS, setup=build_legacy)
+
+
+@pytest.mark.asyncio
+async def test_exports(client: AsyncClient, admin_headers: dict, dataset: dict, bench):
+    for url, formats in (
+        ("/cases-io/export", ["tsv", "csv", "xlsx"]),
+        ("/cases-io/export-with-observations", ["xlsx", "csv"]),
+    ):
+        for format in formats:
+            async def request(_round):
+                response = await client.get(url, params={"format": format}, headers=admin_headers)
+                assert response.status_code == 200
+
+            name = url.rsplit("/", 1)[-1].replace("-", "_")
+            await bench(f"{name}[{format}][n={dataset['size']}]", request, rounds=IO_ROUNDS)
@@ -0,0 +1,89 @@
+"""
+Benchmark de serialización JSON por cada 1k filas: el camino genérico de
+FastAPI (`jsonable_encoder` + json.dumps sobre instancias ORM) frente a
+orjson sobre filas con la forma de CaseRead, y lo mismo para el timeline.
+
+No corre por defecto: RUN_BENCHMARKS=1 pytest backend/test/benchmarks -s
+"""
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.models import Case, CaseStatus, Priority
+from app.responses import dumps
+from app.routers.cases import CASE_READ_FIELDS
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") != "1", reason="RUN_BENCHMARKS=1 para ejecutar"),
+]
+
+ROWS = 1000
+_now = datetime.utcnow()
+
+
+def _cases():
+    return [
+        Case(
+            id=i,
+            codigo=f"SER-{i:05d}",
+            fecha_inicio=_now - timedelta(days=i),
+            estado=CaseStatus.ABIERTO,
+            sby_responsable=f"Analista {i % 10}",
+            servicio_o_plataforma="Pagos",
+            prioridad=Priority.MEDIO,
+            novedades_y_comentarios="Se revisa incidencia con proveedor, servicio degradado. " * 4,
+            creado_por_id=1,
+            created_at=_now - timedelta(days=i),
+            updated_at=_now,
+        )
+        for i in range(ROWS)
+    ]
+
+
+def _timeline():
+    return [
+        {
+            "type": "OBSERVATION" if i % 3 else "AUDIT",
+            "id": i,
+            "content": "Observación de seguimiento del caso" if i % 3 else None,
+            "action": None if i % 3 else "STATUS_CHANGE",
+            "details": None if i % 3 else {"field": "estado", "old": "ABIERTO", "new": "EN_MONITOREO"},
+            "created_at": _now + timedelta(minutes=i),
+            "user_id": i % 20,
+            "user_name": f"Analista {i % 20}",
+        }
+        for i in range(ROWS)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_case_list_serialization(bench):
+    cases = _cases()
+    rows = [tuple(getattr(case, field) for field in CASE_READ_FIELDS) for case in cases]
+
+    async def generic(_round):
+        json.dumps(jsonable_encoder({"items": cases, "total": ROWS})).encode()
+
+    async def orjson_rows(_round):
+        dumps({"items": [dict(zip(CASE_READ_FIELDS, row)) for row in rows], "total": ROWS})
+
+    await bench(f"serialize_case_list[jsonable_encoder][filas={ROWS}]", generic)
+    await bench(f"serialize_case_list[orjson_filas][filas={ROWS}]", orjson_rows)
+
+
+@pytest.mark.asyncio
+async def test_timeline_serialization(bench):
+    items = _timeline()
+
+    async def generic(_round):
+        json.dumps(jsonable_encoder(items)).encode()
+
+    async def orjson_items(_round):
+        dumps(items)
+
+    await bench(f"serialize_timeline[jsonable_encoder][filas={ROWS}]", generic)
+    await bench(f"serialize_timeline[orjson][filas={ROWS}]", orjson_items)
@@ -0,0 +1,87 @@
+"""
+Benchmark de arranque: tiempo de `import app.main` y RSS base del proceso,
+frente a un proceso que además carga pandas (lo que pagaba cada worker
+antes de diferir la importación), y tiempo de arranque en frío hasta que
+el worker está listo (import + eventos de startup) sobre una base ya
+preparada con bootstrap.py.
+
+No corre por defecto: RUN_BENCHMARKS=1 pytest backend/test/benchmarks -s
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") != "1", reason="RUN_BENCHMARKS=1 para ejecutar"),
+]
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+STARTUP_ROUNDS = int(os.getenv("BENCH_STARTUP_ROUNDS", "5"))
+
+# ru_maxrss está en KB en Linux
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+{extra}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+# Arranque completo: lifespan de la app (startup) sin servir requests
+_READY_PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+
+async def ready():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+print(json.dumps({"seconds": asyncio.run(ready()) - start}))
+"""
+
+
+def _run(code: str, tmp_path, **env) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env={"PYTHONPATH": str(BACKEND_DIR), "PATH": "", **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize("label, extra", [("app", ""), ("app_con_pandas", "import pandas")])
+def test_startup(label, extra, tmp_path, bench_record):
+    samples = [_run(_PROBE.format(extra=extra), tmp_path) for _ in range(STARTUP_ROUNDS)]
+    bench_record(f"startup[{label}]", {
+        "rounds": STARTUP_ROUNDS,
+        "median_ms": round(statistics.median(s["seconds"] for s in samples) * 1000, 3),
+        "rss_mb": round(statistics.median(s["rss_kb"] for s in samples) / 1024, 1),
+    })
+
+
+def test_cold_start_to_ready(tmp_path, bench_record):
+    env = {"DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'startup.db'}", "REDIS_URL": ""}
+    subprocess.run(
+        [sys.executable, str(BACKEND_DIR / "bootstrap.py"), "--skip-admin"],
+        cwd=tmp_path,
+        env={"PYTHONPATH": str(BACKEND_DIR), "PATH": "", **env},
+        check=True,
+        capture_output=True,
+    )
+    samples = [_run(_READY_PROBE, tmp_path, **env)["seconds"] for _ in range(STARTUP_ROUNDS)]
+    bench_record("startup[hasta_ready]", {
+        "rounds": STARTUP_ROUNDS,
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+    })
@@ -0,0 +1,91 @@
+"""
+Benchmark de latencia del timeline sobre un caso con 5k entradas.
+
+No corre por defecto: RUN_BENCHMARKS=1 pytest backend/test/benchmarks -s
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert
+
+from app.models import Case, CaseAudit, CaseAuditType, Observation, Priority, User
+from app import user_cache
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") != "1", reason="RUN_BENCHMARKS=1 para ejecutar"),
+]
+
+TIMELINE_ENTRIES = 5000
+ROUNDS = 20
+
+
+@pytest.mark.asyncio
+async def test_timeline_latency_5k_entries(
+    bench,
+    client: AsyncClient,
+    db_session,
+    admin_user: User,
+    admin_headers: dict
+):
+    case = Case(
+        codigo="BENCH-TIMELINE",
+        servicio_o_plataforma="Benchmark",
+        prioridad=Priority.ALTO,
+        creado_por_id=admin_user.id,
+    )
+    db_session.add(case)
+    await db_session.commit()
+    await db_session.refresh(case)
+
+    start = datetime.utcnow() - timedelta(days=365)
+    half = TIMELINE_ENTRIES // 2
+    await db_session.execute(insert(Observation), [
+        {
+            "case_id": case.id,
+            "content": f"Observación {i}",
+            "created_by_id": admin_user.id,
+            "created_at": start + timedelta(minutes=2 * i),
+        }
+        for i in range(half)
+    ])
+    await db_session.execute(insert(CaseAudit), [
+        {
+            "case_id": case.id,
+            "user_id": admin_user.id,
+            "action": CaseAuditType.UPDATE,
+            "details": {"estado": {"old": "ABIERTO", "new": "STANDBY"}},
+            "timestamp": start + timedelta(minutes=2 * i + 1),
+            "recorded_at": start + timedelta(minutes=2 * i + 1),
+        }
+        for i in range(TIMELINE_ENTRIES - half)
+    ])
+    await db_session.commit()
+
+    url = f"/cases/{case.id}/timeline"
+    name = f"timeline[{{}}][entradas={TIMELINE_ENTRIES}]"
+
+    responses = {}
+
+    async def full(_round):
+        responses["full"] = await client.get(url, headers=admin_headers)
+
+    async def clear_user_names(_round):
+        user_cache.clear_user_names()
+
+    await bench(name.format("completo_cache_frio"), full, rounds=ROUNDS, setup=clear_user_names)
+    await bench(name.format("completo_cache_caliente"), full, rounds=ROUNDS)
+    assert len(responses["full"].json()) == TIMELINE_ENTRIES
+
+    # Polling incremental sin novedades desde el final del historial
+    page = (await client.get(url, params={"limit": 500}, headers=admin_headers)).json()
+    while page["has_more"]:
+        page = (await client.get(url, params={"after": page["cursor"], "limit": 500}, headers=admin_headers)).json()
+
+    async def poll(_round):
+        responses["poll"] = await client.get(url, params={"after": page["cursor"]}, headers=admin_headers)
+
+    await bench(name.format("polling_sin_novedades"), poll, rounds=ROUNDS)
+    assert responses["poll"].json()["items"] == []
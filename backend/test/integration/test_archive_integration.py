@@ -0,0 +1,185 @@
+"""
+Tests de integración para el archivado de casos cerrados (archive_cases.py)
+y la lectura transparente desde el archivo.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ArchivedCase, Case, CaseStatus
+from archive_cases import run_archive
+
+
+async def _close(session: AsyncSession, case_id: int, days_ago: int):
+    await session.execute(
+        update(Case).where(Case.id == case_id).values(
+            estado=CaseStatus.CERRADO,
+            updated_at=datetime.utcnow() - timedelta(days=days_ago),
+        )
+    )
+    await session.commit()
+
+
+@pytest_asyncio.fixture
+async def archived_case(
+    client: AsyncClient,
+    admin_headers: dict,
+    case_with_observations: Case,
+    db_session: AsyncSession,
+    session_factory
+) -> int:
+    """Caso con observaciones y auditoría, cerrado hace 400 días y archivado."""
+    case_id = case_with_observations.id
+    await client.patch(f"/cases/{case_id}", json={"prioridad": "BAJO"}, headers=admin_headers)
+    await _close(db_session, case_id, days_ago=400)
+    assert await run_archive(session_factory, days=365) == 1
+    # La sesión del test comparte identity map con la app: sin el caso ya borrado
+    db_session.expunge_all()
+    return case_id
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestArchiving:
+
+    async def test_moves_case_and_history(self, archived_case: int, db_session: AsyncSession):
+        assert await db_session.get(Case, archived_case) is None
+        archived = await db_session.get(ArchivedCase, archived_case)
+        assert archived.codigo == "CASE-WITH-OBS"
+        assert len(archived.history["observations"]) == 3
+        assert [audit["action"] for audit in archived.history["audits"]] == ["UPDATE"]
+
+    async def test_keeps_recent_and_open_cases(
+        self,
+        sample_case: Case,
+        multiple_cases: list[Case],
+        db_session: AsyncSession,
+        session_factory
+    ):
+        recent_id = multiple_cases[0].id
+        await _close(db_session, recent_id, days_ago=10)
+
+        assert await run_archive(session_factory, days=365) == 0
+        assert await db_session.get(Case, recent_id) is not None
+        assert (await db_session.execute(select(func.count()).select_from(ArchivedCase))).scalar_one() == 0
+
+    async def test_batches(self, multiple_cases: list[Case], db_session: AsyncSession, session_factory):
+        for case in multiple_cases[:5]:
+            await _close(db_session, case.id, days_ago=400)
+
+        assert await run_archive(session_factory, days=365, batch_size=2) == 5
+        assert (await db_session.execute(select(func.count()).select_from(ArchivedCase))).scalar_one() == 5
+
+    async def test_new_case_does_not_reuse_archived_id(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        archived_case: int,
+        db_session: AsyncSession,
+        session_factory
+    ):
+        """El caso archivado era el de id más alto: el siguiente no lo reutiliza."""
+        response = await client.post(
+            "/cases/",
+            json={
+                "codigo": "AFTER-ARCHIVE",
+                "servicio_o_plataforma": "Red",
+                "prioridad": "BAJO",
+                "novedades_y_comentarios": ""
+            },
+            headers=admin_headers
+        )
+        new_id = response.json()["id"]
+        assert new_id > archived_case
+
+        await _close(db_session, new_id, days_ago=400)
+        assert await run_archive(session_factory, days=365) == 1
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestArchivedReads:
+
+    async def test_detail_falls_back_to_archive(self, client: AsyncClient, admin_headers: dict, archived_case: int):
+        response = await client.get(f"/cases/{archived_case}", headers=admin_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["archived"] is True
+        assert data["estado"] == "CERRADO"
+        assert len(data["observaciones_list"]) == 3
+
+    async def test_cached_detail_is_invalidated(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        case_with_observations: Case,
+        db_session: AsyncSession,
+        session_factory
+    ):
+        case_id = case_with_observations.id
+        await _close(db_session, case_id, days_ago=400)
+        before = await client.get(f"/cases/{case_id}", headers=admin_headers)
+        assert before.json()["archived"] is False
+
+        await run_archive(session_factory, days=365)
+
+        after = await client.get(f"/cases/{case_id}", headers=admin_headers)
+        assert after.json()["archived"] is True
+
+    async def test_lookup_by_codigo(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        sample_case: Case,
+        archived_case: int
+    ):
+        hot = await client.get("/cases/codigo/SAMPLE-001", headers=admin_headers)
+        cold = await client.get("/cases/codigo/CASE-WITH-OBS", headers=admin_headers)
+        missing = await client.get("/cases/codigo/NOPE", headers=admin_headers)
+
+        assert hot.status_code == 200 and hot.json()["archived"] is False
+        assert cold.status_code == 200 and cold.json()["id"] == archived_case
+        assert cold.json()["archived"] is True
+        assert missing.status_code == 404
+
+    async def test_timeline_from_archive(self, client: AsyncClient, admin_headers: dict, archived_case: int):
+        response = await client.get(f"/cases/{archived_case}/timeline", headers=admin_headers)
+
+        assert response.status_code == 200
+        assert [item["type"] for item in response.json()].count("OBSERVATION") == 3
+        assert [item["action"] for item in response.json() if item["type"] == "AUDIT"] == ["UPDATE"]
+
+        page = await client.get(f"/cases/{archived_case}/timeline?limit=2", headers=admin_headers)
+        rest = await client.get(
+            f"/cases/{archived_case}/timeline?after={page.json()['cursor']}", headers=admin_headers
+        )
+        assert page.json()["has_more"] is True
+        assert len(page.json()["items"]) + len(rest.json()["items"]) == 4
+
+    async def test_list_include_archived(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        sample_case: Case,
+        archived_case: int
+    ):
+        hot = await client.get("/cases/", headers=admin_headers)
+        both = await client.get("/cases/?include_archived=true&fields=codigo", headers=admin_headers)
+        closed = await client.get("/cases/?include_archived=true&status=CERRADO", headers=admin_headers)
+
+        assert [item["id"] for item in hot.json()["items"]] == [sample_case.id]
+        assert both.json()["total"] == 2
+        assert {(item["codigo"], item["archived"]) for item in both.json()["items"]} == {
+            ("SAMPLE-001", False), ("CASE-WITH-OBS", True)
+        }
+        assert [item["id"] for item in closed.json()["items"]] == [archived_case]
+
+    async def test_archived_case_is_read_only(self, client: AsyncClient, admin_headers: dict, archived_case: int):
+        response = await client.patch(f"/cases/{archived_case}", json={"prioridad": "ALTO"}, headers=admin_headers)
+
+        assert response.status_code == 404
@@ -0,0 +1,284 @@
+"""
+Tests de integración para la auditoría write-behind (AUDIT_MODE=buffered).
+"""
+import asyncio
+import json
+import os
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app import audit
+from app.audit import AuditBuffer, get_audit_buffer, record_audit, start_audit_buffer, stop_audit_buffer
+from app.models import Case, CaseAudit, CaseAuditType, Observation, User
+
+
+@pytest_asyncio.fixture
+async def audit_buffer(session_factory, tmp_path):
+    """Buffer activo con intervalo largo: los tests deciden cuándo se vacía."""
+    buffer = await start_audit_buffer(session_factory, flush_interval=60, spill_path=str(tmp_path / "spill.jsonl"))
+    yield buffer
+    await stop_audit_buffer()
+
+
+async def _audit_count(session: AsyncSession, case_id: int) -> int:
+    return (await session.execute(
+        select(func.count()).select_from(CaseAudit).where(CaseAudit.case_id == case_id)
+    )).scalar_one()
+
+
+def _row(case_id: int, user_id: int) -> dict:
+    return {
+        "case_id": case_id,
+        "user_id": user_id,
+        "action": CaseAuditType.UPDATE,
+        "details": {"estado": {"old": "ABIERTO", "new": "CERRADO"}},
+        "timestamp": datetime.utcnow(),
+    }
+
+
+@pytest_asyncio.fixture
+async def isolated_factory(tmp_path):
+    """
+    Base propia en un archivo: los tests del ciclo de flush no comparten la
+    conexión ni la transacción del resto de la suite.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'audit.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+class _SlowFactory:
+    """Sesiones cuyo primer INSERT tarda: permite interrumpir un flush en curso."""
+
+    def __init__(self, session_factory, delay: float = 0.2):
+        self.session_factory = session_factory
+        self.delay = delay
+        self.entered = asyncio.Event()
+
+    def __call__(self):
+        session = self.session_factory()
+        execute = session.execute
+
+        async def slow_execute(*args, **kwargs):
+            if not self.entered.is_set():
+                self.entered.set()
+                await asyncio.sleep(self.delay)
+            return await execute(*args, **kwargs)
+
+        session.execute = slow_execute
+        return session
+
+
+class _FailingFactory:
+    """Fábrica de sesiones cuya base no responde."""
+
+    def __call__(self):
+        raise ConnectionError("database unavailable")
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestAuditBuffer:
+
+    async def test_strict_mode_by_default(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        sample_case: Case,
+        db_session: AsyncSession
+    ):
+        """Sin buffer la auditoría se escribe en la transacción de la request."""
+        await client.patch(f"/cases/{sample_case.id}", json={"prioridad": "BAJO"}, headers=admin_headers)
+
+        assert get_audit_buffer() is None
+        assert await _audit_count(db_session, sample_case.id) == 1
+
+    async def test_update_is_queued_until_flush(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        sample_case: Case,
+        db_session: AsyncSession,
+        audit_buffer: AuditBuffer
+    ):
+        case_id = sample_case.id
+        url = f"/cases/{case_id}/timeline"
+        before = await client.get(url, headers=admin_headers)
+
+        await client.patch(f"/cases/{case_id}", json={"prioridad": "BAJO"}, headers=admin_headers)
+
+        assert len(audit_buffer) == 1
+        assert await _audit_count(db_session, case_id) == 0
+
+        assert await audit_buffer.flush() == 1
+        assert await _audit_count(db_session, case_id) == 1
+        # El ETag del timeline cambia al llegar la auditoría
+        after = await client.get(url, headers={**admin_headers, "If-None-Match": before.headers["ETag"]})
+        assert after.status_code == 200
+        assert [item["action"] for item in after.json() if item["type"] == "AUDIT"] == ["UPDATE"]
+
+    async def test_rollback_discards_rows(
+        self,
+        db_session: AsyncSession,
+        sample_case: Case,
+        admin_user: User,
+        audit_buffer: AuditBuffer
+    ):
+        await record_audit(db_session, [_row(sample_case.id, admin_user.id)])
+        await db_session.rollback()
+
+        assert len(audit_buffer) == 0
+
+    async def test_batch_size_triggers_flush(self, isolated_factory):
+        """Con el lote lleno el ciclo no espera al intervalo."""
+        buffer = AuditBuffer(isolated_factory, batch_size=3, flush_interval=3600)
+        buffer.put([_row(1, 1), _row(1, 1), _row(2, 1)])
+
+        # Con el intervalo de una hora, solo el lote lleno despierta al ciclo
+        await asyncio.wait_for(buffer._run_once(), timeout=5)
+
+        assert len(buffer) == 0
+        async with isolated_factory() as session:
+            assert await _audit_count(session, 1) == 2
+
+    async def test_cancelled_flush_keeps_rows(self, isolated_factory, tmp_path):
+        """Un flush cancelado a mitad de escritura devuelve sus filas a la cola."""
+        slow = _SlowFactory(isolated_factory)
+        buffer = AuditBuffer(slow, flush_interval=3600, spill_path=str(tmp_path / "spill.jsonl"))
+        buffer.put([_row(1, 1), _row(1, 1)])
+
+        flush = asyncio.create_task(buffer.flush())
+        await slow.entered.wait()
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+
+        assert len(buffer) == 2
+        await buffer.stop()
+        async with isolated_factory() as session:
+            assert await _audit_count(session, 1) == 2
+
+    async def test_stop_during_slow_flush(self, isolated_factory, tmp_path):
+        """`stop` espera al flush en curso del ciclo en lugar de cancelarlo."""
+        slow = _SlowFactory(isolated_factory)
+        buffer = AuditBuffer(slow, batch_size=2, flush_interval=3600, spill_path=str(tmp_path / "spill.jsonl"))
+        await buffer.start()
+        buffer.put([_row(1, 1), _row(1, 1)])
+        await slow.entered.wait()
+
+        await buffer.stop()
+
+        assert len(buffer) == 0
+        assert list(tmp_path.glob("spill.jsonl*")) == []
+        async with isolated_factory() as session:
+            assert await _audit_count(session, 1) == 2
+
+    async def test_incremental_timeline_sees_late_audit(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        sample_case: Case,
+        db_session: AsyncSession,
+        admin_user: User,
+        audit_buffer: AuditBuffer
+    ):
+        """
+        Una observación confirmada mientras la auditoría está en la cola no
+        deja al cursor del timeline por delante de ella.
+        """
+        case_id = sample_case.id
+        url = f"/cases/{case_id}/timeline"
+        await client.patch(f"/cases/{case_id}", json={"prioridad": "BAJO"}, headers=admin_headers)
+        db_session.add(Observation(case_id=case_id, content="Mientras tanto", created_by_id=admin_user.id))
+        await db_session.commit()
+
+        first = await client.get(url, params={"limit": 50}, headers=admin_headers)
+        assert [item["type"] for item in first.json()["items"]] == ["OBSERVATION"]
+
+        await audit_buffer.flush()
+
+        polled = await client.get(url, params={"after": first.json()["cursor"]}, headers=admin_headers)
+        assert [item["action"] for item in polled.json()["items"]] == ["UPDATE"]
+        # Se muestra con la hora del cambio, no con la del volcado
+        assert polled.json()["items"][0]["created_at"] < first.json()["items"][0]["created_at"]
+
+    async def test_stop_flushes_pending(
+        self,
+        db_session: AsyncSession,
+        sample_case: Case,
+        admin_user: User,
+        audit_buffer: AuditBuffer
+    ):
+        """Apagado ordenado: lo encolado se escribe."""
+        case_id = sample_case.id
+        audit_buffer.put([_row(case_id, admin_user.id), _row(case_id, admin_user.id)])
+
+        await stop_audit_buffer()
+
+        assert get_audit_buffer() is None
+        assert await _audit_count(db_session, case_id) == 2
+
+    async def test_spill_and_recover(
+        self,
+        db_session: AsyncSession,
+        session_factory,
+        sample_case: Case,
+        admin_user: User,
+        tmp_path
+    ):
+        """Si el flush final falla, las filas se vuelcan y se recuperan al arrancar."""
+        case_id = sample_case.id
+        spill_path = tmp_path / "spill.jsonl"
+        failing = AuditBuffer(_FailingFactory(), spill_path=str(spill_path))
+        row = _row(case_id, admin_user.id)
+        row["timestamp"] = datetime(2026, 1, 5, 8, 30)
+        failing.put([row])
+
+        await failing.stop()
+
+        assert [path.name for path in tmp_path.glob("spill.jsonl*")] == [f"spill.jsonl.{os.getpid()}"]
+        recovered = AuditBuffer(session_factory, flush_interval=60, spill_path=str(spill_path))
+        await recovered.start()
+        await recovered.stop()
+        assert list(tmp_path.glob("spill.jsonl*")) == []
+        audit = (await db_session.execute(select(CaseAudit).where(CaseAudit.case_id == case_id))).scalar_one()
+        # La hora del cambio se conserva aunque la fila llegue al reiniciar
+        assert audit.timestamp == datetime(2026, 1, 5, 8, 30)
+        assert audit.recorded_at > audit.timestamp
+
+    async def test_workers_recover_each_spill_once(
+        self,
+        db_session: AsyncSession,
+        session_factory,
+        sample_case: Case,
+        admin_user: User,
+        tmp_path,
+        monkeypatch
+    ):
+        """Dos workers que arrancan a la vez no insertan dos veces el mismo volcado."""
+        case_id = sample_case.id
+        spill_path = tmp_path / "spill.jsonl"
+        for pid in (101, 202):
+            row = {**_row(case_id, admin_user.id), "action": "UPDATE"}
+            (tmp_path / f"spill.jsonl.{pid}").write_text(json.dumps(row, default=str) + "\n")
+        first = AuditBuffer(session_factory, spill_path=str(spill_path))
+        second = AuditBuffer(session_factory, spill_path=str(spill_path))
+
+        listed = sorted(str(path) for path in tmp_path.glob("spill.jsonl.*"))
+        first._recover_spill()
+        # El segundo los listó antes de que el primero los reclamara: no falla
+        monkeypatch.setattr(audit.glob, "glob", lambda pattern: listed)
+        second._recover_spill()
+
+        assert (len(first), len(second)) == (2, 0)
+        assert await first.flush() == 2
+        assert list(tmp_path.glob("spill.jsonl*")) == []
+        assert await _audit_count(db_session, case_id) == 2
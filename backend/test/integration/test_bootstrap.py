@@ -0,0 +1,116 @@
+"""
+Tests de integración para el bootstrap de la base de datos y el readiness.
+"""
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database import get_session
+from app.main import app
+from app.models import User, UserRole
+from bootstrap import bootstrap
+
+
+@pytest_asyncio.fixture
+async def empty_engine(tmp_path):
+    """Base de datos propia y vacía: el bootstrap hace DDL y commit."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bootstrap.db'}")
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestBootstrap:
+
+    async def test_creates_schema_and_admin(self, empty_engine):
+        created = await bootstrap(empty_engine, admin_email="ops@example.com", admin_password="secret123")
+
+        assert created is True
+        async with empty_engine.connect() as conn:
+            tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+            admin = (await conn.execute(select(User.rol, User.is_active).where(User.email == "ops@example.com"))).one()
+        assert {"user", "case", "observation"} <= set(tables)
+        assert admin == (UserRole.ADMIN, True)
+
+    async def test_is_idempotent(self, empty_engine):
+        await bootstrap(empty_engine, admin_email="ops@example.com", admin_password="secret123")
+
+        created = await bootstrap(empty_engine, admin_email="ops@example.com", admin_password="otra")
+
+        assert created is False
+        async with empty_engine.connect() as conn:
+            assert (await conn.execute(select(func.count()).select_from(User))).scalar_one() == 1
+
+    async def test_skip_admin(self, empty_engine):
+        assert await bootstrap(empty_engine) is False
+
+        async with empty_engine.connect() as conn:
+            assert (await conn.execute(select(func.count()).select_from(User))).scalar_one() == 0
+
+    async def test_adds_new_columns_to_existing_tables(self, empty_engine):
+        await bootstrap(empty_engine)
+        # Esquema anterior a `case.version`, con datos
+        async with empty_engine.begin() as conn:
+            await conn.execute(text('ALTER TABLE "case" DROP COLUMN version'))
+            await conn.execute(text(
+                "INSERT INTO \"case\" (codigo, fecha_inicio, estado, servicio_o_plataforma, prioridad, "
+                "novedades_y_comentarios, created_at, updated_at) "
+                "VALUES ('OLD-1', '2024-01-01', 'ABIERTO', 'Pagos', 'MEDIO', '', '2024-01-01', '2024-01-01')"
+            ))
+
+        await bootstrap(empty_engine)
+
+        async with empty_engine.connect() as conn:
+            assert (await conn.execute(text('SELECT version FROM "case"'))).scalar_one() == 1
+
+    async def test_adds_missing_indexes(self, empty_engine):
+        await bootstrap(empty_engine)
+        async with empty_engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_observation_case_id_created_at"))
+
+        await bootstrap(empty_engine)
+
+        async with empty_engine.connect() as conn:
+            indexes = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_indexes("observation"))
+        assert "ix_observation_case_id_created_at" in {index["name"] for index in indexes}
+
+    async def test_backfills_audit_recorded_at(self, empty_engine):
+        await bootstrap(empty_engine)
+        # Auditoría anterior a `caseaudit.recorded_at`
+        async with empty_engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_caseaudit_case_id_recorded_at"))
+            await conn.execute(text("ALTER TABLE caseaudit DROP COLUMN recorded_at"))
+            await conn.execute(text(
+                "INSERT INTO caseaudit (case_id, user_id, action, details, timestamp) "
+                "VALUES (1, 1, 'UPDATE', '{}', '2024-01-01 10:00:00')"
+            ))
+
+        await bootstrap(empty_engine)
+
+        async with empty_engine.connect() as conn:
+            assert (await conn.execute(text("SELECT recorded_at FROM caseaudit"))).scalar_one() == "2024-01-01 10:00:00"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestReadiness:
+
+    async def test_ready_when_schema_exists(self, client: AsyncClient):
+        response = await client.get("/health/ready")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}
+
+    async def test_not_ready_without_schema(self, client: AsyncClient, empty_engine):
+        async def _override():
+            async with AsyncSession(empty_engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = _override
+
+        response = await client.get("/health/ready")
+
+        assert response.status_code == 503
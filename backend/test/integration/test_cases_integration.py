@@ -2,9 +2,12 @@
 Tests de integración para endpoints de casos.
 Prueba creación, lectura, actualización y gestión de casos.
 """
+from datetime import datetime, timedelta
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.conditional import make_etag
 from app.models import User, Case, CaseStatus, Priority
 
 
@@ -108,6 +111,30 @@ class TestCaseCreation:
         assert response.status_code == 400
         assert "Case code already exists" in response.json()["detail"]
     
+    async def test_create_case_with_initial_observation(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict
+    ):
+        """Verifica que la observación inicial se crea junto con el caso."""
+        response = await client.post(
+            "/cases/",
+            json={
+                "codigo": "TEST-OBS",
+                "servicio_o_plataforma": "Servicio",
+                "prioridad": "MEDIO",
+                "novedades_y_comentarios": "Comentario",
+                "observaciones": "Primera observación"
+            },
+            headers=admin_headers
+        )
+        
+        data = response.json()
+        assert data["observaciones"] is None
+        assert data["version"] == 1
+        timeline = await client.get(f"/cases/{data['id']}/timeline", headers=admin_headers)
+        assert [item["content"] for item in timeline.json()] == ["Primera observación"]
+    
     async def test_create_case_without_auth(self, client: AsyncClient):
         """Verifica que no se puede crear caso sin autenticación."""
         case_data = {
@@ -263,6 +290,74 @@ class TestCaseRetrieval:
         assert len(data["observaciones_list"]) > 0
 
 
+@pytest.mark.integration
+@pytest.mark.cases
+@pytest.mark.asyncio
+class TestCaseListProjection:
+    """Tests para la proyección de columnas del listado de casos."""
+    
+    async def test_fields_selects_only_requested_columns(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        multiple_cases: list[Case]
+    ):
+        """Verifica que `fields` limita los campos de cada caso (más el id)."""
+        response = await client.get(
+            "/cases/?fields=codigo,estado",
+            headers=admin_headers
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == len(multiple_cases)
+        assert all(set(item) == {"id", "codigo", "estado"} for item in data["items"])
+    
+    async def test_full_rows_by_default(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que sin `fields` se devuelven todos los campos de CaseRead."""
+        response = await client.get("/cases/", headers=admin_headers)
+        
+        item = response.json()["items"][0]
+        assert item["codigo"] == sample_case.codigo
+        assert item["observaciones"] == "Observación inicial"
+        assert "updated_at" in item
+    
+    async def test_preview_truncates_long_text(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que `preview` recorta los textos largos."""
+        response = await client.get(
+            "/cases/?fields=codigo,novedades_y_comentarios&preview=4",
+            headers=admin_headers
+        )
+        
+        item = response.json()["items"][0]
+        assert item["novedades_y_comentarios"] == sample_case.novedades_y_comentarios[:4]
+        assert item["codigo"] == sample_case.codigo
+    
+    async def test_unknown_field_rejected(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict
+    ):
+        """Verifica que un campo desconocido devuelve 400."""
+        response = await client.get(
+            "/cases/?fields=codigo,hashed_password",
+            headers=admin_headers
+        )
+        
+        assert response.status_code == 400
+        assert "hashed_password" in response.json()["detail"]
+
+
 @pytest.mark.integration
 @pytest.mark.cases
 @pytest.mark.asyncio
@@ -440,6 +535,58 @@ class TestBulkUpdate:
         
         assert response.status_code == 200
     
+    async def test_bulk_update_reports_changed_ids(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        db_session: AsyncSession,
+        multiple_cases: list[Case]
+    ):
+        """Verifica que solo se actualizan y auditan los casos que cambian."""
+        from sqlmodel import select
+        from app.models import CaseAudit
+        
+        ids = [case.id for case in multiple_cases[:3]]
+        original_estado = multiple_cases[2].estado.value
+        first = await client.post(
+            "/cases/bulk-update",
+            json={"ids": ids[:2], "action": "CLOSE", "value": ""},
+            headers=admin_headers
+        )
+        second = await client.post(
+            "/cases/bulk-update",
+            json={"ids": ids, "action": "CLOSE", "value": ""},
+            headers=admin_headers
+        )
+        
+        assert sorted(first.json()["updated_ids"]) == sorted(ids[:2])
+        assert second.json()["updated_ids"] == [ids[2]]
+        assert second.json()["updated_count"] == 1
+        
+        audits = (await db_session.execute(
+            select(CaseAudit).where(CaseAudit.case_id == ids[2])
+        )).scalars().all()
+        assert len(audits) == 1
+        assert audits[0].details == {
+            "estado": {"old": original_estado, "new": "CERRADO"}
+        }
+    
+    async def test_bulk_update_invalid_priority_is_ignored(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        multiple_cases: list[Case]
+    ):
+        """Verifica que una prioridad inválida no modifica ningún caso."""
+        response = await client.post(
+            "/cases/bulk-update",
+            json={"ids": [multiple_cases[0].id], "action": "PRIORITY", "value": "URGENTE"},
+            headers=admin_headers
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["updated_ids"] == []
+    
     async def test_bulk_update_as_consulta_forbidden(
         self, 
         client: AsyncClient, 
@@ -505,3 +652,620 @@ class TestCaseTimeline:
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, list)
+    
+    async def test_timeline_incremental_with_cursor(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        case_with_observations: Case
+    ):
+        """Verifica que el timeline incremental solo devuelve entradas nuevas."""
+        response = await client.get(
+            f"/cases/{case_with_observations.id}/timeline?limit=2",
+            headers=admin_headers
+        )
+        
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) == 2
+        assert page["has_more"] is True
+        
+        response = await client.get(
+            f"/cases/{case_with_observations.id}/timeline",
+            params={"after": page["cursor"]},
+            headers=admin_headers
+        )
+        
+        assert response.status_code == 200
+        rest = response.json()
+        assert len(rest["items"]) == 1
+        assert rest["has_more"] is False
+        
+        # Tras un nuevo comentario solo llega la entrada nueva
+        await client.patch(
+            f"/cases/{case_with_observations.id}",
+            json={"observaciones": "Nueva observación"},
+            headers=admin_headers
+        )
+        response = await client.get(
+            f"/cases/{case_with_observations.id}/timeline",
+            params={"after": rest["cursor"]},
+            headers=admin_headers
+        )
+        
+        new_items = response.json()["items"]
+        assert [item["content"] for item in new_items] == ["Nueva observación"]
+    
+    async def test_timeline_invalid_cursor(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que un cursor inválido devuelve 400."""
+        response = await client.get(
+            f"/cases/{sample_case.id}/timeline?after=invalido",
+            headers=admin_headers
+        )
+        
+        assert response.status_code == 400
+
+
+@pytest.mark.integration
+@pytest.mark.cases
+@pytest.mark.asyncio
+class TestResponseCache:
+    """Tests para el cache de lecturas con invalidación por tags."""
+    
+    async def test_repeat_read_is_cache_hit(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que la segunda lectura se sirve desde el cache."""
+        first = await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+        second = await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+        
+        assert first.headers["X-FastAPI-Cache"] == "MISS"
+        assert second.headers["X-FastAPI-Cache"] == "HIT"
+        assert second.headers["Cache-Control"] == "no-cache"
+        assert first.json() == second.json()
+    
+    async def test_update_invalidates_case_and_list(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que una escritura invalida detalle y listado."""
+        await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+        await client.get("/cases/", headers=admin_headers)
+        
+        await client.patch(
+            f"/cases/{sample_case.id}",
+            json={"estado": "CERRADO"},
+            headers=admin_headers
+        )
+        
+        detail = await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+        listing = await client.get("/cases/", headers=admin_headers)
+        
+        assert detail.headers["X-FastAPI-Cache"] == "MISS"
+        assert detail.json()["estado"] == "CERRADO"
+        assert listing.json()["items"][0]["estado"] == "CERRADO"
+    
+    async def test_list_cache_key_normalizes_params(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        multiple_cases: list[Case]
+    ):
+        """Verifica que el orden de los parámetros no cambia la clave."""
+        await client.get("/cases/?status=ABIERTO&limit=5", headers=admin_headers)
+        response = await client.get("/cases/?limit=5&status=ABIERTO", headers=admin_headers)
+        
+        assert response.headers["X-FastAPI-Cache"] == "HIT"
+    
+    async def test_list_cache_is_keyed_by_role(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        consulta_headers: dict,
+        multiple_cases: list[Case]
+    ):
+        """Verifica que cada rol tiene su propia entrada de cache."""
+        await client.get("/cases/", headers=admin_headers)
+        response = await client.get("/cases/", headers=consulta_headers)
+        
+        assert response.headers["X-FastAPI-Cache"] == "MISS"
+
+
+@pytest.mark.integration
+@pytest.mark.cases
+@pytest.mark.asyncio
+class TestConditionalGet:
+    """Tests para ETag / Last-Modified en las lecturas de casos."""
+    
+    async def test_case_not_modified(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que un ETag vigente devuelve 304 sin cuerpo."""
+        first = await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+        etag = first.headers["ETag"]
+        
+        second = await client.get(
+            f"/cases/{sample_case.id}",
+            headers={**admin_headers, "If-None-Match": etag}
+        )
+        
+        assert etag.startswith('W/"')
+        assert "Last-Modified" in first.headers
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["ETag"] == etag
+    
+    async def test_update_changes_etag(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que una edición invalida el ETag del caso y del listado."""
+        detail = await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+        listing = await client.get("/cases/", headers=admin_headers)
+        
+        await client.patch(
+            f"/cases/{sample_case.id}",
+            json={"prioridad": "CRITICO"},
+            headers=admin_headers
+        )
+        
+        detail_after = await client.get(
+            f"/cases/{sample_case.id}",
+            headers={**admin_headers, "If-None-Match": detail.headers["ETag"]}
+        )
+        listing_after = await client.get(
+            "/cases/",
+            headers={**admin_headers, "If-None-Match": listing.headers["ETag"]}
+        )
+        assert detail_after.status_code == 200
+        assert detail_after.json()["prioridad"] == "CRITICO"
+        assert listing_after.status_code == 200
+    
+    async def test_observation_edit_changes_timeline_etag(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        case_with_observations: Case
+    ):
+        """Verifica que editar una observación actualiza el caso."""
+        url = f"/cases/{case_with_observations.id}/timeline"
+        timeline = await client.get(url, headers=admin_headers)
+        observation_id = timeline.json()[0]["id"]
+        
+        await client.patch(
+            f"/cases/observations/{observation_id}",
+            json={"content": "Contenido corregido"},
+            headers=admin_headers
+        )
+        
+        response = await client.get(url, headers={**admin_headers, "If-None-Match": timeline.headers["ETag"]})
+        assert response.status_code == 200
+        assert response.json()[0]["content"] == "Contenido corregido"
+
+    async def test_observation_and_attachment_writes_refresh_list(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        case_with_observations: Case,
+        tmp_path,
+        monkeypatch
+    ):
+        """Verifica que el listado cacheado muestra la versión nueva tras editar observaciones y adjuntos."""
+        from app.routers import files as files_router
+        monkeypatch.setattr(files_router, "UPLOAD_DIR", tmp_path)
+        case_id = case_with_observations.id
+
+        async def listed_version():
+            listing = await client.get("/cases/", headers=admin_headers)
+            return next(case["version"] for case in listing.json()["items"] if case["id"] == case_id)
+
+        version = await listed_version()
+        timeline = await client.get(f"/cases/{case_id}/timeline", headers=admin_headers)
+        await client.patch(
+            f"/cases/observations/{timeline.json()[0]['id']}",
+            json={"content": "Contenido corregido"},
+            headers=admin_headers
+        )
+        assert await listed_version() == version + 1
+
+        upload = await client.post(
+            f"/cases/{case_id}/attachments",
+            files={"file": ("evidencia.txt", b"log", "text/plain")},
+            headers=admin_headers
+        )
+        assert await listed_version() == version + 2
+
+        await client.delete(f"/cases/attachments/{upload.json()['id']}", headers=admin_headers)
+        assert await listed_version() == version + 3
+
+    async def test_list_etag_depends_on_params(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        multiple_cases: list[Case]
+    ):
+        """Verifica que el ETag del listado incluye los filtros y la página."""
+        first = await client.get("/cases/?limit=5", headers=admin_headers)
+        
+        same = await client.get("/cases/?limit=5", headers={**admin_headers, "If-None-Match": first.headers["ETag"]})
+        other_page = await client.get(
+            "/cases/?limit=5&skip=5",
+            headers={**admin_headers, "If-None-Match": first.headers["ETag"]}
+        )
+        
+        assert same.status_code == 304
+        assert other_page.status_code == 200
+    
+    async def test_if_modified_since(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica If-Modified-Since cuando el cliente no envía ETag."""
+        first = await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+        
+        response = await client.get(
+            f"/cases/{sample_case.id}",
+            headers={**admin_headers, "If-Modified-Since": first.headers["Last-Modified"]}
+        )
+        
+        assert response.status_code == 304
+    
+    async def test_stats_not_modified(
+        self, 
+        client: AsyncClient, 
+        multiple_cases: list[Case]
+    ):
+        """Verifica el 304 de las estadísticas."""
+        first = await client.get("/stats/")
+        
+        response = await client.get("/stats/", headers={"If-None-Match": first.headers["ETag"]})
+        
+        assert response.status_code == 304
+
+
+@pytest.mark.integration
+@pytest.mark.cases
+@pytest.mark.asyncio
+class TestBatchCreation:
+    """Tests para POST /cases/batch."""
+    
+    @staticmethod
+    def _case(codigo: str, **extra) -> dict:
+        return {
+            "codigo": codigo,
+            "servicio_o_plataforma": "Integración",
+            "prioridad": "BAJO",
+            "novedades_y_comentarios": "Alta automática",
+            **extra
+        }
+    
+    async def test_batch_create(
+        self, 
+        client: AsyncClient, 
+        ingreso_headers: dict
+    ):
+        """Verifica el alta de varios casos con sus observaciones."""
+        cases = [self._case(f"INT-{i:03d}", observaciones=f"Alerta {i}" if i % 2 else None) for i in range(20)]
+        
+        response = await client.post("/cases/batch", json=cases, headers=ingreso_headers)
+        
+        assert response.status_code == 200
+        created = response.json()
+        assert [case["codigo"] for case in created] == [case["codigo"] for case in cases]
+        timeline = await client.get(f"/cases/{created[1]['id']}/timeline", headers=ingreso_headers)
+        assert [item["content"] for item in timeline.json()] == ["Alerta 1"]
+    
+    async def test_batch_with_existing_code_creates_nothing(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que un código existente hace fallar todo el lote."""
+        codigo = sample_case.codigo
+        cases = [self._case("INT-NEW"), self._case(codigo)]
+        
+        response = await client.post("/cases/batch", json=cases, headers=admin_headers)
+        
+        assert response.status_code == 400
+        assert response.json()["detail"] == f"Case code already exists: {codigo}"
+        listing = await client.get("/cases/?search=INT-NEW", headers=admin_headers)
+        assert listing.json()["total"] == 0
+    
+    async def test_batch_duplicate_codes(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict
+    ):
+        """Verifica que se rechazan códigos repetidos dentro del lote."""
+        cases = [self._case("INT-DUP"), self._case("INT-DUP")]
+        
+        response = await client.post("/cases/batch", json=cases, headers=admin_headers)
+        
+        assert response.status_code == 400
+        assert "INT-DUP" in response.json()["detail"]
+
+    async def test_batch_other_integrity_error_does_not_blame_codes(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        monkeypatch
+    ):
+        """Verifica que otra restricción violada no se reporta como código duplicado."""
+        from sqlalchemy.exc import IntegrityError
+        from app.routers import cases as cases_router
+
+        async def failing_insert(session, cases, user_id):
+            raise IntegrityError("INSERT INTO observation", {}, Exception("FOREIGN KEY constraint failed"))
+
+        monkeypatch.setattr(cases_router, "insert_cases", failing_insert)
+
+        batch = await client.post("/cases/batch", json=[self._case("INT-FK")], headers=admin_headers)
+        single = await client.post("/cases/", json=self._case("INT-FK"), headers=admin_headers)
+
+        assert batch.status_code == 400
+        assert batch.json()["detail"] == "Database integrity error"
+        assert single.json()["detail"] == "Database integrity error"
+
+    async def test_batch_as_consulta_forbidden(
+        self, 
+        client: AsyncClient, 
+        consulta_headers: dict
+    ):
+        """Verifica que CONSULTA no puede crear casos en lote."""
+        response = await client.post("/cases/batch", json=[self._case("INT-X")], headers=consulta_headers)
+        
+        assert response.status_code == 403
+
+
+@pytest.mark.integration
+@pytest.mark.cases
+@pytest.mark.asyncio
+class TestOptimisticConcurrency:
+    """Tests para la columna version y PATCH con If-Match."""
+    
+    async def test_update_increments_version(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que cada escritura incrementa la versión."""
+        version = sample_case.version
+        response = await client.patch(
+            f"/cases/{sample_case.id}",
+            json={"prioridad": "CRITICO"},
+            headers={**admin_headers, "If-Match": str(version)}
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["version"] == version + 1
+    
+    async def test_stale_version_conflict(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que un segundo operador con la versión vieja recibe 409."""
+        stale = (await client.get(f"/cases/{sample_case.id}", headers=admin_headers)).json()["version"]
+        await client.patch(
+            f"/cases/{sample_case.id}",
+            json={"sby_responsable": "Operador A"},
+            headers={**admin_headers, "If-Match": str(stale)}
+        )
+        
+        response = await client.patch(
+            f"/cases/{sample_case.id}",
+            json={"sby_responsable": "Operador B"},
+            headers={**admin_headers, "If-Match": f'"{stale}"'}
+        )
+        
+        assert response.status_code == 409
+        assert f"current version {stale + 1}" in response.json()["detail"]
+        current = (await client.get(f"/cases/{sample_case.id}", headers=admin_headers)).json()
+        assert current["sby_responsable"] == "Operador A"
+    
+    async def test_invalid_if_match(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que un If-Match que no es una versión devuelve 400."""
+        response = await client.patch(
+            f"/cases/{sample_case.id}",
+            json={"prioridad": "BAJO"},
+            headers={**admin_headers, "If-Match": "abc"}
+        )
+        
+        assert response.status_code == 400
+    
+    async def test_etag_roundtrip(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que PATCH acepta en If-Match el ETag de GET y rechaza uno viejo con 412."""
+        etag = (await client.get(f"/cases/{sample_case.id}", headers=admin_headers)).headers["ETag"]
+
+        first = await client.patch(
+            f"/cases/{sample_case.id}",
+            json={"sby_responsable": "Operador A"},
+            headers={**admin_headers, "If-Match": etag}
+        )
+        stale = await client.patch(
+            f"/cases/{sample_case.id}",
+            json={"sby_responsable": "Operador B"},
+            headers={**admin_headers, "If-Match": etag}
+        )
+        
+        assert first.status_code == 200
+        assert stale.status_code == 412
+        current = await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+        assert current.json()["sby_responsable"] == "Operador A"
+        assert current.headers["ETag"] != etag
+    
+    async def test_bulk_update_increments_version(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        multiple_cases: list[Case]
+    ):
+        """Verifica que la actualización masiva incrementa la versión."""
+        case = next(c for c in multiple_cases if c.estado != CaseStatus.CERRADO)
+        case_id, version = case.id, case.version
+        
+        await client.post(
+            "/cases/bulk-update",
+            json={"ids": [case_id], "action": "CLOSE", "value": "CERRADO"},
+            headers=admin_headers
+        )
+        
+        response = await client.get(f"/cases/{case_id}", headers=admin_headers)
+        assert response.json()["version"] == version + 1
+    
+    async def test_detail_etag_follows_version(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        """Verifica que el ETag del detalle se deriva de la versión."""
+        response = await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+        
+        assert response.headers["ETag"] == make_etag("case", sample_case.id, sample_case.version)
+
+
+@pytest.mark.integration
+@pytest.mark.cases
+@pytest.mark.asyncio
+class TestBulkJobs:
+    """Tests para actualizaciones masivas en segundo plano."""
+    
+    async def test_large_bulk_update_runs_as_job(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        db_session: AsyncSession,
+        multiple_cases: list[Case],
+        monkeypatch
+    ):
+        """Verifica que por encima del umbral se crea un trabajo por bloques."""
+        from app.routers import cases as cases_router
+        monkeypatch.setattr(cases_router, "BULK_ASYNC_THRESHOLD", 3)
+        monkeypatch.setattr(cases_router, "BULK_CHUNK_SIZE", 2)
+        
+        ids = [case.id for case in multiple_cases[:5]]
+        response = await client.post(
+            "/cases/bulk-update",
+            json={"ids": ids, "action": "ASSIGN", "value": "Turno Noche"},
+            headers=admin_headers
+        )
+        
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        
+        job = (await client.get(f"/cases/bulk-jobs/{job_id}", headers=admin_headers)).json()
+        assert job["status"] == "COMPLETED"
+        assert job["total"] == 5
+        assert job["processed"] == 5
+        assert job["updated"] == 5
+        
+        # El trabajo escribe con sus propias sesiones
+        db_session.expire_all()
+        case = await db_session.get(Case, ids[4])
+        assert case.sby_responsable == "Turno Noche"
+    
+    async def test_failed_chunk_does_not_roll_back_others(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        multiple_cases: list[Case],
+        monkeypatch
+    ):
+        """Verifica que un bloque fallido no deshace los demás."""
+        from app.routers import cases as cases_router
+        monkeypatch.setattr(cases_router, "BULK_ASYNC_THRESHOLD", 3)
+        monkeypatch.setattr(cases_router, "BULK_CHUNK_SIZE", 2)
+        
+        ids = [case.id for case in multiple_cases[:6]]
+        original = cases_router.apply_bulk_update
+        
+        async def flaky_apply(session, chunk, *args):
+            if ids[2] in chunk:
+                raise RuntimeError("lock timeout")
+            return await original(session, chunk, *args)
+        
+        monkeypatch.setattr(cases_router, "apply_bulk_update", flaky_apply)
+        
+        response = await client.post(
+            "/cases/bulk-update",
+            json={"ids": ids, "action": "ASSIGN", "value": "Turno Noche"},
+            headers=admin_headers
+        )
+        job = (await client.get(f"/cases/bulk-jobs/{response.json()['job_id']}", headers=admin_headers)).json()
+        
+        assert job["status"] == "COMPLETED_WITH_ERRORS"
+        assert job["updated"] == 4
+        assert job["failed_ids"] == ids[2:4]
+        assert "lock timeout" in job["errors"][0]
+
+    async def test_stale_job_is_marked_failed(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        db_session: AsyncSession,
+        admin_user: User
+    ):
+        """Verifica que un trabajo sin latido (worker reiniciado) pasa a FAILED y uno vivo no."""
+        from app.models import BulkJob, BulkJobStatus
+        from app.routers.cases import fail_stale_bulk_jobs
+        long_ago = datetime.utcnow() - timedelta(hours=2)
+        orphan = BulkJob(action="ASSIGN", value="X", total=5000, status=BulkJobStatus.RUNNING,
+                         created_by_id=admin_user.id, created_at=long_ago, heartbeat_at=long_ago)
+        polled = BulkJob(action="ASSIGN", value="X", total=5000, created_by_id=admin_user.id, created_at=long_ago)
+        alive = BulkJob(action="ASSIGN", value="X", total=5000, status=BulkJobStatus.RUNNING,
+                        created_by_id=admin_user.id, created_at=long_ago, heartbeat_at=datetime.utcnow())
+        db_session.add_all([orphan, polled, alive])
+        await db_session.commit()
+
+        # Lo que hace el arranque de un worker, acotado a un trabajo
+        assert await fail_stale_bulk_jobs(db_session, orphan.id) == 1
+        # Sondeo de un PENDING que nunca arrancó
+        polled_job = (await client.get(f"/cases/bulk-jobs/{polled.id}", headers=admin_headers)).json()
+        alive_job = (await client.get(f"/cases/bulk-jobs/{alive.id}", headers=admin_headers)).json()
+
+        await db_session.refresh(orphan)
+        assert orphan.status == BulkJobStatus.FAILED
+        assert orphan.finished_at is not None
+        assert polled_job["status"] == "FAILED"
+        assert alive_job["status"] == "RUNNING"
+
+    async def test_get_nonexistent_bulk_job(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict
+    ):
+        """Verifica que un trabajo inexistente devuelve 404."""
+        response = await client.get("/cases/bulk-jobs/99999", headers=admin_headers)
+        
+        assert response.status_code == 404
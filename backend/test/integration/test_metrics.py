@@ -0,0 +1,64 @@
+"""
+Tests de integración para el endpoint de métricas Prometheus.
+"""
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from app.models import Case
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestMetrics:
+
+    async def test_metrics_exposition_format(self, client: AsyncClient):
+        response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert "db_pool_connections" in response.text
+
+    async def test_latency_labeled_by_route_template(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        labels = {"method": "GET", "route": "/cases/{case_id}", "status": "200"}
+        before = _sample("http_request_duration_seconds_count", **labels)
+
+        await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+
+        assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+        # La ruta concreta no genera su propia serie
+        assert REGISTRY.get_sample_value(
+            "http_request_duration_seconds_count",
+            {**labels, "route": f"/cases/{sample_case.id}"}
+        ) is None
+        assert _sample("http_requests_in_progress", method="GET") == 0
+
+    async def test_unmatched_route_label(self, client: AsyncClient):
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = _sample("http_request_duration_seconds_count", **labels)
+
+        await client.get("/no-existe/123")
+
+        assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+
+    async def test_cache_requests_counted(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        sample_case: Case
+    ):
+        before = _sample("cache_requests_total", tier="l1", result="hits")
+
+        await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+        await client.get(f"/cases/{sample_case.id}", headers=admin_headers)
+
+        assert _sample("cache_requests_total", tier="l1", result="hits") > before
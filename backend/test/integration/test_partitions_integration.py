@@ -0,0 +1,63 @@
+"""
+Tests de integración del particionado mensual. Solo PostgreSQL: con
+SQLite se omiten. El DDL corre dentro de la transacción del test.
+"""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.models import Case, Observation
+from partitions import convert_table, detach_partitions, ensure_partitions, is_partitioned, list_partitions
+
+
+@pytest.fixture(autouse=True)
+def _postgres_only(db_connection: AsyncConnection):
+    if db_connection.dialect.name != "postgresql":
+        pytest.skip("Particionado declarativo: solo PostgreSQL")
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestPartitions:
+
+    async def test_convert_keeps_rows_and_orm(
+        self,
+        db_connection: AsyncConnection,
+        db_session: AsyncSession,
+        case_with_observations: Case
+    ):
+        case_id = case_with_observations.id
+        before = (await db_connection.execute(text("SELECT count(*) FROM observation"))).scalar()
+
+        assert await convert_table(db_connection, "observation") is True
+
+        assert await is_partitioned(db_connection, "observation")
+        assert (await db_connection.execute(text("SELECT count(*) FROM observation"))).scalar() == before
+        db_session.expunge_all()
+        observation = Observation(case_id=case_id, content="Después de particionar")
+        db_session.add(observation)
+        await db_session.commit()
+        assert (await db_session.get(Observation, observation.id)).content == "Después de particionar"
+
+    async def test_historical_rows_move_to_their_month(
+        self,
+        db_connection: AsyncConnection,
+        db_session: AsyncSession,
+        sample_case: Case
+    ):
+        await convert_table(db_connection, "observation")
+        db_session.add(Observation(case_id=sample_case.id, content="Importada", created_at=datetime(2020, 3, 5)))
+        await db_session.commit()
+
+        created = await ensure_partitions(db_connection, since=date(2020, 3, 1))
+
+        assert "observation_2020_03" in created
+        moved = (await db_connection.execute(text("SELECT count(*) FROM observation_2020_03"))).scalar()
+        assert moved == 1
+
+        detached = await detach_partitions(db_connection, before=date(2021, 1, 1), drop=True)
+
+        assert "observation_2020_03" in detached
+        assert "observation_2020_03" not in await list_partitions(db_connection, "observation")
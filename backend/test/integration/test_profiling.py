@@ -0,0 +1,88 @@
+"""
+Tests de integración para el perfilado de requests bajo demanda.
+"""
+import pstats
+import pytest
+from httpx import AsyncClient
+from app.models import Case
+from app.profiling import clear_profiles
+
+
+@pytest.fixture(autouse=True)
+def reset_profiles():
+    clear_profiles()
+    yield
+    clear_profiles()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestRequestProfiling:
+
+    async def test_admin_cprofile_artifact(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        multiple_cases: list[Case],
+        tmp_path
+    ):
+        response = await client.get("/cases/", headers={**admin_headers, "X-Profile": "1"})
+
+        assert response.status_code == 200
+        assert response.json()["total"] == len(multiple_cases)
+        profile_id = response.headers["X-Profile-Id"]
+
+        listing = await client.get("/stats/profiles", headers=admin_headers)
+        assert listing.json()[0]["id"] == profile_id
+        assert listing.json()[0]["path"] == "/cases/"
+        assert listing.json()[0]["format"] == "pstats"
+
+        artifact = await client.get(f"/stats/profiles/{profile_id}", headers=admin_headers)
+        assert artifact.status_code == 200
+        path = tmp_path / "request.prof"
+        path.write_bytes(artifact.content)
+        stats = pstats.Stats(str(path))
+        assert any(func[2] == "read_cases" for func in stats.stats)
+
+    async def test_admin_sampled_collapsed_stacks(
+        self,
+        client: AsyncClient,
+        admin_headers: dict
+    ):
+        response = await client.get("/cases/", headers={**admin_headers, "X-Profile": "sample"})
+        profile_id = response.headers["X-Profile-Id"]
+
+        artifact = await client.get(f"/stats/profiles/{profile_id}", headers=admin_headers)
+
+        assert artifact.headers["content-type"].startswith("text/plain")
+        for line in artifact.text.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) > 0
+
+    async def test_non_admin_is_not_profiled(
+        self,
+        client: AsyncClient,
+        consulta_headers: dict
+    ):
+        response = await client.get("/cases/", headers={**consulta_headers, "X-Profile": "1"})
+
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+
+    async def test_without_header_is_not_profiled(
+        self,
+        client: AsyncClient,
+        admin_headers: dict
+    ):
+        response = await client.get("/cases/", headers=admin_headers)
+
+        assert "X-Profile-Id" not in response.headers
+
+    async def test_profile_endpoints_admin_only(
+        self,
+        client: AsyncClient,
+        consulta_headers: dict,
+        admin_headers: dict
+    ):
+        assert (await client.get("/stats/profiles", headers=consulta_headers)).status_code == 403
+        assert (await client.get("/stats/profiles/missing", headers=admin_headers)).status_code == 404
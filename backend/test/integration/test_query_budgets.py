@@ -0,0 +1,162 @@
+"""
+Tests de integración para el presupuesto de consultas SQL por endpoint.
+Un endpoint que pasa a hacer consultas por fila (N+1) hace fallar CI.
+"""
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Case, CaseAudit
+from app.routers.cases import _timeline_query
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestQueryBudgets:
+    """
+    Presupuestos de consultas por endpoint (incluye la del usuario autenticado
+    y la del validador del GET condicional).
+    """
+    
+    async def test_stats_budget(
+        self, 
+        client: AsyncClient, 
+        multiple_cases: list[Case],
+        assert_query_budget
+    ):
+        response = await client.get("/stats/")
+        
+        assert response.status_code == 200
+        assert response.json()["total_cases"] == len(multiple_cases)
+        assert_query_budget(response, 2)
+    
+    async def test_sla_stats_budget(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        multiple_cases: list[Case],
+        assert_query_budget
+    ):
+        # Usuario, validador y una sola consulta para todos los agregados
+        response = await client.get("/stats/sla", headers=admin_headers)
+
+        assert response.status_code == 200
+        assert_query_budget(response, 3)
+
+    async def test_case_list_budget(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        multiple_cases: list[Case],
+        assert_query_budget
+    ):
+        response = await client.get("/cases/?limit=5", headers=admin_headers)
+        
+        assert response.json()["total"] == len(multiple_cases)
+        assert_query_budget(response, 3)
+    
+    async def test_case_list_out_of_range_page(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        multiple_cases: list[Case]
+    ):
+        """Verifica el total cuando la página pedida está vacía."""
+        response = await client.get("/cases/?skip=50&limit=5", headers=admin_headers)
+        
+        assert response.json()["items"] == []
+        assert response.json()["total"] == len(multiple_cases)
+    
+    async def test_case_detail_budget(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        case_with_observations: Case,
+        assert_query_budget
+    ):
+        response = await client.get(f"/cases/{case_with_observations.id}", headers=admin_headers)
+        
+        assert_query_budget(response, 5)
+    
+    async def test_timeline_budget(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        case_with_observations: Case,
+        assert_query_budget
+    ):
+        response = await client.get(f"/cases/{case_with_observations.id}/timeline", headers=admin_headers)
+        
+        assert_query_budget(response, 4)
+
+    async def test_empty_timeline_poll_budget(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        case_with_observations: Case,
+        assert_query_budget
+    ):
+        """Un poll incremental sin novedades no consulta el archivo."""
+        url = f"/cases/{case_with_observations.id}/timeline"
+        cursor = (await client.get(url, params={"limit": 50}, headers=admin_headers)).json()["cursor"]
+
+        response = await client.get(url, params={"after": cursor}, headers=admin_headers)
+
+        assert response.json()["items"] == []
+        # Usuario, validador y la consulta del timeline
+        assert_query_budget(response, 3)
+
+    async def test_timeline_poll_uses_indexes(self, db_session: AsyncSession):
+        """El poll y su validador leen los índices (case_id, fecha), no las tablas enteras."""
+        if db_session.bind.dialect.name != "sqlite":
+            pytest.skip("EXPLAIN QUERY PLAN: solo SQLite")
+        queries = [
+            _timeline_query(1, (datetime(2024, 1, 1), "AUDIT", 1), 51),
+            select(func.max(CaseAudit.id)).where(CaseAudit.case_id == 1),
+        ]
+
+        plan = []
+        for query in queries:
+            sql = str(query.compile(dialect=db_session.bind.dialect, compile_kwargs={"literal_binds": True}))
+            plan += [row[-1] for row in (await db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()]
+
+        assert not [step for step in plan if step.startswith("SCAN")]
+        assert any("ix_observation_case_id_created_at" in step for step in plan)
+        assert any("ix_caseaudit_case_id_recorded_at" in step for step in plan)
+    
+    async def test_create_case_budget(
+        self, 
+        client: AsyncClient, 
+        admin_headers: dict,
+        assert_query_budget
+    ):
+        """
+        Caso y observación inicial: un INSERT cada uno, sin SELECT previo ni
+        refresh (en los tests el commit es un RELEASE SAVEPOINT y cuenta).
+        """
+        response = await client.post(
+            "/cases/",
+            json={
+                "codigo": "BUDGET-1",
+                "servicio_o_plataforma": "Servicio",
+                "prioridad": "MEDIO",
+                "novedades_y_comentarios": "Comentario",
+                "observaciones": "Inicial"
+            },
+            headers=admin_headers
+        )
+        
+        assert response.status_code == 200
+        assert_query_budget(response, 4)
+    
+    async def test_server_timing_header(
+        self, 
+        client: AsyncClient, 
+        multiple_cases: list[Case]
+    ):
+        response = await client.get("/stats/")
+        
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+        assert 'desc="2 queries"' in response.headers["Server-Timing"]
@@ -0,0 +1,150 @@
+"""
+Tests de integración para GET /stats/sla (tiempos hasta el cierre).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Case, CaseStatus, Priority, User
+from app.routers.stats import _sla_durations, _sla_groups_frame, _sla_groups_sql
+
+
+@pytest_asyncio.fixture
+async def closed_cases(client: AsyncClient, admin_headers: dict, db_session: AsyncSession, admin_user: User):
+    """
+    Tres casos importados con fecha_fin (1, 2 y 3 horas), uno cerrado desde la
+    app hace poco tras 10 horas abierto, uno cerrado fuera de la ventana y
+    uno abierto.
+    """
+    now = datetime.utcnow()
+    cases = [
+        Case(
+            codigo=f"SLA-{hours}",
+            servicio_o_plataforma="Red",
+            prioridad=Priority.ALTO,
+            sby_responsable="Ana",
+            estado=CaseStatus.CERRADO,
+            fecha_inicio=now - timedelta(days=1, hours=hours),
+            fecha_fin=now - timedelta(days=1),
+            creado_por_id=admin_user.id,
+        )
+        for hours in (1, 2, 3)
+    ]
+    cases.append(Case(
+        codigo="SLA-OLD",
+        servicio_o_plataforma="Red",
+        prioridad=Priority.ALTO,
+        estado=CaseStatus.CERRADO,
+        fecha_inicio=now - timedelta(days=200, hours=5),
+        fecha_fin=now - timedelta(days=200),
+        creado_por_id=admin_user.id,
+    ))
+    in_app = Case(
+        codigo="SLA-APP",
+        servicio_o_plataforma="Web",
+        prioridad=Priority.BAJO,
+        estado=CaseStatus.ABIERTO,
+        fecha_inicio=now - timedelta(hours=10),
+        creado_por_id=admin_user.id,
+    )
+    cases.append(in_app)
+    cases.append(Case(
+        codigo="SLA-OPEN",
+        servicio_o_plataforma="Web",
+        prioridad=Priority.BAJO,
+        estado=CaseStatus.ABIERTO,
+        fecha_inicio=now - timedelta(days=3),
+        creado_por_id=admin_user.id,
+    ))
+    db_session.add_all(cases)
+    await db_session.commit()
+
+    response = await client.patch(f"/cases/{in_app.id}", json={"estado": "CERRADO"}, headers=admin_headers)
+    assert response.status_code == 200
+    return cases
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+class TestSlaStats:
+
+    async def test_requires_auth(self, client: AsyncClient):
+        response = await client.get("/stats/sla")
+
+        assert response.status_code == 401
+
+    async def test_overall_and_groups(self, client: AsyncClient, admin_headers: dict, closed_cases):
+        response = await client.get("/stats/sla", headers=admin_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        overall = data["overall"]
+        assert overall["count"] == 4
+        assert overall["median_hours"] == pytest.approx(2.5, abs=0.01)
+        # p90 interpolado sobre 1, 2, 3 y 10 horas
+        assert overall["p90_hours"] == pytest.approx(7.9, abs=0.01)
+
+        by_priority = {entry["key"]: entry for entry in data["by_priority"]}
+        assert by_priority["ALTO"]["count"] == 3
+        assert by_priority["ALTO"]["mean_hours"] == pytest.approx(2.0, abs=0.01)
+        assert by_priority["ALTO"]["p90_hours"] == pytest.approx(2.8, abs=0.01)
+        assert by_priority["BAJO"]["median_hours"] == pytest.approx(10.0, abs=0.01)
+
+        assert [entry["key"] for entry in data["by_service"]] == ["Red", "Web"]
+        assert {entry["key"]: entry["count"] for entry in data["by_sby_responsable"]} == {"Ana": 3, None: 1}
+
+    async def test_window(self, client: AsyncClient, admin_headers: dict, closed_cases):
+        now = datetime.utcnow()
+        old = await client.get(
+            "/stats/sla",
+            params={"start_date": (now - timedelta(days=365)).isoformat(), "end_date": (now - timedelta(days=100)).isoformat()},
+            headers=admin_headers,
+        )
+        empty = await client.get(
+            "/stats/sla",
+            params={"start_date": (now - timedelta(days=100)).isoformat(), "end_date": (now - timedelta(days=50)).isoformat()},
+            headers=admin_headers,
+        )
+        invalid = await client.get(
+            "/stats/sla",
+            params={"start_date": now.isoformat(), "end_date": (now - timedelta(days=1)).isoformat()},
+            headers=admin_headers,
+        )
+
+        assert old.json()["overall"]["count"] == 1
+        assert old.json()["overall"]["mean_hours"] == pytest.approx(5.0, abs=0.01)
+        assert empty.json()["overall"] == {"count": 0, "mean_hours": None, "median_hours": None, "p90_hours": None}
+        assert empty.json()["by_priority"] == []
+        assert invalid.status_code == 400
+
+    async def test_cache_refreshes_on_write(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        closed_cases
+    ):
+        first = await client.get("/stats/sla", headers=admin_headers)
+        reopened = next(case for case in closed_cases if case.codigo == "SLA-OPEN")
+
+        await client.patch(f"/cases/{reopened.id}", json={"estado": "CERRADO"}, headers=admin_headers)
+
+        second = await client.get("/stats/sla", headers={**admin_headers, "If-None-Match": first.headers["ETag"]})
+        assert second.status_code == 200
+        assert second.json()["overall"]["count"] == first.json()["overall"]["count"] + 1
+
+    async def test_sql_matches_frame(self, db_session: AsyncSession, closed_cases):
+        """En PostgreSQL los percentiles en SQL coinciden con el cálculo en pandas."""
+        if db_session.bind.dialect.name != "postgresql":
+            pytest.skip("percentile_cont: solo PostgreSQL")
+        now = datetime.utcnow()
+        durations = _sla_durations(now - timedelta(days=90), now)
+
+        sql = sorted(await _sla_groups_sql(db_session, durations), key=str)
+        frame = sorted(await _sla_groups_frame(db_session, durations), key=str)
+
+        assert [row[:3] for row in sql] == [row[:3] for row in frame]
+        for sql_row, frame_row in zip(sql, frame):
+            assert [float(value) for value in sql_row[3:]] == pytest.approx([float(value) for value in frame_row[3:]])
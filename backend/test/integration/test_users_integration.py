@@ -390,3 +390,31 @@ class TestInactiveUserBehavior:
             }
         )
         assert login_response.status_code == 200
+
+
+@pytest.mark.integration
+@pytest.mark.users
+@pytest.mark.asyncio
+class TestUserNameCacheInvalidation:
+    """Tests para la invalidación del cache de nombres de usuario."""
+
+    async def test_timeline_reflects_renamed_user(
+        self,
+        client: AsyncClient,
+        admin_headers: dict,
+        admin_user: User,
+        case_with_observations
+    ):
+        """Verifica que renombrar un usuario invalida su nombre cacheado."""
+        url = f"/cases/{case_with_observations.id}/timeline"
+        response = await client.get(url, headers=admin_headers)
+        assert response.json()[0]["user_name"] == "Admin User"
+
+        await client.patch(
+            f"/users/{admin_user.id}",
+            json={"nombre": "Admin Renombrado"},
+            headers=admin_headers
+        )
+
+        response = await client.get(url, headers=admin_headers)
+        assert response.json()[0]["user_name"] == "Admin Renombrado"
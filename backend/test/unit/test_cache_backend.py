@@ -0,0 +1,163 @@
+"""
+Tests unitarios para el backend de cache de dos niveles (L1 + L2).
+"""
+import pytest
+
+from app.cache import TieredBackend
+
+
+class DictBackend:
+    """L2 de prueba en memoria."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get_with_ttl(self, key):
+        return (60, self.store[key]) if key in self.store else (0, None)
+
+    async def set(self, key, value, expire=None):
+        self.store[key] = value
+
+    async def clear(self, namespace=None, key=None):
+        self.store.clear()
+        return 0
+
+
+class FlakyBackend(DictBackend):
+    """L2 de prueba que se puede tirar y levantar."""
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+
+    async def get_with_ttl(self, key):
+        if self.down:
+            raise ConnectionError("redis unreachable")
+        return await super().get_with_ttl(key)
+
+    async def set(self, key, value, expire=None):
+        if self.down:
+            raise ConnectionError("redis unreachable")
+        await super().set(key, value, expire)
+
+
+class BrokenBackend:
+    """L2 de prueba que simula un Redis caído."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get_with_ttl(self, key):
+        self.calls += 1
+        raise ConnectionError("redis unreachable")
+
+    async def set(self, key, value, expire=None):
+        self.calls += 1
+        raise ConnectionError("redis unreachable")
+
+    async def clear(self, namespace=None, key=None):
+        self.calls += 1
+        raise ConnectionError("redis unreachable")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestTieredBackend:
+
+    async def test_l1_hit_after_set(self):
+        backend = TieredBackend(DictBackend())
+        await backend.set("k", b"v", 60)
+
+        ttl, value = await backend.get_with_ttl("k")
+
+        assert value == b"v"
+        assert ttl > 0
+        assert backend.stats()["l1_hits"] == 1
+
+    async def test_l2_hit_populates_l1(self):
+        l2 = DictBackend()
+        l2.store["k"] = b"v"
+        backend = TieredBackend(l2)
+
+        assert await backend.get("k") == b"v"
+        assert await backend.get("k") == b"v"
+
+        stats = backend.stats()
+        assert stats["l2_hits"] == 1
+        assert stats["l1_hits"] == 1
+
+    async def test_miss_in_both_tiers(self):
+        backend = TieredBackend(DictBackend())
+
+        assert await backend.get("missing") is None
+
+        stats = backend.stats()
+        assert stats["l1_misses"] == 1
+        assert stats["l2_misses"] == 1
+
+    async def test_l1_is_bounded(self):
+        backend = TieredBackend(maxsize=2)
+        for key in ("a", "b", "c"):
+            await backend.set(key, b"x", 60)
+
+        assert await backend.get("a") is None
+        assert backend.stats()["l1_size"] == 2
+
+    async def test_l1_entries_expire(self):
+        backend = TieredBackend(l1_ttl=0)
+        await backend.set("k", b"v", 60)
+
+        assert await backend.get("k") is None
+
+    async def test_falls_back_to_l1_when_l2_down(self):
+        l2 = BrokenBackend()
+        backend = TieredBackend(l2, retry_interval=60)
+
+        await backend.set("k", b"v", 60)
+        assert await backend.get("k") == b"v"
+        assert await backend.get("other") is None
+
+        stats = backend.stats()
+        assert stats["l2_available"] is False
+        assert stats["l2_errors"] == 1
+        # Tras el primer error no se vuelve a intentar hasta el reintento
+        assert l2.calls == 1
+
+    async def test_retries_l2_after_interval(self):
+        l2 = BrokenBackend()
+        backend = TieredBackend(l2, retry_interval=0)
+
+        await backend.get("k")
+        await backend.get("k")
+
+        assert l2.calls == 2
+
+    async def test_tag_bumped_during_outage_reaches_l2(self):
+        """Caída -> invalidación -> recuperación: L2 acaba con la versión nueva."""
+        l2 = FlakyBackend()
+        backend = TieredBackend(l2, retry_interval=0, l1_ttl=0)
+        tag_key = "fastapi-cache:tag:case-list"
+        await backend.set(tag_key, b"1", 60)
+
+        l2.down = True
+        await backend.set(tag_key, b"2", 60)
+        assert l2.store[tag_key] == b"1"
+        assert backend.stats()["unsynced_tags"] == 1
+
+        l2.down = False
+        # Cualquier operación tras la recuperación publica antes la versión
+        # pendiente; L1 ya expiró, así que se lee de L2
+        assert await backend.get(tag_key) == b"2"
+        assert l2.store[tag_key] == b"2"
+        assert backend.stats()["unsynced_tags"] == 0
+
+    async def test_only_tags_are_replayed(self):
+        l2 = FlakyBackend()
+        backend = TieredBackend(l2, retry_interval=0)
+
+        l2.down = True
+        await backend.set("fastapi-cache:entry", b"payload", 60)
+        l2.down = False
+        await backend.get("other")
+
+        assert "fastapi-cache:entry" not in l2.store
@@ -0,0 +1,107 @@
+"""
+Tests unitarios para el middleware de compresión.
+"""
+import pytest
+import zstandard
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from app.compression import CompressionMiddleware, choose_encoding
+
+TEXT = "línea de exportación;ABIERTO;Pagos\n" * 200
+
+
+async def _large(request):
+    return PlainTextResponse(TEXT)
+
+
+async def _small(request):
+    return PlainTextResponse("ok")
+
+
+async def _stream(request):
+    async def chunks():
+        for _ in range(5):
+            yield TEXT.encode()
+    return StreamingResponse(chunks(), media_type="text/csv")
+
+
+async def _pdf(request):
+    return Response(b"%PDF" + b"0" * 5000, media_type="application/pdf")
+
+
+def _client(**kwargs) -> AsyncClient:
+    app = Starlette(routes=[
+        Route("/large", _large),
+        Route("/small", _small),
+        Route("/stream", _stream),
+        Route("/pdf", _pdf),
+    ])
+    return AsyncClient(app=CompressionMiddleware(app, minimum_size=500, **kwargs), base_url="http://test")
+
+
+@pytest.mark.unit
+class TestChooseEncoding:
+
+    def test_prefers_server_order_on_equal_q(self):
+        assert choose_encoding("gzip, br, zstd", ["br", "zstd", "gzip"]) == "br"
+
+    def test_highest_q_wins(self):
+        assert choose_encoding("br;q=0.5, zstd;q=0.9, gzip;q=0.1", ["br", "zstd", "gzip"]) == "zstd"
+
+    def test_unavailable_and_excluded(self):
+        assert choose_encoding("br", ["gzip"]) is None
+        assert choose_encoding("gzip;q=0", ["gzip"]) is None
+        assert choose_encoding("*", ["zstd", "gzip"]) == "zstd"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestCompressionMiddleware:
+
+    async def test_gzip_large_response(self):
+        async with _client(encodings=["gzip"]) as client:
+            response = await client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(TEXT.encode())
+        assert response.text == TEXT
+
+    async def test_small_response_not_compressed(self):
+        async with _client() as client:
+            response = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.text == "ok"
+
+    async def test_already_compressed_type_skipped(self):
+        async with _client() as client:
+            response = await client.get("/pdf", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+
+    async def test_streaming_compressed_per_chunk(self):
+        async with _client(encodings=["gzip"]) as client:
+            response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text == TEXT * 5
+
+    async def test_zstd_when_accepted(self):
+        async with _client(encodings=["zstd", "gzip"]) as client:
+            async with client.stream("GET", "/large", headers={"Accept-Encoding": "zstd"}) as response:
+                raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+        assert response.headers["content-encoding"] == "zstd"
+        assert zstandard.ZstdDecompressor().decompressobj().decompress(raw).decode() == TEXT
+
+    async def test_no_accept_encoding(self):
+        async with _client() as client:
+            response = await client.get("/large", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+        assert response.text == TEXT
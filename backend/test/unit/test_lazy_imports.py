@@ -0,0 +1,29 @@
+"""
+Tests unitarios para la carga diferida de dependencias pesadas.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "xlsxwriter")
+
+
+@pytest.mark.unit
+class TestLazyImports:
+
+    def test_app_import_does_not_load_data_stack(self, tmp_path):
+        # Proceso nuevo: en el de pytest otros tests ya pudieron importar pandas
+        code = f"import sys, app.main; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=tmp_path,
+            env={"PYTHONPATH": str(BACKEND_DIR), "PATH": ""},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert result.stdout.strip() == ""
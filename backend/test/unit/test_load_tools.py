@@ -0,0 +1,69 @@
+"""
+Tests unitarios para el generador de datos sintéticos y el informe de la
+prueba de carga.
+"""
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.models import Case, CaseAudit, CaseStatus, Observation, User, UserRole
+from generate_dataset import build_parser, generate
+from load_test import Stats, percentile
+
+
+@pytest.mark.unit
+class TestLoadTestReport:
+
+    def test_percentile_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+        assert percentile([], 99) == 0.0
+
+    def test_report_per_endpoint(self):
+        stats = Stats()
+        for latency in (0.010, 0.020, 0.030, 0.040):
+            stats.record("GET /cases/", latency, ok=True)
+        stats.record("GET /stats/", 0.5, ok=False)
+
+        report = stats.report(elapsed=2.0)
+
+        assert report["GET /cases/"]["requests"] == 4
+        assert report["GET /cases/"]["rps"] == 2.0
+        assert report["GET /cases/"]["p50_ms"] == 20.0
+        assert report["GET /cases/"]["p99_ms"] == 40.0
+        assert report["GET /stats/"]["errors"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestDatasetGenerator:
+
+    async def test_generates_requested_volumes(self, db_session):
+        args = build_parser().parse_args(["--users", "10", "--cases", "200", "--prefix", "UT"])
+
+        counts = await generate(db_session, args)
+
+        assert counts["user"] == 10
+        assert counts["case"] == 200
+        assert await db_session.scalar(select(func.count()).select_from(Case)) == 200
+        assert await db_session.scalar(select(func.count()).select_from(Observation)) == counts["observation"]
+        # Cada caso tiene al menos su auditoría de creación
+        assert counts["caseaudit"] >= 200
+        admin = (await db_session.execute(select(User).where(User.email == "ut-user0@loadtest.local"))).scalar_one()
+        assert admin.rol == UserRole.ADMIN
+
+    async def test_closed_cases_have_end_date(self, db_session):
+        args = build_parser().parse_args(["--users", "5", "--cases", "100", "--prefix", "UT"])
+        await generate(db_session, args)
+
+        open_with_end = await db_session.scalar(
+            select(func.count()).select_from(Case).where(Case.estado != CaseStatus.CERRADO, Case.fecha_fin.is_not(None))
+        )
+        closed_without_end = await db_session.scalar(
+            select(func.count()).select_from(Case).where(Case.estado == CaseStatus.CERRADO, Case.fecha_fin.is_(None))
+        )
+        assert open_with_end == 0
+        assert closed_without_end == 0
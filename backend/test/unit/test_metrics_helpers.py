@@ -0,0 +1,57 @@
+"""
+Tests unitarios para los helpers de métricas.
+"""
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.metrics import _route_template, count_io_rows, instrument_pool, observe_io_job
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.unit
+class TestMetricsHelpers:
+
+    def test_route_template_from_scope(self):
+        class Route:
+            path_format = "/cases/{case_id}"
+
+        assert _route_template({"route": Route()}) == "/cases/{case_id}"
+        assert _route_template({}) == "unmatched"
+
+    @pytest.mark.asyncio
+    async def test_observe_io_job_records_duration_on_error(self):
+        @observe_io_job("unit-test")
+        async def failing_import():
+            count_io_rows("unit-test", 7)
+            raise ValueError("bad file")
+
+        before = _sample("import_export_duration_seconds_count", operation="unit-test")
+        rows_before = _sample("import_export_rows_total", operation="unit-test")
+
+        with pytest.raises(ValueError):
+            await failing_import()
+
+        assert _sample("import_export_duration_seconds_count", operation="unit-test") == before + 1
+        assert _sample("import_export_rows_total", operation="unit-test") == rows_before + 7
+
+    def test_pool_gauges_follow_checkout_and_checkin(self, tmp_path):
+        """Cada proceso publica su pool al prestar y devolver conexiones, sin esperar al scrape."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=2)
+        instrument_pool(engine)
+        instrument_pool(engine)  # Idempotente
+
+        first, second = engine.connect(), engine.connect()
+        assert _sample("db_pool_connections", state="size") == 1
+        assert _sample("db_pool_connections", state="checked_out") == 2
+        assert _sample("db_pool_connections", state="overflow") == 1
+
+        first.close()
+        second.close()
+        assert _sample("db_pool_connections", state="checked_out") == 0
+        assert _sample("db_pool_connections", state="overflow") == 0
+        engine.dispose()
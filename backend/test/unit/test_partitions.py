@@ -0,0 +1,44 @@
+"""
+Tests unitarios para el DDL y el calendario del particionado mensual.
+"""
+from datetime import date, datetime
+
+import pytest
+
+from partitions import add_months, build_parser, month_start, partition_name, partitioned_table_ddl
+
+
+@pytest.mark.unit
+class TestPartitionCalendar:
+
+    def test_month_arithmetic(self):
+        assert month_start(datetime(2024, 2, 29, 23, 59)) == date(2024, 2, 1)
+        assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+        assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+
+    def test_partition_name(self):
+        assert partition_name("caseaudit", date(2024, 5, 1)) == "caseaudit_2024_05"
+
+    def test_detach_parser(self):
+        args = build_parser().parse_args(["detach", "--before", "2023-01", "--drop"])
+
+        assert args.before == date(2023, 1, 1)
+        assert args.drop is True
+
+
+@pytest.mark.unit
+class TestPartitionedDDL:
+
+    @pytest.mark.parametrize("table, key, keyset", [
+        ("observation", "created_at", "created_at"),
+        ("caseaudit", "timestamp", "recorded_at"),
+    ])
+    def test_parent_table(self, table, key, keyset):
+        create, *rest = partitioned_table_ddl(table)
+
+        assert create.endswith(f"PARTITION BY RANGE ({key})")
+        assert "id SERIAL NOT NULL" in create
+        assert f"CONSTRAINT {table}_pkey PRIMARY KEY (id, {key})" in create
+        assert 'REFERENCES "case" (id)' in create
+        assert f"CREATE INDEX ix_{table}_case_id_{keyset} ON {table} (case_id, {keyset})" in rest
+        assert rest[-1] == f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"
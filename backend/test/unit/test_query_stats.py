@@ -0,0 +1,51 @@
+"""
+Tests unitarios para el contador de consultas SQL.
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.query_stats import QueryStats, track_queries
+
+
+@pytest.mark.unit
+class TestQueryStats:
+
+    def test_repeated_detects_n_plus_one(self):
+        stats = QueryStats()
+        stats.statements["SELECT * FROM observation WHERE case_id = ?"] = 25
+        stats.statements["SELECT * FROM \"case\""] = 1
+
+        assert stats.repeated(threshold=10) == {"SELECT * FROM observation WHERE case_id = ?": 25}
+
+    @pytest.mark.asyncio
+    async def test_track_queries_counts_statements(self, db_session):
+        # La primera sentencia abre el SAVEPOINT del test: fuera del bloque medido
+        await db_session.execute(text("SELECT 1"))
+        with track_queries() as stats:
+            for _ in range(3):
+                await db_session.execute(text("SELECT 1"))
+
+        assert stats.count == 3
+        assert stats.statements["SELECT 1"] == 3
+        assert stats.duration > 0
+
+    @pytest.mark.asyncio
+    async def test_queries_outside_block_are_not_counted(self, db_session):
+        with track_queries() as stats:
+            pass
+        await db_session.execute(text("SELECT 1"))
+
+        assert stats.count == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_statement_leaves_no_start_time(self, db_session):
+        await db_session.execute(text("SELECT 1"))
+        connection = await db_session.connection()
+        with track_queries() as stats:
+            with pytest.raises(OperationalError):
+                await db_session.execute(text("SELECT * FROM missing_table"))
+            await db_session.execute(text("SELECT 1"))
+
+        assert stats.statements["SELECT 1"] == 1
+        assert not connection.sync_connection.info.get("query_start")
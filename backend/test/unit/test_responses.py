@@ -0,0 +1,50 @@
+"""
+Tests unitarios para la serialización JSON con orjson.
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.cache import JsonableCoder
+from app.models import Case, CaseStatus, Priority
+from app.responses import ORJSONResponse, dumps
+
+
+@pytest.mark.unit
+class TestResponses:
+
+    def test_dumps_matches_jsonable_encoder(self):
+        case = Case(
+            id=1,
+            codigo="CASE-1",
+            servicio_o_plataforma="Pagos",
+            prioridad=Priority.ALTO,
+            created_at=datetime(2024, 5, 1, 10, 30, 0, 123456),
+            updated_at=datetime(2024, 5, 2, 8, 0),
+        )
+        content = {
+            "items": [case],
+            "estado": CaseStatus.CERRADO,
+            "at": datetime(2024, 5, 1, 10, 30),
+            "ratio": Decimal("1.5"),
+            1: "clave entera",
+        }
+
+        assert json.loads(dumps(content)) == json.loads(json.dumps(jsonable_encoder(content)))
+
+    def test_response_sends_prerendered_bytes(self):
+        response = ORJSONResponse(content=b'{"cached":true}')
+
+        assert response.body == b'{"cached":true}'
+        assert response.headers["content-type"] == "application/json"
+
+    def test_coder_reuses_rendered_body(self):
+        response = ORJSONResponse({"items": [], "total": 0})
+
+        assert JsonableCoder.encode(response) == response.body
+        hit = JsonableCoder.decode_as_type(response.body, type_=None)
+        assert isinstance(hit, ORJSONResponse)
+        assert hit.body == response.body
@@ -0,0 +1,61 @@
+"""
+Tests unitarios para el registro de consultas lentas.
+"""
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app.slow_queries import SlowQueryRecorder
+
+
+@pytest.fixture
+def recorder(db_session):
+    """Recorder enganchado al engine de tests mientras dura el test."""
+    recorder = SlowQueryRecorder(threshold_ms=0.0, explain_rate=1.0, maxlen=3)
+    sync_engine = db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", recorder.before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", recorder.after_cursor_execute)
+    event.listen(sync_engine, "handle_error", recorder.handle_error)
+    yield recorder
+    event.remove(sync_engine, "before_cursor_execute", recorder.before_cursor_execute)
+    event.remove(sync_engine, "after_cursor_execute", recorder.after_cursor_execute)
+    event.remove(sync_engine, "handle_error", recorder.handle_error)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestSlowQueryRecorder:
+
+    async def test_records_statement_parameters_and_duration(self, db_session, recorder):
+        await db_session.execute(text("SELECT :value"), {"value": 42})
+
+        entry = recorder.recent()[0]
+        assert entry["statement"] == "SELECT ?"
+        assert "42" in entry["parameters"]
+        assert entry["duration_ms"] >= 0
+        # SQLite no captura planes
+        assert entry["plan"] is None
+
+    async def test_ring_buffer_is_bounded(self, db_session, recorder):
+        for value in range(5):
+            await db_session.execute(text("SELECT :value"), {"value": value})
+
+        entries = recorder.recent()
+        assert len(entries) == 3
+        assert "4" in entries[0]["parameters"]
+
+    async def test_fast_queries_are_ignored(self, db_session, recorder):
+        recorder.threshold_ms = 60_000
+
+        await db_session.execute(text("SELECT 1"))
+
+        assert recorder.recent() == []
+
+    async def test_failed_statement_leaves_no_start_time(self, db_session, recorder):
+        with pytest.raises(OperationalError):
+            await db_session.execute(text("SELECT * FROM missing_table"))
+        await db_session.execute(text("SELECT 1"))
+
+        connection = await db_session.connection()
+        assert not connection.sync_connection.info.get("slow_query_start")
+        assert recorder.recent()[0]["statement"] == "SELECT 1"
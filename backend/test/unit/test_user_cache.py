@@ -0,0 +1,54 @@
+"""
+Tests unitarios para el cache de nombres de usuario.
+"""
+import pytest
+
+from app import user_cache
+from app.cache import invalidate_users
+
+
+@pytest.mark.unit
+class TestUserNameCache:
+
+    def setup_method(self):
+        user_cache.clear_user_names()
+
+    def teardown_method(self):
+        user_cache.clear_user_names()
+
+    def test_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(user_cache, "USER_NAME_CACHE_SIZE", 2)
+
+        user_cache._remember(1, "Uno")
+        user_cache._remember(2, "Dos")
+        user_cache._remember(3, "Tres")
+
+        assert list(user_cache._user_names) == [2, 3]
+
+    def test_invalidate_user_name(self):
+        user_cache._remember(1, "Uno")
+
+        user_cache.invalidate_user_name(1)
+        user_cache.invalidate_user_name(99)  # No falla si no está
+
+        assert 1 not in user_cache._user_names
+
+    @pytest.mark.asyncio
+    async def test_resolve_only_queries_missing_ids(self, db_session, admin_user):
+        user_cache._remember(12345, "En Memoria")
+
+        names = await user_cache.resolve_user_names(db_session, [admin_user.id, 12345, None])
+
+        assert names == {admin_user.id: "Admin User", 12345: "En Memoria"}
+        assert user_cache._user_names[admin_user.id] == "Admin User"
+
+    @pytest.mark.asyncio
+    async def test_users_tag_bump_clears_names(self, db_session, admin_user):
+        """Un rename en otro worker incrementa el tag compartido: este worker recarga."""
+        await user_cache.resolve_user_names(db_session, [admin_user.id])
+        user_cache._remember(admin_user.id, "Nombre Viejo")
+        assert await user_cache.resolve_user_names(db_session, [admin_user.id]) == {admin_user.id: "Nombre Viejo"}
+
+        await invalidate_users()
+
+        assert await user_cache.resolve_user_names(db_session, [admin_user.id]) == {admin_user.id: "Admin User"}
@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useForm } from 'react-hook-form';
@@ -33,13 +33,26 @@ export default function CaseForm() {
     const user = userStr ? JSON.parse(userStr) : null;
     const currentUserId = user?.id;
 
-    // Fetch Timeline
+    // Fetch Timeline (incremental: only entries after the last cursor)
+    const timelineCursor = useRef<{ caseId?: string; cursor?: string; items: any[] }>({ items: [] });
     const { data: timeline = [] } = useQuery({
         queryKey: ['timeline', id],
         queryFn: async () => {
             if (!isEdit) return [];
-            const res = await api.get(`/cases/${id}/timeline`);
-            return res.data;
+            const state = timelineCursor.current;
+            if (state.caseId !== id) {
+                timelineCursor.current = { caseId: id, items: [] };
+            }
+            let hasMore = true;
+            while (hasMore) {
+                const res = await api.get(`/cases/${id}/timeline`, {
+                    params: { after: timelineCursor.current.cursor, limit: 500 }
+                });
+                timelineCursor.current.items = [...timelineCursor.current.items, ...res.data.items];
+                timelineCursor.current.cursor = res.data.cursor ?? timelineCursor.current.cursor;
+                hasMore = res.data.has_more;
+            }
+            return timelineCursor.current.items;
         },
         enabled: isEdit,
         refetchInterval: 10000 // Poll for chat updates
@@ -85,7 +98,10 @@ export default function CaseForm() {
     });
 
     const updateCaseMutation = useMutation({
-        mutationFn: (data: CaseFormData) => api.patch(`/cases/${id}`, data),
+        // If-Match: si otro usuario guardó antes, el backend responde 409
+        mutationFn: (data: CaseFormData) => api.patch(`/cases/${id}`, data, {
+            headers: caseData ? { 'If-Match': String(caseData.version) } : undefined,
+        }),
         onSuccess: () => {
             queryClient.invalidateQueries({ queryKey: ['cases'] });
             queryClient.invalidateQueries({ queryKey: ['case', id] });
@@ -95,6 +111,11 @@ export default function CaseForm() {
             navigate('/');
         },
         onError: (error: any) => {
+            if (error.response?.status === 409) {
+                queryClient.invalidateQueries({ queryKey: ['case', id] });
+                showToast('error', 'Conflicto', 'Otro usuario modificó el caso. Se recargaron los datos; revisa y vuelve a guardar.');
+                return;
+            }
             showToast('error', 'Error', error.response?.data?.detail || 'Error al actualizar caso');
         }
     });
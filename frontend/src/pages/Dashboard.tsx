@@ -63,6 +63,10 @@ export default function Dashboard() {
             params.append('skip', skip.toString());
             params.append('limit', itemsPerPage.toString());
 
+            // Solo las columnas que muestra la tabla; el detalle trae el texto completo
+            params.append('fields', 'codigo,estado,prioridad,servicio_o_plataforma,sby_responsable,novedades_y_comentarios,updated_at');
+            params.append('preview', '300');
+
             // Send timezone offset in minutes
             const offset = new Date().getTimezoneOffset();
             params.append('timezone_offset', offset.toString());
@@ -231,12 +235,17 @@ export default function Dashboard() {
         if (!confirmModal.action) return;
 
         try {
-            await api.post('/cases/bulk-update', {
+            const res = await api.post('/cases/bulk-update', {
                 ids: selectedIds,
                 action: confirmModal.action,
                 value: confirmModal.value
             });
-            showToast('success', 'Actualización Masiva', `Se han actualizado ${selectedIds.length} casos correctamente.`);
+            if (res.status === 202) {
+                // Large selections run as a background job on the server
+                showToast('success', 'Actualización Masiva', `La actualización de ${selectedIds.length} casos se está procesando.`);
+            } else {
+                showToast('success', 'Actualización Masiva', `Se han actualizado ${res.data.updated_count} casos correctamente.`);
+            }
             setSelectedIds([]);
             queryClient.invalidateQueries({ queryKey: ['cases'] });
             queryClient.invalidateQueries({ queryKey: ['stats'] });
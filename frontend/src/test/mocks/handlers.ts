@@ -72,6 +72,7 @@ export const handlers = [
       observaciones_list: [],
       created_at: '2024-01-01T00:00:00',
       updated_at: '2024-01-01T00:00:00',
+      version: 1,
     });
   }),
 
@@ -82,6 +83,7 @@ export const handlers = [
       codigo: `CASE-${params.id}`,
       ...body,
       updated_at: new Date().toISOString(),
+      version: 2,
     });
   }),
 